@@ -0,0 +1,319 @@
+"""
+asyncio serving mode: the API of `backend.server` served from one aiohttp event loop.
+
+`/recommend` and `/chat` stream from the async API of the LLM client, so an open stream costs a
+coroutine instead of a worker thread for the whole generation, and one process holds hundreds of
+them. They validate requests, answer errors and send the same Server-Sent Events as the Flask
+routes, and share their conversation sessions. Every other route, and CORS preflight requests, are
+answered by the Flask app itself on a pool of `ASYNC_WSGI_THREADS` threads.
+
+Concurrent streams are then bounded by the LLM connection pool: raise `LLM_POOL_MAX_CONNECTIONS`
+to the number of streams the Ollama server should see at once.
+
+Usage:
+    python -m backend.async_server
+"""
+
+import asyncio
+import io
+import itertools
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote_to_bytes
+
+from aiohttp import web
+
+from backend.config.settings import (
+    ASYNC_SERVER_PORT,
+    ASYNC_WSGI_THREADS,
+    DRIVER_POOL_WARM,
+)
+from backend.driver_pool import driver_pool, resolve_driver_path
+from backend.model import get_llm
+from backend.prompt import prompt_template_recommendation
+from backend.server import (
+    CORS_EXPOSE_HEADERS,
+    CORS_ORIGINS,
+    app,
+    build_recommendation_input,
+    cached_recommendation,
+    chat_prompt,
+    chunk_content,
+    conversation_store,
+    recommendation_cache_key,
+    save_recommendation,
+    sse_event,
+)
+from backend.utils import generate_session_id, get_or_create_conversation
+
+# Threads running the Flask app for the routes that block
+wsgi_executor = ThreadPoolExecutor(ASYNC_WSGI_THREADS, thread_name_prefix="wsgi")
+
+
+def cors_headers(request: web.Request) -> dict:
+    """Return the CORS headers Flask-CORS would add to a response to `request`."""
+    origin = request.headers.get("Origin")
+    if origin not in CORS_ORIGINS:
+        return {}
+    return {
+        "Access-Control-Allow-Origin": origin,
+        "Access-Control-Allow-Credentials": "true",
+        "Access-Control-Expose-Headers": ", ".join(CORS_EXPOSE_HEADERS),
+        "Vary": "Origin",
+    }
+
+
+async def read_json(request: web.Request) -> dict:
+    """
+    Return the JSON object in the body of `request`.
+
+    Raises:
+        web.HTTPBadRequest: If the body is not a JSON object.
+    """
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    if not isinstance(data, dict):
+        raise web.HTTPBadRequest(
+            text='{"error": "Invalid JSON body"}',
+            content_type="application/json",
+            headers=cors_headers(request),
+        )
+    return data
+
+
+async def send_events(request: web.Request, events, session_id: str):
+    """
+    Send the events of an async generator as a `text/event-stream` response.
+
+    The generator is closed if the client goes away, which stops the LLM generation.
+    """
+    response = web.StreamResponse(
+        headers={
+            "Content-Type": "text/event-stream; charset=utf-8",
+            "Cache-Control": "no-cache",
+            "X-Session-Id": session_id,
+            **cors_headers(request),
+        }
+    )
+    await response.prepare(request)
+    try:
+        async for event in events:
+            await response.write(event.encode())
+    finally:
+        await events.aclose()
+    await response.write_eof()
+    return response
+
+
+async def astream_recommend(llm_input: str, session_id: str, cache_key: str = None):
+    """
+    Stream AI-generated recommendations; the async counterpart of `stream_recommend`.
+
+    Args:
+        llm_input (str): Formatted input string containing product name, ingredients, and user profile.
+        session_id (str): Unique session identifier for conversation context tracking.
+        cache_key (str, optional): Key of the recommendation in `recommendation_cache`, or
+            `None` to always generate it.
+
+    Yields:
+        str: Server-Sent Events with the AI's response, as sent by `/recommend`.
+    """
+    llm = get_llm()
+    llm_input = prompt_template_recommendation.format(input=llm_input)
+    loop = asyncio.get_running_loop()
+
+    try:
+        # The cache may read and write its file; keep that off the event loop
+        cached_chunks = await loop.run_in_executor(
+            None, cached_recommendation, cache_key
+        )
+        if cached_chunks is not None:
+            chunks = cached_chunks
+            for content in chunks:
+                yield sse_event({"content": content})
+            cache_key = None  # Already cached
+        else:
+            chunks = []
+            async for chunk in llm.astream(
+                llm_input, config={"metadata": {"endpoint": "recommend"}}
+            ):
+                content = chunk_content(chunk)
+                chunks.append(content)
+                yield sse_event({"content": content})
+
+        await loop.run_in_executor(
+            None, save_recommendation, llm_input, chunks, session_id, cache_key
+        )
+    except Exception as e:
+        print("Error during streaming:", str(e))
+        yield sse_event({"error": str(e)})
+
+
+async def astream_chat(user_message: str, session_id: str):
+    """
+    Stream AI-generated answers to follow-up questions; the async counterpart of `stream_chat`.
+
+    Args:
+        user_message (str): User's query.
+        session_id (str): Unique session identifier for conversation context tracking.
+
+    Yields:
+        str: Server-Sent Events with the AI's response, as sent by `/chat`.
+    """
+    try:
+        conversation_chain = get_or_create_conversation(conversation_store, session_id)
+        full_response = ""
+
+        async for chunk in conversation_chain.llm.astream(
+            chat_prompt(conversation_chain, user_message),
+            config={"metadata": {"endpoint": "chat"}},
+        ):
+            content = chunk_content(chunk)
+            full_response += content
+            yield sse_event({"content": content})
+
+        conversation_chain.memory.save_context(
+            {"input": user_message}, {"output": full_response}
+        )
+    except Exception as e:
+        print(f"Error during streaming: {str(e)}")
+        yield sse_event({"error": str(e)})
+
+
+async def recommend(request: web.Request):
+    """Stream a product recommendation; see `recommend_product` in `backend.server`."""
+    data = await read_json(request)
+    session_id = data.get("session_id")
+
+    try:
+        llm_input = build_recommendation_input(data)
+    except ValueError as e:
+        return web.json_response(
+            {"error": str(e)}, status=400, headers=cors_headers(request)
+        )
+
+    if not session_id:
+        session_id = generate_session_id()
+
+    cache_key = recommendation_cache_key(llm_input, get_llm())
+    return await send_events(
+        request, astream_recommend(llm_input, session_id, cache_key), session_id
+    )
+
+
+async def chat(request: web.Request):
+    """Stream the answer to a follow-up question; see `chat` in `backend.server`."""
+    data = await read_json(request)
+    session_id = data.get("session_id")
+    user_message = data.get("message")
+
+    if not session_id:
+        return web.json_response(
+            {"error": "Missing session_id"}, status=400, headers=cors_headers(request)
+        )
+    if not user_message:
+        return web.json_response(
+            {"error": "Missing user message"}, status=400, headers=cors_headers(request)
+        )
+
+    return await send_events(
+        request, astream_chat(user_message, session_id), session_id
+    )
+
+
+def wsgi_environ(request: web.Request, body: bytes) -> dict:
+    """Build the WSGI environ of `request` with its `body` already read."""
+    path, _, query = request.raw_path.partition("?")
+    host, _, port = request.host.partition(":")
+    environ = {
+        "REQUEST_METHOD": request.method,
+        "SCRIPT_NAME": "",
+        "PATH_INFO": unquote_to_bytes(path).decode("latin-1"),
+        "QUERY_STRING": query,
+        "SERVER_NAME": host,
+        "SERVER_PORT": port or ("443" if request.secure else "80"),
+        "SERVER_PROTOCOL": f"HTTP/{request.version.major}.{request.version.minor}",
+        "REMOTE_ADDR": request.remote or "",
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": request.scheme,
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for name, value in request.headers.items():
+        key = name.upper().replace("-", "_")
+        if key == "CONTENT_LENGTH":
+            continue
+        if key != "CONTENT_TYPE":
+            key = f"HTTP_{key}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+async def wsgi_fallback(request: web.Request):
+    """
+    Answer `request` with the Flask app, on a thread of `wsgi_executor`.
+
+    The app runs and its response body is iterated on one thread, so streamed responses keep
+    their request context; each chunk is sent before the next one is produced. Data passed to
+    the `write` callable returned by `start_response` is buffered and sent before the body.
+    """
+    loop = asyncio.get_running_loop()
+    environ = wsgi_environ(request, await request.read())
+
+    def run(coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+    def call_app():
+        started = []
+        written = []
+
+        def start_response(status, headers, exc_info=None):
+            started[:] = [status, headers]
+            return written.append
+
+        result = app(environ, start_response)
+        try:
+            status, headers = started
+            code, _, reason = status.partition(" ")
+            response = web.StreamResponse(status=int(code), reason=reason)
+            for name, value in headers:
+                response.headers.add(name, value)
+            run(response.prepare(request))
+            for chunk in itertools.chain(written, result):
+                if chunk:
+                    run(response.write(chunk))
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        return response
+
+    response = await loop.run_in_executor(wsgi_executor, call_app)
+    await response.write_eof()
+    return response
+
+
+def create_app() -> web.Application:
+    """
+    Create the aiohttp application serving every route of `backend.server`.
+
+    Example:
+        >>> web.run_app(create_app(), port=5000)
+    """
+    async_app = web.Application()
+    async_app.router.add_post("/recommend", recommend)
+    async_app.router.add_post("/chat", chat)
+    async_app.router.add_route("*", "/{path:.*}", wsgi_fallback)
+    return async_app
+
+
+if __name__ == "__main__":
+    # Resolve chromedriver and start browser sessions before the first cache miss
+    resolve_driver_path()
+    driver_pool.warm(DRIVER_POOL_WARM)
+    web.run_app(create_app(), port=ASYNC_SERVER_PORT)
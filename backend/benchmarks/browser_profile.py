@@ -0,0 +1,173 @@
+"""
+Benchmark time-to-ingredient-table for the default and the lean Chrome scraping profiles.
+
+Serves the recorded EWG product pages from `backend/tests/fixtures/ewg` on a local HTTP
+server, padded with the kind of subresources the real pages pull in (stylesheets, web
+fonts, product images and an analytics script), each delayed by `ASSET_DELAY` seconds to
+stand in for network latency. Stylesheets, fonts and scripts are shared by every load and
+may be cached, while images differ per load, as product photos do on the real site.
+
+Each profile loads every page `REPEATS` times in one session and reports the median time from
+`driver.get` until the ingredient table is present, along with how many subresource requests
+reached the server. The disk cache profile is measured in a second session, after a first
+session has filled the cache, as happens when the driver pool recycles a browser.
+
+Requires Chrome; chromedriver is resolved like in the scraper.
+
+Usage:
+    python -m backend.benchmarks.browser_profile
+"""
+
+import statistics
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from backend.driver_pool import create_driver
+
+FIXTURES = Path(__file__).parent.parent / "tests" / "fixtures" / "ewg"
+REPEATS = 10
+ASSET_DELAY = 0.05
+IMAGES = 20
+
+HEAD_ASSETS = "\n".join(
+    [
+        '<link rel="stylesheet" href="/skindeep/assets/vendor.css">',
+        '<link rel="stylesheet" href="/skindeep/assets/fonts.css">',
+        '<script src="/analytics/gtag.js"></script>',
+    ]
+)
+# "{load}" is replaced per page load, so images are never served from cache
+BODY_ASSETS = "\n".join(
+    f'<img src="/skindeep/images/product-{{load}}-{i}.jpg" alt="">'
+    for i in range(IMAGES)
+)
+FONTS_CSS = "\n".join(
+    f'@font-face {{ font-family: "f{i}"; src: url("/skindeep/assets/font-{i}.woff2"); }}'
+    f' body {{ font-family: "f{i}"; }}'
+    for i in range(4)
+).encode()
+
+CONTENT_TYPES = {
+    ".css": "text/css",
+    ".js": "application/javascript",
+    ".jpg": "image/jpeg",
+    ".svg": "image/svg+xml",
+    ".woff2": "font/woff2",
+}
+
+
+def load_pages():
+    """Return the recorded product pages that have an ingredient table, keyed by URL path."""
+    pages = {}
+    for fixture in sorted(FIXTURES.glob("product_page*.html")):
+        html = fixture.read_text(encoding="utf-8")
+        if "ingredient-overview-tr" not in html:
+            continue
+        html = html.replace("</head>", f"{HEAD_ASSETS}\n</head>", 1)
+        html = html.replace("</body>", f"{BODY_ASSETS}\n</body>", 1)
+        pages[f"/skindeep/products/{fixture.stem}/"] = html.encode()
+    return pages
+
+
+class PageSetHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        page = self.server.pages.get(self.path)
+        if page is not None:
+            with self.server.lock:
+                self.server.loads += 1
+                load = self.server.loads
+            page = page.replace(b"{load}", str(load).encode())
+            self._send(page, "text/html; charset=utf-8", "no-cache")
+            return
+
+        with self.server.lock:
+            self.server.asset_requests += 1
+        time.sleep(ASSET_DELAY)
+        suffix = Path(self.path).suffix
+        if self.path.endswith("fonts.css"):
+            body = FONTS_CSS
+        elif suffix in (".css", ".js"):
+            body = b"/* padding */\n" * 5_000
+        else:
+            body = b"\0" * 50_000
+        self._send(body, CONTENT_TYPES.get(suffix, "application/octet-stream"))
+
+    def _send(self, body, content_type, cache_control="public, max-age=86400"):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", cache_control)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def time_to_ingredient_table(driver, url):
+    start = time.perf_counter()
+    driver.get(url)
+    WebDriverWait(driver, 30).until(
+        EC.presence_of_element_located(
+            (By.CSS_SELECTOR, "td.td-ingredient .td-ingredient-interior")
+        )
+    )
+    return time.perf_counter() - start
+
+
+def run_profile(server, base_url, lean, cache_dir=""):
+    driver = create_driver(lean=lean, cache_dir=cache_dir)
+    try:
+        samples = []
+        with server.lock:
+            server.asset_requests = 0
+        for _ in range(REPEATS):
+            for path in server.pages:
+                samples.append(time_to_ingredient_table(driver, base_url + path))
+        return statistics.median(samples) * 1e3, server.asset_requests
+    finally:
+        driver.quit()
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PageSetHandler)
+    server.pages = load_pages()
+    server.lock = threading.Lock()
+    server.asset_requests = 0
+    server.loads = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    loads = REPEATS * len(server.pages)
+    print(
+        f"{len(server.pages)} page(s) x {REPEATS} loads, {ASSET_DELAY * 1e3:g} ms per asset"
+    )
+    print(f"{'profile':>20} {'median ms':>10} {'asset requests':>15}")
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            run_profile(server, base_url, True, cache_dir)  # Fill the disk cache
+            profiles = [
+                ("default", False, ""),
+                ("lean", True, ""),
+                ("lean + disk cache", True, cache_dir),
+            ]
+            for name, lean, cache in profiles:
+                median_ms, requests = run_profile(server, base_url, lean, cache)
+                print(
+                    f"{name:>20} {median_ms:>10.1f} {requests:>15} ({requests / loads:.1f}/load)"
+                )
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark product cache lookups as the number of cached products grows.
+
+Compares the legacy access pattern (re-reading `product_cache.json` on every lookup)
+with the resident `JsonFileStorage` index and the indexed `SQLiteStorage` table. Lookup
+latency of both backends should stay flat from a few hundred to tens of thousands of
+cached products.
+
+Usage:
+    python -m backend.benchmarks.cache_lookup
+"""
+
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+from backend.storage import JsonFileStorage, SQLiteStorage, load_cache, save_cache
+
+SIZES = [100, 1_000, 10_000, 25_000]
+LOOKUPS = 2_000
+LEGACY_LOOKUPS = 20
+
+
+def make_record(i):
+    return {
+        "product_url": f"https://www.ewg.org/skindeep/products/{i}-Product_{i}/",
+        "product_name": f"Product {i}",
+        "ingredients": [
+            {"name": "Water", "score": "1", "concerns": []},
+            {"name": "Glycerin", "score": "1", "concerns": []},
+            {
+                "name": "Fragrance",
+                "score": "8",
+                "concerns": ["Allergies/immunotoxicity (high)"],
+            },
+        ],
+        "last_updated": datetime.now().isoformat(),
+    }
+
+
+def lookup_via_alias(storage):
+    def lookup(key):
+        product_url, _ = storage.get_alias(key)
+        return storage.get(product_url)
+
+    return lookup
+
+
+def time_lookups(lookup, keys):
+    samples = []
+    for key in keys:
+        start = time.perf_counter()
+        lookup(key)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e6
+
+
+def run(size, directory):
+    path = os.path.join(directory, f"cache_{size}.json")
+    legacy = {f"product {i}": make_record(i) for i in range(size)}
+    save_cache(legacy, path)
+
+    cache = JsonFileStorage(path)
+    cache.get("warm-up")  # Load the index once, outside the timed section
+    keys = [f"product {random.randrange(size)}" for _ in range(LOOKUPS)]
+    resident_us = time_lookups(lookup_via_alias(cache), keys)
+
+    database = SQLiteStorage(os.path.join(directory, f"cache_{size}.db"))
+    database.import_legacy(legacy.items())
+    sqlite_us = time_lookups(lookup_via_alias(database), keys)
+    database.close()
+
+    legacy_us = time_lookups(
+        lambda key: load_cache(path).get(key), keys[:LEGACY_LOOKUPS]
+    )
+    return resident_us, sqlite_us, legacy_us
+
+
+if __name__ == "__main__":
+    print(f"{'products':>10} {'json (us)':>12} {'sqlite (us)':>12} {'reload (us)':>14}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in SIZES:
+            resident_us, sqlite_us, legacy_us = run(size, directory)
+            print(
+                f"{size:>10} {resident_us:>12.2f} {sqlite_us:>12.2f} {legacy_us:>14.1f}"
+            )
@@ -0,0 +1,94 @@
+"""
+Benchmark parsing saved EWG product pages as the number of ingredients grows.
+
+The scraper used to read every ingredient name, score and concerns cell through a separate
+WebDriver call, so extraction cost grew with the ingredient count in browser round trips.
+It now grabs `page_source` once and parses it with `parse_product_page`. This benchmark
+times that parse on the saved fixture pages, scaled up to larger ingredient lists, next to
+the cost of only building a BeautifulSoup tree of the same page, and reports how many
+WebDriver round trips the old per-element extraction needed for the same page.
+
+Usage:
+    python -m backend.benchmarks.product_page
+"""
+
+import re
+import statistics
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from backend.parser import parse_product_page
+
+FIXTURES = Path(__file__).parent.parent / "tests" / "fixtures" / "ewg"
+SIZES = [10, 50, 200]
+REPEATS = 50
+
+_ROWS = re.compile(
+    r"(<tbody>\s*)(<tr class=\"ingredient-overview-tr\">.*</tr>)(\s*</tbody>\s*</table>\s*</section>)",
+    re.S,
+)
+
+
+def scale_page(html, ingredients):
+    """Repeat the fixture's ingredient rows until the page lists `ingredients` ingredients."""
+    match = _ROWS.search(html)
+    rows = match.group(2)
+    per_copy = rows.count('class="ingredient-overview-tr"')
+    copies = -(-ingredients // per_copy)
+    return html[: match.start(2)] + rows * copies + html[match.end(2) :]
+
+
+def legacy_round_trips(html):
+    """Count the WebDriver calls the old per-element extraction made for `html`."""
+    soup = BeautifulSoup(html, "html.parser")
+    ingredients = len(soup.select("tr.ingredient-overview-tr"))
+    calls = 2  # product name element and its text
+    calls += 1 + ingredients  # ingredient elements and their text
+    calls += 1 + ingredients  # score elements and their alt attribute
+    tbodies = soup.select(
+        "tr.ingredient-more-info-wrapper div.ingredient-more-info table tbody"
+    )
+    calls += 1  # concern sections
+    for tbody in tbodies:
+        calls += 2  # outerHTML and its rows
+        for tr in tbody.find_all("tr"):
+            tds = tr.find_all("td")
+            calls += 1 + len(tds)  # cells and their outerHTML
+            if len(tds) > 1 and "CONCERNS" in tds[0].get_text():
+                calls += 1  # innerHTML of the concerns cell
+                break
+    return calls
+
+
+def time_parse(parse, html):
+    samples = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        parse(html)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e3
+
+
+def main():
+    for fixture in sorted(FIXTURES.glob("*.html")):
+        html = fixture.read_text(encoding="utf-8")
+        if not parse_product_page(html)["ingredients"]:
+            continue
+        print(f"\n{fixture.name}")
+        print(
+            f"{'ingredients':>12} {'round trips (old)':>18} {'parse ms':>9} {'bs4 tree ms':>12}"
+        )
+        for size in SIZES:
+            page = scale_page(html, size)
+            parse_ms = time_parse(parse_product_page, page)
+            soup_ms = time_parse(lambda html: BeautifulSoup(html, "html.parser"), page)
+            print(
+                f"{len(parse_product_page(page)['ingredients']):>12} "
+                f"{legacy_round_trips(page):>18} {parse_ms:>9.2f} {soup_ms:>12.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Benchmark `/recommend` prompt size: the verbose ingredient formatter against the compact encoder.
+
+Builds the recommendation prompt of synthetic products with realistic EWG scores and concerns
+(mostly low hazard ingredients, a repeated pool of concern strings) in both formats, and reports
+their estimated prompt tokens (see `estimate_tokens`).
+
+`--live` also streams each prompt from the configured `LLM_BASE_URL` and `LLM_MODEL`, and reports
+the prompt tokens counted by the model's tokenizer and the median time to the first streamed
+token, so the effect on prefill latency is measured on a real model rather than estimated.
+
+`test_ingredient_encoding.py` runs a small comparison, so a regression in prompt size fails.
+
+Usage:
+    python -m backend.benchmarks.prompt_encoding
+    python -m backend.benchmarks.prompt_encoding --live --sizes 40 60
+"""
+
+import argparse
+import random
+import statistics
+import time
+from unittest.mock import patch
+
+from backend.ingredient_encoding import estimate_tokens
+from backend.model import get_llm
+from backend.prompt import prompt_template_recommendation
+from backend.server import build_recommendation_input
+
+SIZES = [20, 40, 60]
+REPEATS = 5
+FORMATS = ["verbose", "compact"]
+
+NAMES = [
+    "Water",
+    "Glycerin",
+    "Butylene Glycol",
+    "Niacinamide",
+    "Cetearyl Alcohol",
+    "Dimethicone",
+    "Caprylic/Capric Triglyceride",
+    "Sodium Hyaluronate",
+    "Panthenol",
+    "Ceramide NP",
+    "Squalane",
+    "Tocopherol",
+    "Allantoin",
+    "Xanthan Gum",
+    "Carbomer",
+    "Sodium Hydroxide",
+    "Disodium EDTA",
+    "Ethylhexylglycerin",
+    "Phenoxyethanol",
+    "Methylparaben",
+    "Propylparaben",
+    "Fragrance",
+    "Linalool",
+    "Limonene",
+    "Retinyl Palmitate",
+    "Oxybenzone",
+    "Triethanolamine",
+    "PEG-100 Stearate",
+    "Polysorbate 20",
+    "Benzyl Alcohol",
+]
+CONCERNS = [
+    "Allergies/immunotoxicity (moderate)",
+    "Irritation (skin, eyes, or lungs) (high)",
+    "Cancer (low)",
+    "Developmental and reproductive toxicity (moderate)",
+    "Endocrine disruption (moderate)",
+    "Organ system toxicity (non-reproductive) (moderate)",
+    "Use restrictions (moderate)",
+    "Ecotoxicology (low)",
+    "Contamination concerns",
+    "Data gaps",
+]
+PROFILE = {"skinType": "Combination", "skinConcerns": "Acne", "allergies": "None"}
+
+
+def make_product(size, seed=0):
+    """
+    Return a `/recommend` request for a synthetic product with `size` ingredients.
+
+    About 70% of the ingredients score 1-2, 20% score 3-6 and 10% score 7-10; the more hazardous
+    an ingredient, the more concerns it has, drawn from a shared pool as on EWG.
+    """
+    rng = random.Random(seed)
+    ingredients = []
+    for i in range(size):
+        band = rng.random()
+        if band < 0.7:
+            score = rng.randint(1, 2)
+            concerns = rng.sample(CONCERNS[-3:], rng.randint(0, 1))
+        elif band < 0.9:
+            score = rng.randint(3, 6)
+            concerns = rng.sample(CONCERNS, rng.randint(1, 3))
+        else:
+            score = rng.randint(7, 10)
+            concerns = rng.sample(CONCERNS, rng.randint(2, 4))
+        name = NAMES[i % len(NAMES)]
+        if i >= len(NAMES):
+            name = f"{name} Extract {i // len(NAMES)}"
+        ingredients.append({"name": name, "score": str(score), "concerns": concerns})
+    return {
+        "product_name": f"Synthetic Product {size}",
+        "ingredients": ingredients,
+        "user_profile": PROFILE,
+    }
+
+
+def build_prompt(data, prompt_format):
+    """Render the recommendation prompt of `data` with ingredients listed as `prompt_format`."""
+    with patch("backend.server.INGREDIENT_PROMPT_FORMAT", prompt_format):
+        return prompt_template_recommendation.format(
+            input=build_recommendation_input(data)
+        )
+
+
+def time_first_token(llm, prompt, repeats=REPEATS):
+    """
+    Stream `prompt` from `llm` `repeats` times.
+
+    Returns:
+        tuple[float, int | None]: Median milliseconds to the first streamed chunk, and the
+            prompt tokens reported by the LLM server.
+    """
+    samples = []
+    prompt_tokens = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        first = None
+        for chunk in llm.stream(prompt):
+            if first is None:
+                first = time.perf_counter() - start
+            if getattr(chunk, "usage_metadata", None):
+                prompt_tokens = chunk.usage_metadata["input_tokens"]
+        samples.append(first)
+    return statistics.median(samples) * 1e3, prompt_tokens
+
+
+def compare(sizes=SIZES, llm=None, repeats=REPEATS):
+    """
+    Measure the recommendation prompt of a product of each size in each format.
+
+    Args:
+        llm (ChatOllama, optional): A model to stream each prompt from. Without one, only
+            estimated token counts are reported.
+
+    Returns:
+        list[dict]: Ingredients, format and estimated tokens of each prompt, plus the prompt
+            tokens reported by `llm` and the median milliseconds to its first token (`None`
+            without `llm`).
+    """
+    results = []
+    for size in sizes:
+        data = make_product(size)
+        for prompt_format in FORMATS:
+            prompt = build_prompt(data, prompt_format)
+            ttft_ms, prompt_tokens = None, None
+            if llm is not None:
+                ttft_ms, prompt_tokens = time_first_token(llm, prompt, repeats)
+            results.append(
+                {
+                    "ingredients": size,
+                    "format": prompt_format,
+                    "estimated_tokens": estimate_tokens(prompt),
+                    "prompt_tokens": prompt_tokens,
+                    "ttft_ms": ttft_ms,
+                }
+            )
+    return results
+
+
+def report(results):
+    print(
+        f"{'ingredients':>12} {'format':>8} {'est. tokens':>12} "
+        f"{'prompt tokens':>14} {'ttft ms':>9}"
+    )
+    for r in results:
+        print(
+            f"{r['ingredients']:>12} {r['format']:>8} {r['estimated_tokens']:>12} "
+            f"{r['prompt_tokens'] or '-':>14} "
+            f"{'-' if r['ttft_ms'] is None else round(r['ttft_ms']):>9}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--live", action="store_true")
+    args = parser.parse_args()
+
+    report(compare(args.sizes, get_llm() if args.live else None, args.repeats))
+
+
+if __name__ == "__main__":
+    main()
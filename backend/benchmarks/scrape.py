@@ -0,0 +1,182 @@
+"""
+Benchmark end-to-end scrapes against recorded EWG pages, fully offline.
+
+Replays the pages of `backend/tests/fixtures/ewg` from a local `ReplayServer` and times
+`fetch_product_ingredients` from the first request to the parsed product, with empty
+in-memory caches and no rate limit, so only fetching and parsing is measured. Scrapes are
+timed cold (search page and product page) and with the query already resolved to its
+product page (see `ResolutionCache`). Next to the median latency it reports how many pages
+each scrape requested, the number most likely to regress when the scraper changes.
+
+It then times `parse_product_page` on the fixture product page scaled to growing ingredient
+counts and reports the parse time per ingredient, which should stay flat.
+
+`--check` compares the results against loose budgets (`SCRAPE_BUDGET_MS` and
+`PARSE_BUDGET_US_PER_INGREDIENT`) and exits with status 1 if one is exceeded. Timings depend on
+the machine, so the unit tests in `test_scrape_benchmark.py` only check page and connection
+counts; the Selenium path is only tested there with `SCRAPE_BROWSER_TESTS=true` and Chrome.
+
+Usage:
+    python -m backend.benchmarks.scrape
+    python -m backend.benchmarks.scrape --check
+    python -m backend.benchmarks.scrape --browser  # Selenium path, requires Chrome
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from contextlib import ExitStack
+from unittest.mock import patch
+
+from backend.benchmarks.product_page import scale_page, time_parse
+from backend.parser import parse_product_page
+from backend.replay import FIXTURES_DIR, ReplayServer
+from backend.resolution_cache import ResolutionCache
+from backend.scraper import fetch_product_ingredients
+from backend.upstream import UpstreamScheduler
+
+QUERY = "cerave"
+SIZES = [10, 50, 200]
+REPEATS = 20
+
+# Loose budgets: an order of magnitude above the benchmark on a laptop, so only real
+# regressions (an extra page load, a per-ingredient browser round trip) exceed them
+SCRAPE_BUDGET_MS = 250
+PARSE_BUDGET_US_PER_INGREDIENT = 1500
+
+
+def offline_scraper(server, browser=False):
+    """
+    Point the scraper at `server`, with product caching disabled and no rate limit.
+
+    Args:
+        server (ReplayServer): The running replay server.
+        browser (bool, optional): Scrape with Selenium instead of the HTTP fast path.
+
+    Returns:
+        ExitStack: Undoes the patches when closed or used as a context manager.
+    """
+    stack = ExitStack()
+    patches = [
+        patch("backend.scraper.EWG_BASE_URL", server.base_url),
+        patch("backend.scraper.HTTP_FAST_PATH", not browser),
+        patch("backend.scraper.upstream", UpstreamScheduler(rate=1e6, burst=1e6)),
+        patch("backend.scraper.cache_product_data"),
+        patch("backend.scraper.get_cached_product_by_url", return_value=None),
+        patch("backend.scraper.link_query"),
+    ]
+    for p in patches:
+        stack.enter_context(p)
+    return stack
+
+
+def time_scrape(server, query=QUERY, resolved=False, repeats=REPEATS):
+    """
+    Time scrapes of `query` against `server`; call inside `offline_scraper`.
+
+    Args:
+        resolved (bool, optional): Resolve the query to its product page before timing, so
+            scrapes skip the search page.
+
+    Returns:
+        tuple[float, float]: Median scrape time in milliseconds and pages requested per scrape.
+    """
+    resolutions = ResolutionCache(path=None)
+    samples = []
+    requested = 0
+    with patch("backend.scraper.resolution_cache", resolutions):
+        if resolved:
+            fetch_product_ingredients(query)
+        for _ in range(repeats):
+            if not resolved:
+                resolutions.discard(query)
+            before = len(server.requested)
+            start = time.perf_counter()
+            result = fetch_product_ingredients(query)
+            samples.append(time.perf_counter() - start)
+            requested += len(server.requested) - before
+            if "error" in result:
+                raise RuntimeError(f"Scrape of {query!r} failed: {result['error']}")
+    return statistics.median(samples) * 1e3, requested / repeats
+
+
+def parse_us_per_ingredient(sizes=SIZES):
+    """
+    Time `parse_product_page` on the fixture product page scaled to each ingredient count.
+
+    Returns:
+        dict: Ingredient count -> median parse time per ingredient, in microseconds.
+    """
+    html = (FIXTURES_DIR / "product_page.html").read_text(encoding="utf-8")
+    results = {}
+    for size in sizes:
+        page = scale_page(html, size)
+        ingredients = len(parse_product_page(page)["ingredients"])
+        results[ingredients] = time_parse(parse_product_page, page) * 1e3 / ingredients
+    return results
+
+
+def over_budget(scrape_ms, per_ingredient):
+    """
+    Compare benchmark results against the budgets.
+
+    Args:
+        scrape_ms (dict): Scrape name -> median scrape time in milliseconds.
+        per_ingredient (dict): Ingredient count -> parse time per ingredient in microseconds,
+            as returned by `parse_us_per_ingredient`.
+
+    Returns:
+        list[str]: A description of every exceeded budget.
+    """
+    failures = [
+        f"{name} scrape took {ms:.1f} ms, budget {SCRAPE_BUDGET_MS} ms"
+        for name, ms in scrape_ms.items()
+        if ms >= SCRAPE_BUDGET_MS
+    ]
+    smallest, largest = min(per_ingredient), max(per_ingredient)
+    if per_ingredient[largest] >= PARSE_BUDGET_US_PER_INGREDIENT:
+        failures.append(
+            f"parsing {largest} ingredients took {per_ingredient[largest]:.1f} us each, "
+            f"budget {PARSE_BUDGET_US_PER_INGREDIENT} us"
+        )
+    if per_ingredient[largest] >= 3 * per_ingredient[smallest]:
+        failures.append(
+            f"parse time per ingredient grew from {per_ingredient[smallest]:.1f} us "
+            f"to {per_ingredient[largest]:.1f} us"
+        )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--browser", action="store_true", help="scrape with Selenium")
+    parser.add_argument("--check", action="store_true", help="fail over budget")
+    args = parser.parse_args()
+
+    path = "selenium" if args.browser else "http"
+    print(f"End-to-end scrape of {QUERY!r}, {path} path, {REPEATS} runs")
+    print(f"{'scrape':>10} {'median ms':>10} {'pages/scrape':>13}")
+    scrape_ms = {}
+    with ReplayServer() as server, offline_scraper(server, browser=args.browser):
+        for name, resolved in [("cold", False), ("resolved", True)]:
+            median_ms, pages = time_scrape(server, resolved=resolved)
+            scrape_ms[name] = median_ms
+            print(f"{name:>10} {median_ms:>10.2f} {pages:>13.1f}")
+
+    print("\nparse_product_page")
+    print(f"{'ingredients':>12} {'us/ingredient':>14}")
+    per_ingredient = parse_us_per_ingredient()
+    for ingredients, us in per_ingredient.items():
+        print(f"{ingredients:>12} {us:>14.1f}")
+
+    if args.check:
+        failures = over_budget(scrape_ms, per_ingredient)
+        for failure in failures:
+            print(f"❌ {failure}")
+        if failures:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
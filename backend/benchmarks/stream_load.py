@@ -0,0 +1,313 @@
+"""
+Load test of concurrent `/recommend` streams: the Flask server against the asyncio serving mode.
+
+A local stand-in for Ollama streams every chat completion as `TOKENS` tokens, one every
+`TOKEN_DELAY` seconds, so each stream stays open for a fixed time and no model is needed. The
+Flask app runs on a WSGI server with a pool of `FLASK_THREADS` worker threads, as under a threaded
+production server, and `backend.async_server` runs on one event loop. Both talk to the stand-in
+through the shared LLM client with an unbounded connection pool.
+
+For each number of concurrent clients, it reports the streams that completed, the peak number of
+generations the LLM server saw at once, the median and 99th percentile time to the first event,
+and the wall time until the last stream ended. Flask holds a thread per stream, so it serves at
+most `FLASK_THREADS` streams at a time and queues the rest; the asyncio mode holds them all.
+
+`test_async_server.py` runs a small comparison, so a regression to a thread per stream fails.
+
+Usage:
+    python -m backend.benchmarks.stream_load
+    python -m backend.benchmarks.stream_load --streams 64 512 --threads 16
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from functools import partial
+from unittest.mock import patch
+
+import aiohttp
+from aiohttp import web
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+from backend import async_server, server
+from backend.model import get_llm
+
+STREAMS = [32, 128, 256]
+FLASK_THREADS = 32
+TOKENS = 40
+TOKEN_DELAY = 0.05
+MODEL = "fake-model"
+
+REQUEST = {
+    "product_name": "CeraVe Moisturizing Cream",
+    "ingredients": [
+        {"name": "Water", "score": "1", "concerns": []},
+        {"name": "Fragrance", "score": "8", "concerns": ["Allergies/immunotoxicity"]},
+    ],
+}
+
+
+class BackgroundApp:
+    """
+    Serve an aiohttp application from its own event loop on a background thread.
+
+    Example:
+        >>> with BackgroundApp(async_server.create_app()) as app:
+        ...     requests.get(app.base_url + "/metrics")
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.loop = asyncio.new_event_loop()
+        self.runner = web.AppRunner(app, access_log=None)
+        self.base_url = None
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def __enter__(self):
+        self._thread.start()
+        self._run(self.runner.setup())
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        self._run(site.start())
+        host, port = self.runner.addresses[0][:2]
+        self.base_url = f"http://{host}:{port}"
+        return self
+
+    def __exit__(self, *exc_info):
+        self._run(self.runner.cleanup())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+
+class FakeOllama(BackgroundApp):
+    """
+    Stand-in for the Ollama chat API streaming a fixed number of tokens at a fixed pace.
+
+    Attributes:
+        active (int): Generations streaming right now.
+        peak (int): Most generations streamed at once since the last `reset`.
+        generations (int): Generations started since the last `reset`.
+    """
+
+    def __init__(self, tokens=TOKENS, token_delay=TOKEN_DELAY):
+        app = web.Application()
+        app.router.add_post("/api/chat", self.chat)
+        super().__init__(app)
+        self.tokens = tokens
+        self.token_delay = token_delay
+        self.reset()
+
+    def reset(self):
+        """Reset the generation counts."""
+        self.active = 0
+        self.peak = 0
+        self.generations = 0
+
+    async def chat(self, request):
+        await request.read()
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        self.generations += 1
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        try:
+            await response.prepare(request)
+            for i in range(self.tokens):
+                await asyncio.sleep(self.token_delay)
+                await response.write(self._line(f"token{i} "))
+            await response.write(
+                self._line(
+                    "",
+                    done=True,
+                    done_reason="stop",
+                    prompt_eval_count=100,
+                    eval_count=self.tokens,
+                )
+            )
+            await response.write_eof()
+        finally:
+            self.active -= 1
+        return response
+
+    @staticmethod
+    def _line(content, done=False, **fields):
+        message = {"role": "assistant", "content": content}
+        line = {
+            "model": MODEL,
+            "created_at": "2025-01-01T00:00:00Z",
+            "message": message,
+            "done": done,
+        }
+        return (json.dumps(dict(line, **fields)) + "\n").encode()
+
+
+def offline_llm(base_url):
+    """
+    Point `/recommend` and `/chat` of both servers at the LLM server at `base_url`, with an
+    unbounded connection pool and the recommendation cache disabled.
+
+    Returns:
+        ExitStack: Undoes the patches when closed or used as a context manager.
+    """
+    stack = ExitStack()
+    llm = partial(get_llm, base_url=base_url, model=MODEL)
+    patches = [
+        patch.dict("backend.model._llms", clear=True),
+        patch("backend.model.LLM_POOL_MAX_CONNECTIONS", 100_000),
+        patch("backend.server.get_llm", llm),
+        patch("backend.async_server.get_llm", llm),
+        patch("backend.server.RECOMMENDATION_CACHE", False),
+    ]
+    for p in patches:
+        stack.enter_context(p)
+    return stack
+
+
+class _QuietHandler(WSGIRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class ThreadPoolWSGIServer(BaseWSGIServer):
+    """Werkzeug WSGI server handling connections on a fixed pool of threads."""
+
+    multithread = True
+
+    def __init__(self, app, threads, host="127.0.0.1", port=0):
+        super().__init__(host, port, app, handler=_QuietHandler)
+        self.pool = ThreadPoolExecutor(threads)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        self.pool.shutdown(cancel_futures=True)
+        super().server_close()
+
+
+@contextmanager
+def serve_flask(threads=FLASK_THREADS):
+    """Serve the Flask app with `threads` worker threads; yields its base URL."""
+    wsgi_server = ThreadPoolWSGIServer(server.app, threads)
+    thread = threading.Thread(
+        target=wsgi_server.serve_forever, args=(0.01,), daemon=True
+    )
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{wsgi_server.server_port}"
+    finally:
+        wsgi_server.shutdown()
+        wsgi_server.server_close()
+
+
+@contextmanager
+def serve_async():
+    """Serve `backend.async_server`; yields its base URL."""
+    with BackgroundApp(async_server.create_app()) as app:
+        yield app.base_url
+
+
+async def _stream(session, base_url):
+    # Seconds to the first event and to the end of the stream, and whether it completed
+    start = time.perf_counter()
+    first = None
+    ok = True
+    async with session.post(f"{base_url}/recommend", json=REQUEST) as response:
+        ok = response.status == 200
+        async for line in response.content:
+            if not line.startswith(b"data: "):
+                continue
+            if first is None:
+                first = time.perf_counter() - start
+            if "error" in json.loads(line[6:]):
+                ok = False
+    return first, time.perf_counter() - start, ok and first is not None
+
+
+async def _streams(base_url, streams):
+    connector = aiohttp.TCPConnector(limit=0)
+    timeout = aiohttp.ClientTimeout(total=None)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        return await asyncio.gather(
+            *(_stream(session, base_url) for _ in range(streams)),
+            return_exceptions=True,
+        )
+
+
+def load(base_url, streams, ollama):
+    """
+    Open `streams` concurrent `/recommend` streams against the server at `base_url`.
+
+    Args:
+        ollama (FakeOllama): The LLM server both servers stream from.
+
+    Returns:
+        dict: Streams opened and completed, peak concurrent generations, median and 99th
+            percentile time to the first event in milliseconds, and seconds until all ended.
+    """
+    ollama.reset()
+    start = time.perf_counter()
+    results = asyncio.run(_streams(base_url, streams))
+    seconds = time.perf_counter() - start
+    completed = [r for r in results if not isinstance(r, BaseException) and r[2]]
+    ttfb = sorted(first for first, _, _ in completed)
+    return {
+        "streams": streams,
+        "completed": len(completed),
+        "peak_generations": ollama.peak,
+        "ttfb_p50_ms": statistics.median(ttfb) * 1e3 if ttfb else None,
+        "ttfb_p99_ms": ttfb[int(0.99 * (len(ttfb) - 1))] * 1e3 if ttfb else None,
+        "seconds": seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--streams", type=int, nargs="+", default=STREAMS)
+    parser.add_argument("--threads", type=int, default=FLASK_THREADS)
+    parser.add_argument("--tokens", type=int, default=TOKENS)
+    parser.add_argument("--delay", type=float, default=TOKEN_DELAY)
+    args = parser.parse_args()
+
+    print(
+        f"Concurrent /recommend streams of {args.tokens} tokens every {args.delay}s "
+        f"(~{args.tokens * args.delay:.1f}s each), Flask with {args.threads} threads"
+    )
+    print(
+        f"{'server':>8} {'streams':>8} {'completed':>10} {'peak gen':>9} "
+        f"{'ttfb p50 ms':>12} {'ttfb p99 ms':>12} {'seconds':>8}"
+    )
+    with FakeOllama(args.tokens, args.delay) as ollama, offline_llm(ollama.base_url):
+        for name, serve in [
+            ("flask", partial(serve_flask, args.threads)),
+            ("asyncio", serve_async),
+        ]:
+            with serve() as base_url:
+                for streams in args.streams:
+                    r = load(base_url, streams, ollama)
+                    print(
+                        f"{name:>8} {r['streams']:>8} {r['completed']:>10} "
+                        f"{r['peak_generations']:>9} {r['ttfb_p50_ms']:>12.0f} "
+                        f"{r['ttfb_p99_ms']:>12.0f} {r['seconds']:>8.2f}"
+                    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,290 @@
+import atexit
 import json
-import os
+import sys
+import threading
+import time
+from collections import Counter
 from datetime import datetime, timedelta
 
-CACHE_FILE = "product_cache.json"
+from backend.config.settings import (
+    CACHE_BACKEND,
+    CACHE_DB_FILE,
+    CACHE_FILE,
+    CACHE_JOURNAL_FILE,
+    CACHE_MAX_AGE_DAYS,
+    CACHE_MAX_BYTES,
+    CACHE_MAX_ENTRIES,
+    CACHE_PROTECTED_RATIO,
+    CACHE_PURGE_INTERVAL,
+    CACHE_STALE_GRACE_DAYS,
+)
+from backend.eviction import SegmentedLRU
+from backend.normalize import normalize_query
+from backend.storage import JournalStorage, JsonFileStorage, SQLiteStorage, load_cache
 
 
-def load_cache():
-    if os.path.exists(CACHE_FILE):
-        with open(CACHE_FILE, "r") as f:
-            return json.load(f)
-    return {}
+def create_storage(backend=CACHE_BACKEND):
+    """
+    Create the product cache storage backend selected by `backend`.
+
+    Args:
+        backend (str, optional): One of "sqlite" (WAL-mode SQLite database, safe to share
+            between worker processes), "journal" (append-only JSONL journal) or "json"
+            (single JSON file with write-behind flushes); the last two are for a single
+            server process. Defaults to the `CACHE_BACKEND` setting.
+
+    Returns:
+        CacheStorage: The storage backend instance.
+
+    Raises:
+        ValueError: If `backend` is not a known storage backend.
+    """
+    if backend == "journal":
+        # Picks up an existing product_cache.json the first time the journal is created
+        return JournalStorage(CACHE_JOURNAL_FILE, legacy_path=CACHE_FILE)
+    if backend == "json":
+        return JsonFileStorage(CACHE_FILE)
+    if backend == "sqlite":
+        # Picks up an existing product_cache.json the first time the database is created
+        return SQLiteStorage(CACHE_DB_FILE, legacy_path=CACHE_FILE)
+    raise ValueError(f"Unknown cache backend '{backend}'")
+
+
+def migrate_json_cache(json_path=CACHE_FILE, storage=None):
+    """
+    One-shot import of an existing `product_cache.json` into another storage backend.
+
+    Args:
+        json_path (str, optional): Path of the JSON cache file to import.
+        storage (CacheStorage, optional): Destination backend. Defaults to a `SQLiteStorage`
+            at `CACHE_DB_FILE`.
+
+    Returns:
+        int: The number of imported products.
+
+    Example:
+        >>> migrate_json_cache("product_cache.json", SQLiteStorage("product_cache.db"))
+        128
+    """
+    if storage is None:
+        storage = SQLiteStorage(CACHE_DB_FILE)
+    count = storage.import_legacy(load_cache(json_path).items())
+    storage.flush()
+    return count
+
+
+# Shared cache instance used by the scraper and the Flask routes
+product_cache = create_storage()
+atexit.register(product_cache.close)
+
+# Lookup counters for get_cache_stats()
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+# Size bound of the product cache; seeded from storage on first use. Shared backends bound
+# themselves instead (see `CacheStorage.evict`), as this policy only sees one process.
+eviction_policy = SegmentedLRU(
+    CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, protected_ratio=CACHE_PROTECTED_RATIO
+)
+_tracking = {"seeded": False, "last_purge": time.monotonic()}
+_tracking_lock = threading.Lock()
+
+
+def _record_size(record):
+    return len(json.dumps(record))
+
+
+def _evict(product_urls):
+    # Counted in the eviction policy's stats (see `get_eviction_stats`)
+    for product_url in product_urls:
+        product_cache.delete(product_url)
+
 
+def _ensure_tracked():
+    """Seed the eviction policy with the products already in storage, oldest first."""
+    if _tracking["seeded"] or product_cache.shared:
+        return
+    with _tracking_lock:
+        if _tracking["seeded"]:
+            return
+        records = sorted(
+            product_cache.items(), key=lambda item: item[1]["last_updated"]
+        )
+        for product_url, record in records:
+            _evict(eviction_policy.admit(product_url, _record_size(record)))
+        _tracking["seeded"] = True
 
-def save_cache(cache):
-    with open(CACHE_FILE, "w") as f:
-        json.dump(cache, f, indent=2)
 
+def _touch(product_url):
+    if product_cache.shared:
+        product_cache.touch(product_url)
+    else:
+        _ensure_tracked()
+        eviction_policy.touch(product_url)
 
-def get_cached_product(product_name, max_age_days=7):
+
+def _enforce_limits(product_url, record):
+    if not product_cache.shared:
+        _evict(eviction_policy.admit(product_url, _record_size(record)))
+        return
+    evicted = product_cache.evict(CACHE_MAX_ENTRIES, CACHE_MAX_BYTES)
+    with _stats_lock:
+        _stats["evictions"] += len(evicted)
+        _stats["evicted_bytes"] += sum(size for _, size in evicted)
+
+
+def purge_expired_products(max_age_days=CACHE_MAX_AGE_DAYS + CACHE_STALE_GRACE_DAYS):
     """
-    Retrieve product data from the local cache if available and not expired (default 7 days).
+    Remove every product older than `max_age_days` from the product cache.
+
+    Args:
+        max_age_days (float, optional): Age beyond which products are purged. Defaults to the
+            maximum age plus the stale-while-revalidate grace window, so stale entries that
+            may still be served are kept.
+
+    Returns:
+        int: The number of purged products.
+    """
+    _ensure_tracked()
+    cutoff = (datetime.now() - timedelta(days=max_age_days)).isoformat()
+    expired = product_cache.purge_expired(cutoff)
+    for product_url in expired:
+        eviction_policy.discard(product_url)
+    with _tracking_lock:
+        _tracking["last_purge"] = time.monotonic()
+    with _stats_lock:
+        _stats["expired_purged"] += len(expired)
+    return len(expired)
+
+
+def get_eviction_stats():
+    """
+    Return product cache size and eviction statistics.
+
+    Returns:
+        dict: Tracked entries and bytes (split into the probationary and protected segments of
+              `SegmentedLRU`), eviction/promotion/demotion counters, and the number of products
+              purged because they expired. A shared backend (see `CacheStorage.shared`) reports
+              its stored entries and bytes and this process's evictions, without segments.
+
+    Example Response:
+    ```json
+    {
+        "entries": 5000,
+        "bytes": 21480313,
+        "probation_entries": 1200,
+        "protected_entries": 3800,
+        "evictions": 842,
+        "evicted_bytes": 3617012,
+        "promotions": 4105,
+        "demotions": 305,
+        "expired_purged": 97
+    }
+    ```
+    """
+    if product_cache.shared:
+        entries, size = product_cache.usage()
+        with _stats_lock:
+            stats = {
+                "entries": entries,
+                "bytes": size,
+                "evictions": _stats["evictions"],
+                "evicted_bytes": _stats["evicted_bytes"],
+            }
+    else:
+        stats = eviction_policy.stats()
+    with _stats_lock:
+        stats["expired_purged"] = _stats["expired_purged"]
+    return stats
+
+
+def _count(event):
+    with _stats_lock:
+        _stats[event] += 1
+
+
+def get_cache_stats():
+    """
+    Return product cache hit statistics since the server started.
+
+    An exact hit is a query identical to the one that originally cached the product. An
+    alias hit is a different query (other casing, spacing or punctuation, or another search
+    that resolved to the same `product_url`) that was only served through the alias index.
+    A stale hit is an expired entry served within the stale-while-revalidate grace window.
+
+    Returns:
+        dict: Lookup, exact hit, alias hit, stale hit and miss counts along with the hit rates.
+
+    Example Response:
+    ```json
+    {
+        "lookups": 200,
+        "exact_hits": 120,
+        "alias_hits": 40,
+        "stale_hits": 10,
+        "misses": 30,
+        "exact_hit_rate": 0.6,
+        "alias_hit_rate": 0.2,
+        "stale_hit_rate": 0.05
+    }
+    ```
+    """
+    with _stats_lock:
+        stats = {
+            "lookups": _stats["lookups"],
+            "exact_hits": _stats["exact_hits"],
+            "alias_hits": _stats["alias_hits"],
+            "stale_hits": _stats["stale_hits"],
+            "misses": _stats["misses"],
+        }
+    lookups = stats["lookups"] or 1
+    stats["exact_hit_rate"] = stats["exact_hits"] / lookups
+    stats["alias_hit_rate"] = stats["alias_hits"] / lookups
+    stats["stale_hit_rate"] = stats["stale_hits"] / lookups
+    return stats
+
+
+def _is_fresh(record, max_age_days):
+    cached_time = datetime.fromisoformat(record["last_updated"])
+    return datetime.now() - cached_time < timedelta(days=max_age_days)
+
+
+def get_compaction_stats():
+    """
+    Return compaction statistics for the journal-backed product cache.
+
+    Returns:
+        dict: Live vs dead record counts, journal size, number of compactions and bytes
+              reclaimed (see `JournalStorage.compaction_stats`), or `None` if the
+              configured `CACHE_BACKEND` is not the journal.
+
+    Example Response:
+    ```json
+    {
+        "live_records": 1250,
+        "dead_records": 310,
+        "journal_bytes": 2483120,
+        "compactions": 4,
+        "bytes_reclaimed": 1917344
+    }
+    ```
+    """
+    if isinstance(product_cache, JournalStorage):
+        return product_cache.compaction_stats()
+    return None
+
+
+def get_cached_product(
+    product_name, max_age_days=CACHE_MAX_AGE_DAYS, stale_grace_days=0
+):
+    """
+    Retrieve product data from the local cache if available and not expired.
 
     Args:
         product_name (str): The name of the skincare product to retrieve from the cache.
-        max_age_days (int, optional): The maximum age (in days) for cached data to be considered valid. Default is 7 days.
+        max_age_days (int, optional): The maximum age (in days) for cached data to be considered valid. Defaults to `CACHE_MAX_AGE_DAYS`.
+        stale_grace_days (float, optional): How long (in days) past `max_age_days` an expired entry may still be
+            returned, flagged with `"stale": True`, while it is refreshed. Default is 0 (never return stale data).
 
     Returns:
         JSON: A cached product entry containing:
@@ -31,13 +292,15 @@ def get_cached_product(product_name, max_age_days=7):
             - "product_name" (str): The product's official name.
             - "ingredients" (list): A list of ingredients and their hazard scores along with concerns.
 
-        If the cache is expired or the product is not found, returns `None`.
+        If the cache is expired (beyond the grace window) or the product is not found, returns `None`.
 
     Description:
-        - Loads the cached data from `product_cache.json`.
-        - Checks if the requested product exists in the cache.
+        - Normalizes the query (see `normalize_query`) and looks it up in the alias index of the
+          shared `product_cache` storage backend (see `create_storage`).
+        - Checks if the product the query resolved to exists in the cache.
         - Verifies whether the cached entry is still valid based on `max_age_days`.
-        - If valid, returns the cached product details; otherwise, returns `None`.
+        - If valid, returns the cached product details; if it expired less than `stale_grace_days`
+          ago, returns them with `"stale": True`; otherwise, returns `None`.
 
     Example Request:
     ```python
@@ -61,15 +324,56 @@ def get_cached_product(product_name, max_age_days=7):
         - Returns `None` if no valid cache entry is found.
     """
 
-    cache = load_cache()
-    if product_name in cache:
-        cached_data = cache[product_name]
-        cached_time = datetime.fromisoformat(cached_data["last_updated"])
-        if datetime.now() - cached_time < timedelta(days=max_age_days):
-            return cached_data  # ✅ Valid cache hit
+    _count("lookups")
+    alias = product_cache.get_alias(normalize_query(product_name))
+    if alias is not None:
+        product_url, query = alias
+        cached_data = product_cache.get(product_url)
+        if cached_data is not None and _is_fresh(cached_data, max_age_days):
+            _count("exact_hits" if query == product_name else "alias_hits")
+            _touch(product_url)
+            return dict(cached_data)  # ✅ Valid cache hit
+        if cached_data is not None and _is_fresh(
+            cached_data, max_age_days + stale_grace_days
+        ):
+            _count("stale_hits")
+            _touch(product_url)
+            return dict(
+                cached_data, stale=True
+            )  # ⏳ Expired, but within the grace window
+    _count("misses")
     return None  # ❌ Cache miss or expired
 
 
+def get_cached_product_by_url(product_url, max_age_days=CACHE_MAX_AGE_DAYS):
+    """
+    Retrieve a cached product by its canonical `product_url`, if not expired.
+
+    Args:
+        product_url (str): The EWG product page URL.
+        max_age_days (int, optional): The maximum age (in days) for cached data to be considered valid. Defaults to `CACHE_MAX_AGE_DAYS`.
+
+    Returns:
+        dict: The cached product entry (same format as `get_cached_product`), or `None`.
+    """
+    cached_data = product_cache.get(product_url)
+    if cached_data is not None and _is_fresh(cached_data, max_age_days):
+        _touch(product_url)
+        return dict(cached_data)
+    return None
+
+
+def link_query(product_name, product_url):
+    """
+    Record that the search query `product_name` resolves to the cached `product_url`.
+
+    Args:
+        product_name (str): The searching keyword.
+        product_url (str): The EWG product page URL the search resolved to.
+    """
+    product_cache.put_alias(normalize_query(product_name), product_url, product_name)
+
+
 def cache_product_data(product_name, data):
     """
     Store product data in the local cache for future use.
@@ -85,9 +389,14 @@ def cache_product_data(product_name, data):
         None
 
     Description:
-        - Loads existing cached data from `product_cache.json`.
-        - Adds the new product entry along with a timestamp (`last_updated`).
-        - Saves the updated cache back to the file.
+        - Adds the new product entry along with a timestamp (`last_updated`) to the shared
+          `product_cache`, keyed by its `product_url`.
+        - Points the normalized search keyword at that `product_url` in the alias index.
+        - Evicts products while the cache exceeds `CACHE_MAX_ENTRIES` or `CACHE_MAX_BYTES`: with
+          `SegmentedLRU` in this process, or least recently used first across every worker for
+          a shared backend (see `SQLiteStorage.evict`). Purges expired products every
+          `CACHE_PURGE_INTERVAL` seconds.
+        - The storage backend persists both (see `JournalStorage`, `JsonFileStorage` and `SQLiteStorage`).
 
     Example Request:
     ```python
@@ -101,22 +410,24 @@ def cache_product_data(product_name, data):
     })
     ```
 
-    Example Cache File (`product_cache.json`):
+    Example Journal Entries (`product_cache.jsonl`):
     ```json
-    {
-        "CeraVe": {
-            "product_url": "https://www.ewg.org/skindeep/products/123456-CeraVe_Moisturizing_Cream/",
-            "product_name": "CeraVe Moisturizing Cream",
-            "ingredients": [
-                { "name": "Water", "score": "1", "concerns": []},
-                { "name": "Fragrance", "score": "8", "concerns": ["Allergies/immunotoxicity (high)", "Endocrine disruption (moderate)"] }
-            ],
-            "last_updated": "2025-03-01T12:00:00"
-        }
-    }
+    {"op": "put", "key": "https://www.ewg.org/skindeep/products/123456-CeraVe_Moisturizing_Cream/", "record": {"product_url": "https://www.ewg.org/skindeep/products/123456-CeraVe_Moisturizing_Cream/", "product_name": "CeraVe Moisturizing Cream", "ingredients": [...], "last_updated": "2025-03-01T12:00:00"}}
+    {"op": "alias", "key": "cerave", "product_url": "https://www.ewg.org/skindeep/products/123456-CeraVe_Moisturizing_Cream/", "query": "CeraVe"}
     ```
     """
-    cache = load_cache()
+    _ensure_tracked()
     data["last_updated"] = datetime.now().isoformat()
-    cache[product_name] = data
-    save_cache(cache)
+    product_cache.put(data["product_url"], data)
+    link_query(product_name, data["product_url"])
+    _enforce_limits(data["product_url"], data)
+
+    if time.monotonic() - _tracking["last_purge"] >= CACHE_PURGE_INTERVAL:
+        purge_expired_products()
+
+
+# Migrate an existing JSON cache into SQLite: python -m backend.cache [product_cache.json]
+if __name__ == "__main__":
+    json_path = sys.argv[1] if len(sys.argv) > 1 else CACHE_FILE
+    count = migrate_json_cache(json_path)
+    print(f"✅ Imported {count} cached products from {json_path} into {CACHE_DB_FILE}")
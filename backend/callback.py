@@ -1,7 +1,25 @@
+import bisect
+import threading
+import time
 from queue import Queue
 
 from langchain.callbacks.base import BaseCallbackHandler
 
+# Histogram bucket upper bounds; observations above the last bound land in an overflow bucket
+LATENCY_BOUNDS = [0.001 * 2**i for i in range(20)]  # 1 ms .. ~9 min, in seconds
+RATE_BOUNDS = [0.5 * 2**i for i in range(14)]  # 0.5 .. 4096 tokens per second
+COUNT_BOUNDS = [2**i for i in range(18)]  # 1 .. 131072 tokens
+
+# Metric name -> histogram bucket bounds
+LLM_METRICS = {
+    "ttft_seconds": LATENCY_BOUNDS,
+    "inter_token_seconds": LATENCY_BOUNDS,
+    "duration_seconds": LATENCY_BOUNDS,
+    "tokens_per_second": RATE_BOUNDS,
+    "prompt_tokens": COUNT_BOUNDS,
+    "completion_tokens": COUNT_BOUNDS,
+}
+
 
 class StreamingCallbackHandler(BaseCallbackHandler):
     def __init__(self, queue: Queue):
@@ -9,3 +27,264 @@ class StreamingCallbackHandler(BaseCallbackHandler):
 
     def on_llm_new_token(self, token: str, **kwargs) -> None:
         self.queue.put(token)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram summarizing observations in constant memory.
+
+    Args:
+        bounds (list[float]): Ascending bucket upper bounds.
+
+    Example:
+        >>> histogram = Histogram(LATENCY_BOUNDS)
+        >>> histogram.observe(0.25)
+        >>> histogram.summary()["count"]
+        1
+    """
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        """Add one observation."""
+        self.buckets[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q):
+        """
+        Estimate the `q` quantile by interpolating within its bucket.
+
+        Returns:
+            float | None: The estimate, clamped to the observed range, or `None` if empty.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, bucket in enumerate(self.buckets):
+            if bucket and seen + bucket >= rank:
+                low = self.bounds[i - 1] if i > 0 else self.min
+                high = self.bounds[i] if i < len(self.bounds) else self.max
+                estimate = low + (high - low) * (rank - seen) / bucket
+                return min(max(estimate, self.min), self.max)
+            seen += bucket
+        return self.max
+
+    def summary(self):
+        """
+        Return the observation count, mean, min, max and the 50th, 90th and 99th percentiles.
+        """
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean": self.total / self.count,
+            "min": self.min,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "max": self.max,
+        }
+
+
+class LLMMetricsStore:
+    """
+    In-process store of LLM generation metrics, kept per endpoint and model.
+
+    Each metric of `LLM_METRICS` is a `Histogram`, next to counts of generations and errors.
+
+    Example:
+        >>> store = LLMMetricsStore()
+        >>> store.observe("recommend", "llama3.2", ttft_seconds=0.42, completion_tokens=180)
+        >>> store.query(endpoint="recommend")["recommend"]["llama3.2"]["ttft_seconds"]["p50"]
+        0.42
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}  # (endpoint, model) -> series dict
+
+    def _get_series(self, endpoint, model):
+        # Caller holds self._lock
+        key = (endpoint, model)
+        if key not in self._series:
+            series = {"generations": 0, "errors": 0}
+            series.update(
+                (name, Histogram(bounds)) for name, bounds in LLM_METRICS.items()
+            )
+            self._series[key] = series
+        return self._series[key]
+
+    def observe(self, endpoint, model, inter_token_seconds=(), **values):
+        """
+        Record one finished generation.
+
+        Args:
+            endpoint (str): The endpoint the generation served.
+            model (str): The model name.
+            inter_token_seconds (list[float], optional): Gaps between consecutive tokens.
+            **values (float): Other `LLM_METRICS` values; `None` values are skipped.
+        """
+        with self._lock:
+            series = self._get_series(endpoint, model)
+            series["generations"] += 1
+            for gap in inter_token_seconds:
+                series["inter_token_seconds"].observe(gap)
+            for name, value in values.items():
+                if value is not None:
+                    series[name].observe(value)
+
+    def record_error(self, endpoint, model):
+        """Count a generation that failed."""
+        with self._lock:
+            self._get_series(endpoint, model)["errors"] += 1
+
+    def query(self, endpoint=None, model=None):
+        """
+        Summarize the recorded metrics, optionally for one endpoint and/or model.
+
+        Returns:
+            dict: endpoint -> model -> generation and error counts plus a `Histogram.summary`
+                  of each metric.
+        """
+        with self._lock:
+            result = {}
+            for (series_endpoint, series_model), series in self._series.items():
+                if endpoint not in (None, series_endpoint) or model not in (
+                    None,
+                    series_model,
+                ):
+                    continue
+                result.setdefault(series_endpoint, {})[series_model] = {
+                    name: (value.summary() if isinstance(value, Histogram) else value)
+                    for name, value in series.items()
+                }
+            return result
+
+    def reset(self):
+        """Forget every recorded metric."""
+        with self._lock:
+            self._series.clear()
+
+
+# Shared store fed by every LLM
+llm_metrics = LLMMetricsStore()
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """
+    Record timing and token metrics of every generation into an `LLMMetricsStore`.
+
+    Measures time to first token, the gaps between tokens, generation throughput in tokens per
+    second after the first token, prompt and completion token counts (as reported by the model,
+    falling back to the streamed token count) and total duration. Generations are attributed to
+    the `endpoint` in the run's metadata and to the model name LangChain reports for the LLM.
+    One handler may serve concurrent runs; each is tracked by its run ID.
+
+    Args:
+        store (LLMMetricsStore, optional): Where metrics go. Defaults to `llm_metrics`.
+
+    Example:
+        >>> llm = ChatOllama(model="llama3.2", callbacks=[MetricsCallbackHandler()])
+        >>> for chunk in llm.stream(prompt, config={"metadata": {"endpoint": "recommend"}}):
+        ...     pass
+        >>> llm_metrics.query(endpoint="recommend")
+    """
+
+    # Called on the event loop by async streams, not on a thread per token
+    run_inline = True
+
+    def __init__(self, store=None):
+        self.store = store or llm_metrics
+        self._runs = {}  # run_id -> timing state
+        self._lock = threading.Lock()
+
+    def _start(self, run_id, metadata, serialized):
+        metadata = metadata or {}
+        model = metadata.get("ls_model_name") or (serialized or {}).get(
+            "kwargs", {}
+        ).get("model", "unknown")
+        with self._lock:
+            self._runs[run_id] = {
+                "endpoint": metadata.get("endpoint", "unknown"),
+                "model": model,
+                "start": time.perf_counter(),
+                "first": None,
+                "last": None,
+                "gaps": [],
+                "tokens": 0,
+            }
+
+    def on_chat_model_start(
+        self, serialized, messages, *, run_id, metadata=None, **kwargs
+    ) -> None:
+        self._start(run_id, metadata, serialized)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, metadata=None, **kwargs):
+        self._start(run_id, metadata, serialized)
+
+    def on_llm_new_token(self, token: str, *, run_id=None, **kwargs) -> None:
+        if not token:
+            return  # Ollama ends a stream with an empty chunk carrying the usage counts
+        now = time.perf_counter()
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is None:
+                return
+            if run["first"] is None:
+                run["first"] = now
+            else:
+                run["gaps"].append(now - run["last"])
+            run["last"] = now
+            run["tokens"] += 1
+
+    def on_llm_end(self, response, *, run_id=None, **kwargs) -> None:
+        end = time.perf_counter()
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        prompt_tokens, completion_tokens = _token_counts(response)
+        completion_tokens = completion_tokens or run["tokens"]
+        ttft = run["first"] - run["start"] if run["first"] is not None else None
+        generating = end - run["first"] if run["first"] is not None else 0
+        self.store.observe(
+            run["endpoint"],
+            run["model"],
+            inter_token_seconds=run["gaps"],
+            ttft_seconds=ttft,
+            duration_seconds=end - run["start"],
+            tokens_per_second=(
+                completion_tokens / generating if generating > 0 else None
+            ),
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+        )
+
+    def on_llm_error(self, error, *, run_id=None, **kwargs) -> None:
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is not None:
+            self.store.record_error(run["endpoint"], run["model"])
+
+
+def _token_counts(response):
+    # Prompt and completion token counts reported by the model, if any
+    generations = response.generations[0] if response.generations else []
+    if not generations:
+        return None, None
+    generation = generations[0]
+    usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+    if usage:
+        return usage.get("input_tokens"), usage.get("output_tokens")
+    info = generation.generation_info or {}
+    return info.get("prompt_eval_count"), info.get("eval_count")
@@ -8,3 +8,128 @@ load_dotenv()
 LLM_BASE_URL = os.getenv("LLM_BASE_URL", "http://127.0.0.1:11500")
 LLM_MODEL = os.getenv("LLM_MODEL", "llama3.2")
 LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.0"))
+# Keep-alive connection pool shared by every chain and session talking to LLM_BASE_URL
+LLM_POOL_MAX_CONNECTIONS = int(os.getenv("LLM_POOL_MAX_CONNECTIONS", "10"))
+LLM_POOL_MAX_KEEPALIVE = int(os.getenv("LLM_POOL_MAX_KEEPALIVE", "5"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "300"))
+# Echo every generated token to stdout, for local debugging
+LLM_ECHO_TOKENS = os.getenv("LLM_ECHO_TOKENS", "false").lower() == "true"
+
+# Product cache
+CACHE_FILE = os.getenv("CACHE_FILE", "product_cache.json")
+CACHE_FLUSH_INTERVAL = float(os.getenv("CACHE_FLUSH_INTERVAL", "5.0"))
+CACHE_FLUSH_THRESHOLD = int(os.getenv("CACHE_FLUSH_THRESHOLD", "50"))
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "sqlite")  # "sqlite", "journal" or "json"
+CACHE_DB_FILE = os.getenv("CACHE_DB_FILE", "product_cache.db")
+CACHE_JOURNAL_FILE = os.getenv("CACHE_JOURNAL_FILE", "product_cache.jsonl")
+CACHE_COMPACT_MIN_DEAD = int(os.getenv("CACHE_COMPACT_MIN_DEAD", "1000"))
+CACHE_COMPACT_RATIO = float(os.getenv("CACHE_COMPACT_RATIO", "0.5"))
+CACHE_MAX_AGE_DAYS = float(os.getenv("CACHE_MAX_AGE_DAYS", "7"))
+# Serve expired entries for this many extra days while they are refreshed in the background
+CACHE_STALE_GRACE_DAYS = float(os.getenv("CACHE_STALE_GRACE_DAYS", "7"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "5000"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Share of the cache reserved for products that were requested more than once
+CACHE_PROTECTED_RATIO = float(os.getenv("CACHE_PROTECTED_RATIO", "0.8"))
+CACHE_PURGE_INTERVAL = float(os.getenv("CACHE_PURGE_INTERVAL", "3600"))
+
+# Query -> product URL resolutions, so known products skip the search page
+RESOLUTION_CACHE_FILE = os.getenv("RESOLUTION_CACHE_FILE", "resolution_cache.json")
+RESOLUTION_CACHE_TTL_DAYS = float(os.getenv("RESOLUTION_CACHE_TTL_DAYS", "30"))
+RESOLUTION_CACHE_MAX_ENTRIES = int(os.getenv("RESOLUTION_CACHE_MAX_ENTRIES", "50000"))
+
+# AI-generated ingredient benefit summaries, keyed by the set of ingredients
+SUMMARY_CACHE_FILE = os.getenv("SUMMARY_CACHE_FILE", "summary_cache.json")
+SUMMARY_CACHE_TTL_DAYS = float(os.getenv("SUMMARY_CACHE_TTL_DAYS", "30"))
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "10000"))
+
+# Skincare benefits of each ingredient, generated once and aggregated into product summaries
+INGREDIENT_BENEFITS_FILE = os.getenv(
+    "INGREDIENT_BENEFITS_FILE", "ingredient_benefits.json"
+)
+INGREDIENT_BENEFITS_TTL_DAYS = float(os.getenv("INGREDIENT_BENEFITS_TTL_DAYS", "365"))
+INGREDIENT_BENEFITS_MAX_ENTRIES = int(
+    os.getenv("INGREDIENT_BENEFITS_MAX_ENTRIES", "100000")
+)
+# Unknown ingredients sent to the LLM per call
+INGREDIENT_BENEFITS_BATCH_SIZE = int(os.getenv("INGREDIENT_BENEFITS_BATCH_SIZE", "25"))
+# Curated benefits of well-known ingredients (CSV or JSONL), loaded at startup
+INGREDIENT_LEXICON_FILE = os.getenv(
+    "INGREDIENT_LEXICON_FILE",
+    os.path.join(os.path.dirname(__file__), "..", "data", "ingredient_lexicon.csv"),
+)
+# Share of a product's ingredients the lexicon must know to answer without waiting for the LLM
+INGREDIENT_LEXICON_COVERAGE = float(os.getenv("INGREDIENT_LEXICON_COVERAGE", "0.8"))
+
+# How /recommend prompts list ingredients: "compact" (grouped by hazard band, with a concern
+# legend) or "verbose" (two lines per ingredient)
+INGREDIENT_PROMPT_FORMAT = os.getenv("INGREDIENT_PROMPT_FORMAT", "compact")
+if INGREDIENT_PROMPT_FORMAT not in ("compact", "verbose"):
+    raise ValueError(
+        f"INGREDIENT_PROMPT_FORMAT must be 'compact' or 'verbose', not {INGREDIENT_PROMPT_FORMAT!r}"
+    )
+# Estimated tokens of a compact ingredient list before its low hazard tail is summarized (0: none)
+INGREDIENT_PROMPT_TOKEN_BUDGET = int(os.getenv("INGREDIENT_PROMPT_TOKEN_BUDGET", "400"))
+
+# /recommend answers, replayed for the same product and profile while LLM_TEMPERATURE is 0
+RECOMMENDATION_CACHE = os.getenv("RECOMMENDATION_CACHE", "true").lower() == "true"
+RECOMMENDATION_CACHE_FILE = os.getenv(
+    "RECOMMENDATION_CACHE_FILE", "recommendation_cache.json"
+)
+RECOMMENDATION_CACHE_TTL_DAYS = float(os.getenv("RECOMMENDATION_CACHE_TTL_DAYS", "7"))
+RECOMMENDATION_CACHE_MAX_ENTRIES = int(
+    os.getenv("RECOMMENDATION_CACHE_MAX_ENTRIES", "5000")
+)
+
+# Negative cache for failed product lookups
+NEGATIVE_CACHE_TTL_SECONDS = float(os.getenv("NEGATIVE_CACHE_TTL_SECONDS", "900"))
+NEGATIVE_CACHE_CAPACITY = int(os.getenv("NEGATIVE_CACHE_CAPACITY", "10000"))
+
+# Headless Chrome sessions used by the scraper
+# Downloaded once at startup if empty
+CHROMEDRIVER_PATH = os.getenv("CHROMEDRIVER_PATH", "")
+DRIVER_POOL_SIZE = int(os.getenv("DRIVER_POOL_SIZE", "2"))
+# Sessions started with the server
+DRIVER_POOL_WARM = int(os.getenv("DRIVER_POOL_WARM", "1"))
+DRIVER_MAX_USES = int(os.getenv("DRIVER_MAX_USES", "50"))
+DRIVER_ACQUIRE_TIMEOUT = float(os.getenv("DRIVER_ACQUIRE_TIMEOUT", "60"))
+# Block images, fonts, CSS and trackers, and stop waiting for them on page load
+SCRAPER_LEAN_PROFILE = os.getenv("SCRAPER_LEAN_PROFILE", "true").lower() == "true"
+# Persistent asset cache, e.g. ".chrome_cache"
+CHROME_CACHE_DIR = os.getenv("CHROME_CACHE_DIR", "")
+
+# Plain HTTP fetches of EWG pages, tried before starting a browser session
+EWG_BASE_URL = os.getenv("EWG_BASE_URL", "https://www.ewg.org")
+HTTP_FAST_PATH = os.getenv("HTTP_FAST_PATH", "true").lower() == "true"
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+
+# Scheduler for every request sent to EWG, by HTTP or by a browser session
+UPSTREAM_RATE = float(os.getenv("UPSTREAM_RATE", "2"))  # Requests per second
+UPSTREAM_BURST = int(os.getenv("UPSTREAM_BURST", "5"))
+UPSTREAM_MAX_CONCURRENT = int(os.getenv("UPSTREAM_MAX_CONCURRENT", "4"))
+UPSTREAM_ACQUIRE_TIMEOUT = float(os.getenv("UPSTREAM_ACQUIRE_TIMEOUT", "30"))
+UPSTREAM_RETRIES = int(os.getenv("UPSTREAM_RETRIES", "2"))
+UPSTREAM_BACKOFF_BASE = float(os.getenv("UPSTREAM_BACKOFF_BASE", "0.5"))
+UPSTREAM_BACKOFF_MAX = float(os.getenv("UPSTREAM_BACKOFF_MAX", "8"))
+# Consecutive failed requests that open the circuit breaker, and seconds before a trial request
+UPSTREAM_BREAKER_THRESHOLD = int(os.getenv("UPSTREAM_BREAKER_THRESHOLD", "5"))
+UPSTREAM_BREAKER_RESET = float(os.getenv("UPSTREAM_BREAKER_RESET", "30"))
+# Serve cached products up to this many days old while EWG is unavailable
+UPSTREAM_STALE_MAX_DAYS = float(os.getenv("UPSTREAM_STALE_MAX_DAYS", "90"))
+
+# Concurrent lookups of the same product share one scrape
+SCRAPE_COALESCE_TIMEOUT = float(os.getenv("SCRAPE_COALESCE_TIMEOUT", "90"))
+
+# Background scrape jobs for /get_ingredients cache misses
+SCRAPE_WORKERS = int(os.getenv("SCRAPE_WORKERS", "4"))
+SCRAPE_QUEUE_SIZE = int(os.getenv("SCRAPE_QUEUE_SIZE", "100"))
+SCRAPE_JOB_TIMEOUT = float(os.getenv("SCRAPE_JOB_TIMEOUT", "120"))
+SCRAPE_JOB_RETENTION = float(os.getenv("SCRAPE_JOB_RETENTION", "600"))
+BATCH_MAX_PRODUCTS = int(os.getenv("BATCH_MAX_PRODUCTS", "50"))
+
+# asyncio serving mode (python -m backend.async_server)
+ASYNC_SERVER_PORT = int(os.getenv("ASYNC_SERVER_PORT", "5000"))
+# Threads running the Flask routes that are not served natively by the event loop
+ASYNC_WSGI_THREADS = int(os.getenv("ASYNC_WSGI_THREADS", "16"))
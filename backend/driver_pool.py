@@ -0,0 +1,359 @@
+import atexit
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+from backend.config.settings import (
+    CHROME_CACHE_DIR,
+    CHROMEDRIVER_PATH,
+    DRIVER_ACQUIRE_TIMEOUT,
+    DRIVER_MAX_USES,
+    DRIVER_POOL_SIZE,
+    SCRAPER_LEAN_PROFILE,
+)
+
+_driver_path = {"path": CHROMEDRIVER_PATH or None}
+_driver_path_lock = threading.Lock()
+
+
+def resolve_driver_path():
+    """
+    Return the chromedriver binary path, downloading it with `ChromeDriverManager` on first use.
+
+    The path is resolved once per process (or taken from the `CHROMEDRIVER_PATH` setting), so
+    individual scrapes never hit the webdriver_manager version check.
+
+    Returns:
+        str: Path of the chromedriver executable.
+    """
+    with _driver_path_lock:
+        if _driver_path["path"] is None:
+            _driver_path["path"] = ChromeDriverManager().install()
+            print(f"🚗 Resolved chromedriver at {_driver_path['path']}")
+        return _driver_path["path"]
+
+
+# Chrome switches for a scraping profile that only needs the DOM of the page
+LEAN_CHROME_ARGUMENTS = [
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--no-first-run",
+    "--mute-audio",
+    "--blink-settings=imagesEnabled=false",
+]
+
+# Requests blocked in the lean profile: images, fonts, stylesheets, media, analytics and ads
+BLOCKED_URL_PATTERNS = [
+    "*.png",
+    "*.jpg",
+    "*.jpeg",
+    "*.gif",
+    "*.webp",
+    "*.svg",
+    "*.ico",
+    "*.woff",
+    "*.woff2",
+    "*.ttf",
+    "*.otf",
+    "*.css",
+    "*.mp4",
+    "*.webm",
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+    "*googlesyndication.com*",
+    "*facebook.net*",
+    "*hotjar.com*",
+    "*/analytics*",
+]
+
+
+def chrome_options(lean=SCRAPER_LEAN_PROFILE, cache_dir=CHROME_CACHE_DIR):
+    """
+    Build the Chrome options for a scraping session.
+
+    Args:
+        lean (bool, optional): Use the lean profile: no extensions or background networking, no
+            images, and an eager page load strategy that returns once the DOM is ready instead
+            of waiting for every subresource. Defaults to `SCRAPER_LEAN_PROFILE`.
+        cache_dir (str, optional): Persistent disk cache for static assets shared by sessions.
+            Defaults to `CHROME_CACHE_DIR`; empty uses a throwaway cache.
+
+    Returns:
+        selenium.webdriver.ChromeOptions: The options.
+    """
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless")  # Run without opening a browser
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+
+    if lean:
+        options.page_load_strategy = "eager"
+        for argument in LEAN_CHROME_ARGUMENTS:
+            options.add_argument(argument)
+        options.add_experimental_option(
+            "prefs", {"profile.managed_default_content_settings.images": 2}
+        )
+    if cache_dir:
+        options.add_argument(f"--disk-cache-dir={os.path.abspath(cache_dir)}")
+    return options
+
+
+def block_resources(driver, patterns=BLOCKED_URL_PATTERNS):
+    """
+    Block requests matching `patterns` for the lifetime of a Chrome session.
+
+    Args:
+        driver (selenium.webdriver.Chrome): The session.
+        patterns (list[str], optional): URL patterns (`*` wildcards). Defaults to `BLOCKED_URL_PATTERNS`.
+    """
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+
+
+def create_driver(lean=SCRAPER_LEAN_PROFILE, cache_dir=CHROME_CACHE_DIR):
+    """
+    Start a new headless Chrome session.
+
+    Args:
+        lean (bool, optional): Use the lean scraping profile (see `chrome_options`) and block
+            resources the scraper never reads. Defaults to `SCRAPER_LEAN_PROFILE`.
+        cache_dir (str, optional): Persistent disk cache directory. Defaults to `CHROME_CACHE_DIR`.
+
+    Returns:
+        selenium.webdriver.Chrome: The started driver.
+    """
+    driver = webdriver.Chrome(
+        service=Service(resolve_driver_path()), options=chrome_options(lean, cache_dir)
+    )
+    if lean:
+        block_resources(driver)
+    return driver
+
+
+def is_browser_failure(error):
+    """
+    Tell whether an error, or one it was raised from, is a `WebDriverException`.
+
+    `UpstreamScheduler` wraps page loads that keep failing in `UpstreamUnavailable`; the session
+    behind them may still have crashed.
+    """
+    while error is not None:
+        if isinstance(error, WebDriverException):
+            return True
+        error = error.__cause__
+    return False
+
+
+class DriverPool:
+    """
+    Bounded pool of warm headless Chrome sessions shared by scraper threads.
+
+    At most `size` drivers exist at once; a scrape checks one out, and waits up to
+    `acquire_timeout` seconds when all of them are busy. Idle drivers are health-checked
+    before being handed out, and a driver is quit and replaced after `max_uses` checkouts
+    or as soon as a scrape fails with a `WebDriverException` (see `is_browser_failure`).
+
+    Args:
+        size (int, optional): Maximum number of drivers. Defaults to `DRIVER_POOL_SIZE`.
+        max_uses (int, optional): Checkouts before a driver is recycled. Defaults to `DRIVER_MAX_USES`.
+        acquire_timeout (float, optional): Seconds to wait for a free driver. Defaults to `DRIVER_ACQUIRE_TIMEOUT`.
+        factory (callable, optional): Starts a new driver. Defaults to `create_driver`.
+
+    Example:
+        >>> pool = DriverPool(size=2)
+        >>> with pool.session() as driver:
+        ...     driver.get("https://www.ewg.org/skindeep/")
+        >>> pool.shutdown()
+    """
+
+    def __init__(
+        self,
+        size=DRIVER_POOL_SIZE,
+        max_uses=DRIVER_MAX_USES,
+        acquire_timeout=DRIVER_ACQUIRE_TIMEOUT,
+        factory=create_driver,
+    ):
+        self.size = size
+        self.max_uses = max_uses
+        self.acquire_timeout = acquire_timeout
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        # Popped from the end, so a lightly loaded pool keeps reusing its warmest session
+        self._idle = []
+        self._uses = {}  # id(driver) -> checkouts so far
+        self._created = 0
+        self._closed = False
+        self._stats = Counter()
+
+    def _start(self):
+        try:
+            driver = self._factory()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+                self._available.notify()
+            raise
+        with self._lock:
+            self._uses[id(driver)] = 0
+            self._stats["started"] += 1
+        return driver
+
+    def _discard(self, driver):
+        with self._lock:
+            self._uses.pop(id(driver), None)
+            self._created -= 1
+            self._stats["recycled"] += 1
+            self._available.notify()  # A waiter may now start a replacement
+        try:
+            driver.quit()
+        except Exception as e:
+            print(f"❌ Error quitting driver: {e}")
+
+    @staticmethod
+    def _is_healthy(driver):
+        try:
+            driver.current_url  # Round-trips to the browser; raises if it died
+            return True
+        except Exception:
+            return False
+
+    def acquire(self):
+        """
+        Check out a healthy driver, starting one if the pool is below `size`.
+
+        Returns:
+            selenium.webdriver.Chrome: A driver reserved for the caller until `release`.
+
+        Raises:
+            RuntimeError: If the pool is shut down or no driver became free within `acquire_timeout`.
+        """
+        deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            with self._lock:
+                while not self._idle and self._created >= self.size:
+                    remaining = deadline - time.monotonic()
+                    if self._closed or remaining <= 0:
+                        break
+                    self._available.wait(remaining)
+                if self._closed:
+                    raise RuntimeError("Driver pool is shut down")
+                driver = self._idle.pop() if self._idle else None
+                if driver is None:
+                    if self._created >= self.size:
+                        raise RuntimeError("Timed out waiting for a browser session")
+                    self._created += 1
+            if driver is None:
+                return self._start()
+            if self._is_healthy(driver):
+                with self._lock:
+                    self._stats["reused"] += 1
+                return driver
+            print("⚠️ Replacing crashed browser session")
+            self._discard(driver)
+
+    def release(self, driver, broken=False):
+        """
+        Return a driver to the pool, recycling it if it is `broken` or has reached `max_uses`.
+
+        Args:
+            driver (selenium.webdriver.Chrome): A driver obtained from `acquire`.
+            broken (bool, optional): Whether the caller saw the browser fail.
+        """
+        with self._lock:
+            uses = self._uses.get(id(driver), 0) + 1
+            self._uses[id(driver)] = uses
+            keep = not (broken or self._closed or uses >= self.max_uses)
+            if keep:
+                self._idle.append(driver)
+                self._available.notify()
+        if not keep:
+            self._discard(driver)
+
+    @contextmanager
+    def session(self):
+        """
+        Check out a driver for the duration of a `with` block.
+
+        A `WebDriverException` escaping the block, directly or as the cause of another error,
+        marks the driver as broken so it is replaced.
+
+        Example:
+            >>> with driver_pool.session() as driver:
+            ...     driver.get(search_url)
+        """
+        driver = self.acquire()
+        broken = False
+        try:
+            yield driver
+        except Exception as e:
+            broken = is_browser_failure(e)
+            raise
+        finally:
+            self.release(driver, broken=broken)
+
+    def warm(self, count=None):
+        """
+        Start drivers ahead of the first scrape.
+
+        Args:
+            count (int, optional): Number of idle drivers to have ready. Defaults to `size`.
+
+        Returns:
+            int: Number of drivers started.
+        """
+        count = self.size if count is None else min(count, self.size)
+        started = 0
+        while True:
+            with self._lock:
+                if self._closed or self._created >= count:
+                    break
+                self._created += 1
+            driver = self._start()
+            with self._lock:
+                self._idle.append(driver)
+                self._available.notify()
+            started += 1
+        return started
+
+    def shutdown(self):
+        """Quit all idle drivers; drivers still checked out are quit when released."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._available.notify_all()
+        for driver in idle:
+            self._discard(driver)
+
+    def stats(self):
+        """
+        Return driver pool statistics.
+
+        Returns:
+            dict: Pool size, live and idle drivers, and counts of drivers started, reused and recycled.
+        """
+        with self._lock:
+            return {
+                "size": self.size,
+                "live": self._created,
+                "idle": len(self._idle),
+                "started": self._stats["started"],
+                "reused": self._stats["reused"],
+                "recycled": self._stats["recycled"],
+            }
+
+
+# Shared driver pool used by the scraper; drivers are started lazily on first use
+driver_pool = DriverPool()
+atexit.register(driver_pool.shutdown)
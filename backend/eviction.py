@@ -0,0 +1,140 @@
+import threading
+from collections import Counter, OrderedDict
+
+
+class SegmentedLRU:
+    """
+    Segmented LRU eviction policy bounded by entry count and approximate byte size.
+
+    New keys enter a probationary segment. A key that is requested again is promoted to
+    a protected segment that may hold up to `protected_ratio` of the capacity. Victims are
+    taken from the least recently used end of the probationary segment first, so a long
+    tail of one-off keys only competes with itself and cannot push out keys that have
+    proven popular. The policy only tracks keys and sizes; the caller removes the evicted
+    keys from storage.
+
+    Args:
+        max_entries (int): Maximum number of keys.
+        max_bytes (int): Maximum total size of the tracked values.
+        protected_ratio (float, optional): Share of both limits reserved for the protected segment.
+
+    Example:
+        >>> policy = SegmentedLRU(max_entries=2, max_bytes=1024)
+        >>> policy.admit("a", 100)
+        []
+        >>> policy.touch("a")  # "a" is promoted to the protected segment
+        >>> policy.admit("b", 100)
+        []
+        >>> policy.admit("c", 100)  # "b" was only seen once, so it goes first
+        ['b']
+    """
+
+    def __init__(self, max_entries, max_bytes, protected_ratio=0.8):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.protected_entries = int(max_entries * protected_ratio)
+        self.protected_bytes = int(max_bytes * protected_ratio)
+        self._lock = threading.Lock()
+        self._probation = OrderedDict()  # key -> size, least recently used first
+        self._protected = OrderedDict()
+        self._probation_size = 0
+        self._protected_size = 0
+        self._stats = Counter()
+
+    def admit(self, key, size):
+        """
+        Track a newly stored (or replaced) key and evict keys until the limits hold again.
+
+        Returns:
+            list: The evicted keys, which the caller must remove from storage.
+        """
+        with self._lock:
+            if key in self._protected:
+                self._protected_size += size - self._protected[key]
+                self._protected[key] = size
+                self._protected.move_to_end(key)
+            else:
+                self._probation_size += size - self._probation.pop(key, 0)
+                self._probation[key] = size
+            self._shrink_protected()
+            return self._evict(keep=key)
+
+    def touch(self, key):
+        """Record a cache hit on `key`, promoting it to the protected segment."""
+        with self._lock:
+            if key in self._protected:
+                self._protected.move_to_end(key)
+            elif key in self._probation:
+                size = self._probation.pop(key)
+                self._probation_size -= size
+                self._protected[key] = size
+                self._protected_size += size
+                self._stats["promotions"] += 1
+                self._shrink_protected()
+
+    def discard(self, key):
+        """Stop tracking `key` (e.g. because it expired)."""
+        with self._lock:
+            if key in self._probation:
+                self._probation_size -= self._probation.pop(key)
+            elif key in self._protected:
+                self._protected_size -= self._protected.pop(key)
+
+    def _shrink_protected(self):
+        # Demote the least recently used protected keys back to probation
+        while len(self._protected) > 1 and (
+            len(self._protected) > self.protected_entries
+            or self._protected_size > self.protected_bytes
+        ):
+            key, size = self._protected.popitem(last=False)
+            self._protected_size -= size
+            self._probation[key] = size
+            self._probation_size += size
+            self._stats["demotions"] += 1
+
+    def _evict(self, keep):
+        evicted = []
+        while (
+            len(self._probation) + len(self._protected) > self.max_entries
+            or self._probation_size + self._protected_size > self.max_bytes
+        ):
+            segment = self._probation if self._probation else self._protected
+            key = next(iter(segment))
+            if key == keep:
+                if len(segment) > 1:
+                    segment.move_to_end(key)
+                    key = next(iter(segment))
+                elif segment is self._probation and self._protected:
+                    segment = self._protected
+                    key = next(iter(segment))
+                else:
+                    break  # Nothing else left to evict
+            size = segment.pop(key)
+            if segment is self._probation:
+                self._probation_size -= size
+            else:
+                self._protected_size -= size
+            evicted.append(key)
+            self._stats["evictions"] += 1
+            self._stats["evicted_bytes"] += size
+        return evicted
+
+    def stats(self):
+        """
+        Return eviction statistics.
+
+        Returns:
+            dict: Tracked entries and bytes per segment, plus eviction, promotion and
+                  demotion counters.
+        """
+        with self._lock:
+            return {
+                "entries": len(self._probation) + len(self._protected),
+                "bytes": self._probation_size + self._protected_size,
+                "probation_entries": len(self._probation),
+                "protected_entries": len(self._protected),
+                "evictions": self._stats["evictions"],
+                "evicted_bytes": self._stats["evicted_bytes"],
+                "promotions": self._stats["promotions"],
+                "demotions": self._stats["demotions"],
+            }
@@ -0,0 +1,57 @@
+import requests
+from requests.adapters import HTTPAdapter
+
+from backend.config.settings import HTTP_POOL_SIZE, HTTP_TIMEOUT
+
+# EWG serves a bot challenge to the default python-requests user agent
+USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+)
+
+
+def create_session(pool_size=HTTP_POOL_SIZE):
+    """
+    Create a `requests.Session` that keeps up to `pool_size` connections alive per host.
+
+    Args:
+        pool_size (int, optional): Connections kept per host. Defaults to `HTTP_POOL_SIZE`.
+
+    Returns:
+        requests.Session: The configured session.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(
+        {
+            "User-Agent": USER_AGENT,
+            "Accept": "text/html,application/xhtml+xml",
+            "Accept-Language": "en-US,en;q=0.9",
+        }
+    )
+    return session
+
+
+# Shared session, so consecutive requests to EWG reuse open connections
+http_session = create_session()
+
+
+def fetch_html(url, timeout=HTTP_TIMEOUT):
+    """
+    Fetch a page over the shared keep-alive session.
+
+    Args:
+        url (str): The page URL.
+        timeout (float, optional): Connect and read timeout in seconds. Defaults to `HTTP_TIMEOUT`.
+
+    Returns:
+        str: The response body.
+
+    Raises:
+        requests.RequestException: If the request fails or returns an error status.
+    """
+    response = http_session.get(url, timeout=timeout)
+    response.raise_for_status()
+    return response.text
@@ -0,0 +1,384 @@
+import atexit
+import csv
+import functools
+import json
+import os
+import threading
+
+from backend.config.settings import (
+    CACHE_FLUSH_INTERVAL,
+    INGREDIENT_BENEFITS_BATCH_SIZE,
+    INGREDIENT_BENEFITS_FILE,
+    INGREDIENT_BENEFITS_MAX_ENTRIES,
+    INGREDIENT_BENEFITS_TTL_DAYS,
+    INGREDIENT_LEXICON_COVERAGE,
+    INGREDIENT_LEXICON_FILE,
+)
+from backend.model import get_ingredient_benefits_chain
+from backend.normalize import normalize_query
+from backend.persistent_cache import PersistentLRUCache
+
+# Benefits kept per ingredient, and per product summary
+BENEFITS_PER_INGREDIENT = 3
+SUMMARY_SIZE = 5
+
+# Ingredient names and benefit labels repeat across products, so their keys are memoized
+ingredient_key = functools.lru_cache(maxsize=65536)(normalize_query)
+
+
+def clean_benefits(benefits):
+    """
+    Return up to `BENEFITS_PER_INGREDIENT` benefit labels, stripped and capitalized.
+
+    Example:
+        >>> clean_benefits(["hydrating", " ", 3, "Soothing"])
+        ['Hydrating', 'Soothing']
+    """
+    labels = [b.strip() for b in benefits if isinstance(b, str) and b.strip()]
+    return [label[0].upper() + label[1:] for label in labels[:BENEFITS_PER_INGREDIENT]]
+
+
+def parse_benefits(text):
+    """
+    Parse the LLM's answer to `prompt_template_ingredient_benefits`.
+
+    Args:
+        text (str): A JSON object mapping ingredient names to lists of benefits, possibly
+            wrapped in a code fence or surrounded by other text.
+
+    Returns:
+        dict: Normalized ingredient name -> up to `BENEFITS_PER_INGREDIENT` benefits, or an
+              empty dict if the answer is not a JSON object.
+
+    Example:
+        >>> parse_benefits('```json\\n{"Glycerin": ["hydrating", ""], "Water": []}\\n```')
+        {'glycerin': ['Hydrating'], 'water': []}
+    """
+    start, end = text.find("{"), text.rfind("}")
+    try:
+        data = json.loads(text[start : end + 1]) if start != -1 else None
+    except json.JSONDecodeError:
+        data = None
+    if not isinstance(data, dict):
+        return {}
+    parsed = {}
+    for name, benefits in data.items():
+        if not isinstance(benefits, list):
+            continue
+        parsed[ingredient_key(str(name))] = clean_benefits(benefits)
+    return parsed
+
+
+def load_lexicon(path):
+    """
+    Load a curated ingredient -> benefits lexicon into a normalized-name index.
+
+    CSV files have a `name` and a `benefits` column, with benefits separated by `;`. JSONL files
+    hold one `{"name": ..., "benefits": [...]}` object per line. Ingredients with no benefits,
+    such as water or preservatives, count as known. Later rows override earlier ones.
+
+    Args:
+        path (str | None): A `.csv` or `.jsonl` file, or `None` for an empty lexicon.
+
+    Returns:
+        dict: Normalized ingredient name -> benefits, empty if the file does not exist.
+
+    Raises:
+        ValueError: If the file is neither CSV nor JSONL.
+
+    Example:
+        >>> lexicon = load_lexicon("backend/data/ingredient_lexicon.csv")
+        >>> lexicon["sodium hyaluronate"]
+        ['Hydrating', 'Plumping']
+    """
+    if not path:
+        return {}
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in (".csv", ".jsonl"):
+        raise ValueError(f"Unsupported lexicon format: {path} (use .csv or .jsonl)")
+    if not os.path.exists(path):
+        print(f"⚠️ Ingredient lexicon {path} not found")
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        if extension == ".csv":
+            rows = [
+                (row.get("name") or "", (row.get("benefits") or "").split(";"))
+                for row in csv.DictReader(f)
+            ]
+        else:
+            rows = []
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    benefits = entry.get("benefits") or []
+                    if isinstance(benefits, str):
+                        benefits = benefits.split(";")
+                    rows.append((entry.get("name") or "", benefits))
+    lexicon = {}
+    for name, benefits in rows:
+        key = ingredient_key(str(name))
+        if key:
+            lexicon[key] = clean_benefits(benefits)
+    return lexicon
+
+
+def rank_benefits(names, benefits, limit=SUMMARY_SIZE):
+    """
+    Aggregate the benefits of a product's ingredients into its top benefits.
+
+    Benefits are ranked by the number of ingredients providing them; ties go to the benefit
+    of the ingredient listed first, as ingredient lists are ordered by concentration.
+
+    Args:
+        names (list[str]): The product's ingredient names, in label order.
+        benefits (dict): Normalized ingredient name -> list of benefits.
+        limit (int, optional): Number of benefits to return.
+
+    Returns:
+        list[str]: Up to `limit` benefits, most common first.
+
+    Example:
+        >>> rank_benefits(["Water", "Glycerin", "Niacinamide"],
+        ...               {"glycerin": ["Hydrating"], "niacinamide": ["Brightening", "Hydrating"]})
+        ['Hydrating', 'Brightening']
+    """
+    # Normalized benefit -> [ingredients providing it, first position, label]
+    scores = {}
+    for position, name in enumerate(names):
+        seen = set()
+        for benefit in benefits.get(ingredient_key(name), []):
+            key = ingredient_key(benefit)
+            if key in seen:
+                continue
+            seen.add(key)
+            if key in scores:
+                scores[key][0] += 1
+            else:
+                scores[key] = [1, position, benefit]
+    ranked = sorted(scores.values(), key=lambda score: (-score[0], score[1]))
+    return [label for _, _, label in ranked[:limit]]
+
+
+class IngredientBenefitStore(PersistentLRUCache):
+    """
+    Ingredient name -> skincare benefits, generated once per ingredient and persisted.
+
+    Ingredients are keyed by their normalized name. Ingredients in the curated `lexicon` are
+    answered from it; the others are looked up in the store, and those that are not known yet
+    are sent to the LLM in batches of `batch_size` per call, so a product only costs LLM calls
+    for ingredients never seen before. Entries expire, are evicted and are persisted as in
+    `PersistentLRUCache`.
+
+    When the lexicon knows at least `lexicon_coverage` of a product's ingredients, its summary
+    is answered right away and the unknown remainder is generated in the background.
+
+    Args:
+        path (str | None, optional): JSON file to persist to, or `None` to keep entries in
+            memory only. Defaults to `INGREDIENT_BENEFITS_FILE`.
+        ttl_days (float, optional): Age after which an ingredient's benefits are regenerated.
+            Defaults to `INGREDIENT_BENEFITS_TTL_DAYS`.
+        max_entries (int, optional): Entry limit. Defaults to `INGREDIENT_BENEFITS_MAX_ENTRIES`.
+        flush_interval (float, optional): Seconds to wait before writing changes.
+        batch_size (int, optional): Ingredients per LLM call. Defaults to
+            `INGREDIENT_BENEFITS_BATCH_SIZE`.
+        lexicon (dict | None, optional): Normalized ingredient name -> benefits, as returned by
+            `load_lexicon`. Defaults to an empty lexicon.
+        lexicon_coverage (float, optional): Share of a product's ingredients the lexicon must
+            know to answer without waiting for the LLM. Defaults to `INGREDIENT_LEXICON_COVERAGE`.
+
+    Example:
+        >>> store = IngredientBenefitStore(lexicon=load_lexicon(INGREDIENT_LEXICON_FILE))
+        >>> store.summarize(["Water", "Glycerin", "Niacinamide"])
+        {'summary': ['Barrier repair', 'Hydrating', 'Brightening', 'Oil control'],
+         'coverage': 1.0, 'source': 'lexicon', 'complete': True}
+    """
+
+    def __init__(
+        self,
+        path=INGREDIENT_BENEFITS_FILE,
+        ttl_days=INGREDIENT_BENEFITS_TTL_DAYS,
+        max_entries=INGREDIENT_BENEFITS_MAX_ENTRIES,
+        flush_interval=CACHE_FLUSH_INTERVAL,
+        batch_size=INGREDIENT_BENEFITS_BATCH_SIZE,
+        lexicon=None,
+        lexicon_coverage=INGREDIENT_LEXICON_COVERAGE,
+    ):
+        super().__init__(path, ttl_days, max_entries, flush_interval)
+        self.batch_size = batch_size
+        self.lexicon = lexicon or {}
+        self.lexicon_coverage = lexicon_coverage
+        # Normalized name -> thread generating it in the background
+        self._generating = {}
+
+    def lookup(self, names):
+        """
+        Split ingredient names into those in the lexicon or the store and those never seen.
+
+        Returns:
+            tuple[dict, list[str]]: Normalized name -> benefits of the known ingredients, and
+                the names of the unknown ones, without duplicates.
+        """
+        known = {}
+        unknown = {}  # Normalized name -> name as listed
+        for name in names:
+            key = ingredient_key(name)
+            if key in known or key in unknown:
+                continue
+            benefits = self.lexicon.get(key)
+            if benefits is None:
+                benefits = self.get(key)
+            if benefits is None:
+                unknown[key] = name
+            else:
+                known[key] = benefits
+        return known, list(unknown.values())
+
+    def generate(self, names):
+        """
+        Ask the LLM for the benefits of `names`, in batches, and store them.
+
+        Ingredients the LLM leaves out of its answer are not stored, so they are asked for
+        again next time.
+
+        Returns:
+            dict: Normalized name -> benefits of the ingredients the LLM answered for.
+        """
+        generated = {}
+        chain = get_ingredient_benefits_chain()
+        for i in range(0, len(names), self.batch_size):
+            batch = names[i : i + self.batch_size]
+            response = chain.invoke(
+                {"ingredients": "\n".join(batch)},
+                config={"metadata": {"endpoint": "ingredient-summary"}},
+            )
+            answered = parse_benefits(response["text"])
+            for name in batch:
+                key = ingredient_key(name)
+                if key in answered:
+                    self.put(key, answered[key])
+                    generated[key] = answered[key]
+                else:
+                    print(f"⚠️ No benefits returned for ingredient {name}")
+            with self._lock:
+                self._stats["llm_calls"] += 1
+                self._stats["generated"] += sum(
+                    ingredient_key(name) in answered for name in batch
+                )
+        return generated
+
+    def generate_in_background(self, names):
+        """
+        Start generating the benefits of `names` on a background thread.
+
+        Ingredients already being generated are skipped.
+
+        Returns:
+            bool: Whether a generation was started.
+        """
+
+        def run():
+            try:
+                self.generate(pending)
+            except Exception as e:
+                print(f"❌ Background benefit generation failed: {e}")
+            finally:
+                with self._lock:
+                    for key in keys:
+                        self._generating.pop(key, None)
+
+        with self._lock:
+            pending = [n for n in names if ingredient_key(n) not in self._generating]
+            if not pending:
+                return False
+            keys = [ingredient_key(name) for name in pending]
+            thread = threading.Thread(target=run, daemon=True)
+            for key in keys:
+                self._generating[key] = thread
+        thread.start()
+        return True
+
+    def join(self, timeout=None):
+        """Wait for the background generations started so far to finish."""
+        with self._lock:
+            threads = set(self._generating.values())
+        for thread in threads:
+            thread.join(timeout)
+
+    def coverage(self, names):
+        """
+        Return the share of distinct ingredients in `names` known to the lexicon.
+
+        Example:
+            >>> store.coverage(["Water", "Glycerin", "Mystery Extract", "glycerin"])
+            0.6666666666666666
+        """
+        keys = {ingredient_key(name) for name in names}
+        if not keys:
+            return 1.0
+        return sum(key in self.lexicon for key in keys) / len(keys)
+
+    def summarize(self, names, limit=SUMMARY_SIZE):
+        """
+        Return the top benefits of a product.
+
+        If the lexicon covers at least `lexicon_coverage` of the ingredients, the summary is
+        built from the lexicon and the stored benefits, and unknown ingredients are generated
+        in the background for later requests. Otherwise the unknown ingredients are generated
+        first.
+
+        Args:
+            names (list[str]): The product's ingredient names, in label order.
+            limit (int, optional): Number of benefits to return.
+
+        Returns:
+            dict: A dict with:
+                - `summary` (list[str]): The product's top benefits (see `rank_benefits`).
+                - `coverage` (float): The lexicon's coverage of the ingredients (see `coverage`),
+                  rounded to 2 decimals.
+                - `source` (str): `"lexicon"` if answered by the lexicon fast path, `"store"` if
+                  every ingredient was already known, or `"llm"` if the LLM was waited for.
+                - `complete` (bool): Whether the summary accounts for every ingredient.
+        """
+        coverage = self.coverage(names)
+        benefits, unknown = self.lookup(names)
+        if coverage >= self.lexicon_coverage:
+            source = "lexicon"
+            with self._lock:
+                self._stats["lexicon_summaries"] += 1
+            if unknown:
+                self.generate_in_background(unknown)
+        elif unknown:
+            source = "llm"
+            benefits.update(self.generate(unknown))
+        else:
+            source = "store"
+        return {
+            "summary": rank_benefits(names, benefits, limit),
+            "coverage": round(coverage, 2),
+            "source": source,
+            "complete": all(ingredient_key(name) in benefits for name in names),
+        }
+
+    def stats(self):
+        """
+        Return ingredient benefit store statistics.
+
+        Returns:
+            dict: The `PersistentLRUCache.stats` of ingredient lookups, plus the LLM calls
+                  made and the ingredients whose benefits they generated, the lexicon's
+                  entries, and the summaries answered by the lexicon fast path.
+        """
+        stats = super().stats()
+        with self._lock:
+            stats["llm_calls"] = self._stats["llm_calls"]
+            stats["generated"] = self._stats["generated"]
+            stats["lexicon_entries"] = len(self.lexicon)
+            stats["lexicon_summaries"] = self._stats["lexicon_summaries"]
+        return stats
+
+
+# Shared ingredient benefit store used by /ingredient-summary
+ingredient_benefits = IngredientBenefitStore(
+    lexicon=load_lexicon(INGREDIENT_LEXICON_FILE)
+)
+atexit.register(ingredient_benefits.flush)
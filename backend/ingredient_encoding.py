@@ -0,0 +1,198 @@
+import math
+import re
+
+from backend.config.settings import INGREDIENT_PROMPT_TOKEN_BUDGET
+from backend.normalize import normalize_query
+
+# Hazard bands of EWG scores, most hazardous first: (label, lowest score, highest score)
+HAZARD_BANDS = (
+    ("High hazard (7-10)", 7, 10),
+    ("Moderate hazard (3-6)", 3, 6),
+    ("Low hazard (1-2)", 1, 2),
+)
+UNRATED_BAND = "Unrated"
+
+# Average characters per token of English text for Llama-family tokenizers
+CHARS_PER_TOKEN = 4
+
+_SCORE = re.compile(r"\d+")
+_ALLERGY_SEPARATORS = re.compile(r"[,;/\n]|\band\b")
+_NO_ALLERGIES = {"", "none", "no", "n a", "unknown"}
+
+
+def estimate_tokens(text):
+    """
+    Estimate the number of prompt tokens of `text`, without a tokenizer.
+
+    Example:
+        >>> estimate_tokens("Fragrance (8) [1, 2]")
+        5
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def hazard_band(score):
+    """
+    Return the label of the hazard band of an EWG score, or `UNRATED_BAND`.
+
+    Scores given as ranges, such as `"1-3"`, are banded by their first number.
+
+    Example:
+        >>> hazard_band("8")
+        'High hazard (7-10)'
+    """
+    match = _SCORE.search(str(score))
+    if match:
+        value = int(match.group())
+        for label, low, high in HAZARD_BANDS:
+            if low <= value <= high:
+                return label
+    return UNRATED_BAND
+
+
+def allergy_terms(user_profile):
+    """
+    Return the normalized allergies of a user profile.
+
+    `allergies` may be a string of comma, semicolon or "and" separated allergies, or a list.
+    Trailing plurals are dropped so that "Parabens" matches "Methylparaben".
+
+    Example:
+        >>> allergy_terms({"allergies": "Fragrance, parabens and Nuts"})
+        ['fragrance', 'paraben', 'nut']
+    """
+    allergies = (user_profile or {}).get("allergies") or []
+    if isinstance(allergies, str):
+        allergies = _ALLERGY_SEPARATORS.split(allergies)
+    terms = []
+    for allergy in allergies:
+        term = normalize_query(str(allergy))
+        if term in _NO_ALLERGIES:
+            continue
+        if len(term) > 3 and term.endswith("s") and not term.endswith("ss"):
+            term = term[:-1]
+        terms.append(term)
+    return terms
+
+
+def matches_allergy(ingredient, terms):
+    """Return whether an ingredient's name contains one of the allergy `terms`, or the reverse."""
+    name = normalize_query(str(ingredient["name"]))
+    compact = name.replace(" ", "")
+    return any(
+        term in name or term.replace(" ", "") in compact or (name and name in term)
+        for term in terms
+    )
+
+
+def _concern_legend(ingredients):
+    # Number the concerns shared by several ingredients, in order of first appearance
+    counts = {}
+    for ingredient in ingredients:
+        for concern in dict.fromkeys(ingredient["concerns"]):
+            counts[concern] = counts.get(concern, 0) + 1
+    legend = {}
+    for concern, count in counts.items():
+        if count > 1:
+            legend[concern] = f"[{len(legend) + 1}]"
+    return legend
+
+
+def encode_ingredients(
+    ingredients, user_profile=None, token_budget=INGREDIENT_PROMPT_TOKEN_BUDGET
+):
+    """
+    Encode validated ingredients compactly for an LLM prompt.
+
+    Ingredients are grouped by hazard band, most hazardous first and unrated ones before the low
+    hazard band, keeping their label order within a band. Concerns shared by several listed
+    ingredients are given once in a numbered legend and referred to by number; missing concerns
+    and scores without a number, such as "N/A", are omitted rather than spelled out.
+    Low hazard ingredients without concerns are listed on one line, without their score.
+
+    If the encoding is estimated to exceed `token_budget` tokens, low hazard ingredients are
+    dropped from the end of the list, where concentrations are lowest, and counted in a closing
+    line instead. Moderate, high hazard and unrated ingredients are never dropped, nor are
+    ingredients matching the user's allergies (see `matches_allergy`).
+
+    Args:
+        ingredients (list[dict]): Ingredients with `name`, `score` and `concerns`, as validated
+            by `get_formatted_ingredients`.
+        user_profile (dict | None, optional): The user's profile, whose `allergies` are kept.
+        token_budget (int, optional): Estimated token limit (see `estimate_tokens`), or 0 for no
+            limit. Defaults to `INGREDIENT_PROMPT_TOKEN_BUDGET`.
+
+    Returns:
+        str: The encoded ingredients.
+
+    Example:
+        >>> print(encode_ingredients([
+        ...     {"name": "Water", "score": "1", "concerns": []},
+        ...     {"name": "Fragrance", "score": "8", "concerns": ["Allergen", "Irritant"]},
+        ...     {"name": "Linalool", "score": "7", "concerns": ["Allergen"]},
+        ...     {"name": "Glycerin", "score": "1", "concerns": []},
+        ... ]))
+        Concerns: [1] Allergen
+        High hazard (7-10):
+        - Fragrance (8): [1], Irritant
+        - Linalool (7): [1]
+        Low hazard (1-2):
+        - Water, Glycerin
+    """
+    bands = {label: [] for label, _, _ in HAZARD_BANDS}
+    bands[UNRATED_BAND] = []
+    for ingredient in ingredients:
+        bands[hazard_band(ingredient["score"])].append(ingredient)
+
+    def entry(ingredient, legend, with_score=True):
+        text = str(ingredient["name"])
+        score = str(ingredient["score"]).strip()
+        if with_score and _SCORE.search(score):
+            text += f" ({score})"
+        concerns = [legend.get(c, c) for c in dict.fromkeys(ingredient["concerns"])]
+        if concerns:
+            text += ": " + ", ".join(concerns)
+        return text
+
+    low_label = HAZARD_BANDS[-1][0]
+    low = bands.pop(low_label)
+    low_ids = {id(i) for i in low}
+    terms = allergy_terms(user_profile)
+    # Positions in the low hazard band that may be dropped, last first
+    droppable = [
+        i for i, ingredient in enumerate(low) if not matches_allergy(ingredient, terms)
+    ]
+
+    def render(kept_low):
+        # The legend only covers listed ingredients, so it shrinks as ingredients are dropped
+        kept = {id(i) for i in kept_low}
+        legend = _concern_legend(
+            [i for i in ingredients if id(i) in kept or id(i) not in low_ids]
+        )
+        lines = []
+        if legend:
+            lines.append(
+                "Concerns: " + "; ".join(f"{n} {c}" for c, n in legend.items())
+            )
+        for label in [label for label, _, _ in HAZARD_BANDS[:-1]] + [UNRATED_BAND]:
+            if bands.get(label):
+                lines.append(f"{label}:")
+                lines.extend(f"- {entry(i, legend)}" for i in bands[label])
+        if low:
+            lines.append(f"{low_label}:")
+            plain = [entry(i, legend, False) for i in kept_low if not i["concerns"]]
+            if plain:
+                lines.append("- " + ", ".join(plain))
+            lines.extend(f"- {entry(i, legend)}" for i in kept_low if i["concerns"])
+            if len(kept_low) < len(low):
+                lines.append(
+                    f"- and {len(low) - len(kept_low)} more low hazard ingredients"
+                )
+        return "\n".join(lines)
+
+    dropped = set()
+    text = render(low)
+    while token_budget and droppable and estimate_tokens(text) > token_budget:
+        dropped.add(droppable.pop())
+        text = render([i for n, i in enumerate(low) if n not in dropped])
+    return text
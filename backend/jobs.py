@@ -0,0 +1,282 @@
+import queue
+import threading
+import time
+import uuid
+from collections import Counter
+from functools import partial
+
+from backend.config.settings import (
+    SCRAPE_JOB_RETENTION,
+    SCRAPE_JOB_TIMEOUT,
+    SCRAPE_QUEUE_SIZE,
+    SCRAPE_WORKERS,
+)
+
+# Job states; every state except "queued" and "running" is final
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TIMED_OUT = "timed_out"
+FINAL_STATES = {DONE, FAILED, CANCELLED, TIMED_OUT}
+
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the queue already holds `max_queued` jobs."""
+
+
+class Job:
+    """
+    A unit of background work and its outcome.
+
+    Args:
+        key (str): Identifies the work; submitting an unfinished key again returns this job.
+        fn (callable): The work to run.
+        args (tuple): Positional arguments for `fn`.
+    """
+
+    def __init__(self, key, fn, args):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.fn = fn
+        self.args = args
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._finished = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def _finish(self, status, result=None, error=None, settle=None):
+        # Only the first transition to a final state counts (e.g. a timeout beats a late result)
+        with self._lock:
+            if self.status in FINAL_STATES:
+                return False
+            self.status = status
+            self.result = result
+            self.error = error
+            self.finished_at = time.time()
+            callbacks, self._callbacks = self._callbacks, []
+        if settle is not None:
+            settle(
+                self
+            )  # Before waking waiters, so they see the job released and counted
+        self._finished.set()
+        for callback in callbacks:
+            callback(self)
+        return True
+
+    def add_done_callback(self, callback):
+        """
+        Call `callback(job)` once the job reaches a final state, right away if it already has.
+
+        Args:
+            callback (callable): Called on the thread that finishes the job; must not block.
+        """
+        with self._lock:
+            if self.status not in FINAL_STATES:
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def wait(self, timeout=None):
+        """
+        Block until the job reaches a final state.
+
+        Returns:
+            bool: `True` if the job finished within `timeout`.
+        """
+        return self._finished.wait(timeout)
+
+    def to_dict(self):
+        """
+        Return the job's public state.
+
+        Returns:
+            dict: Job ID, status, and the result or error once finished.
+        """
+        with self._lock:
+            data = {"job_id": self.id, "status": self.status}
+            if self.status == DONE:
+                data["result"] = self.result
+            if self.error is not None:
+                data["error"] = self.error
+            return data
+
+
+class JobQueue:
+    """
+    Bounded pool of worker threads running submitted jobs in FIFO order.
+
+    Jobs for a key that is already queued or running are deduplicated, so a burst of identical
+    requests becomes one job. Submissions beyond `max_queued` waiting jobs are rejected with
+    `JobQueueFull`. A job still running after `timeout` seconds is reported as timed out; its
+    worker is not interrupted, but its late result is discarded. A queued job can be cancelled
+    outright; cancelling a running job discards its result the same way. Finished jobs can be
+    looked up for `retention` seconds.
+
+    Args:
+        workers (int, optional): Worker threads. Defaults to `SCRAPE_WORKERS`.
+        max_queued (int, optional): Jobs allowed to wait for a worker. Defaults to `SCRAPE_QUEUE_SIZE`.
+        timeout (float, optional): Seconds a job may run. Defaults to `SCRAPE_JOB_TIMEOUT`.
+        retention (float, optional): Seconds finished jobs are kept. Defaults to `SCRAPE_JOB_RETENTION`.
+
+    Example:
+        >>> jobs = JobQueue(workers=2)
+        >>> job = jobs.submit("cerave", scrape_product_ingredients, "CeraVe")
+        >>> job.wait(30)
+        True
+        >>> jobs.get(job.id).to_dict()["status"]
+        'done'
+    """
+
+    def __init__(
+        self,
+        workers=SCRAPE_WORKERS,
+        max_queued=SCRAPE_QUEUE_SIZE,
+        timeout=SCRAPE_JOB_TIMEOUT,
+        retention=SCRAPE_JOB_RETENTION,
+    ):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self.retention = retention
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._lock = threading.Lock()
+        self._jobs = {}  # job ID -> Job
+        self._active = {}  # key -> unfinished Job
+        self._threads = []
+        self._stats = Counter()
+
+    def _start_workers(self):
+        # Workers start with the first job, so importing the server does not spawn threads
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def submit(self, key, fn, *args):
+        """
+        Queue `fn(*args)`, or return the unfinished job already queued for `key`.
+
+        Returns:
+            Job: The queued, running or deduplicated job.
+
+        Raises:
+            JobQueueFull: If `max_queued` jobs are already waiting for a worker.
+        """
+        with self._lock:
+            self._purge()
+            job = self._active.get(key)
+            if job is not None and job.status not in FINAL_STATES:
+                self._stats["deduplicated"] += 1
+                return job
+
+            job = Job(key, fn, args)
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                self._stats["rejected"] += 1
+                raise JobQueueFull(f"{self.max_queued} jobs are already waiting")
+            self._jobs[job.id] = job
+            self._active[key] = job
+            self._stats["submitted"] += 1
+            self._start_workers()
+            return job
+
+    def get(self, job_id):
+        """Return the job with `job_id`, or `None` if it is unknown or expired."""
+        with self._lock:
+            self._purge()
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """
+        Cancel a queued or running job.
+
+        Returns:
+            bool: `True` if the job was unfinished and is now cancelled.
+        """
+        job = self.get(job_id)
+        if job is None:
+            return False
+        return job._finish(CANCELLED, settle=partial(self._settle, "cancelled"))
+
+    def _settle(self, stat, job):
+        self._release(job)
+        with self._lock:
+            self._stats[stat] += 1
+
+    def _release(self, job):
+        with self._lock:
+            if self._active.get(job.key) is job:
+                del self._active[job.key]
+
+    def _purge(self):
+        cutoff = time.time() - self.retention
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _expire(self, job):
+        job._finish(
+            TIMED_OUT,
+            error=f"Job timed out after {self.timeout:g}s",
+            settle=partial(self._settle, "timed_out"),
+        )
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            with job._lock:
+                if job.status != QUEUED:  # Cancelled while waiting
+                    continue
+                job.status = RUNNING
+                job.started_at = time.time()
+
+            timer = threading.Timer(self.timeout, self._expire, args=(job,))
+            timer.daemon = True
+            timer.start()
+            try:
+                result = job.fn(*job.args)
+            except Exception as e:
+                print(f"❌ Job {job.id} failed: {e}")
+                job._finish(
+                    FAILED, error=str(e), settle=partial(self._settle, "failed")
+                )
+            else:
+                job._finish(
+                    DONE, result=result, settle=partial(self._settle, "completed")
+                )
+            finally:
+                timer.cancel()
+
+    def stats(self):
+        """
+        Return job queue statistics.
+
+        Returns:
+            dict: Jobs waiting and running, and counts of submitted, deduplicated, rejected,
+                  completed, failed, cancelled and timed out jobs.
+        """
+        with self._lock:
+            running = sum(job.status == RUNNING for job in self._active.values())
+            return {
+                "queued": self._queue.qsize(),
+                "running": running,
+                "submitted": self._stats["submitted"],
+                "deduplicated": self._stats["deduplicated"],
+                "rejected": self._stats["rejected"],
+                "completed": self._stats["completed"],
+                "failed": self._stats["failed"],
+                "cancelled": self._stats["cancelled"],
+                "timed_out": self._stats["timed_out"],
+            }
@@ -1,41 +1,93 @@
+import threading
+
+import httpx
 from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
 from langchain.chains import ConversationChain, LLMChain
 from langchain.memory import ConversationBufferMemory
 from langchain_ollama import ChatOllama
 
-from backend.config.settings import LLM_BASE_URL, LLM_MODEL, LLM_TEMPERATURE
+from backend.callback import MetricsCallbackHandler
+from backend.config.settings import (
+    LLM_BASE_URL,
+    LLM_ECHO_TOKENS,
+    LLM_KEEPALIVE_EXPIRY,
+    LLM_MODEL,
+    LLM_POOL_MAX_CONNECTIONS,
+    LLM_POOL_MAX_KEEPALIVE,
+    LLM_TEMPERATURE,
+    LLM_TIMEOUT,
+)
 from backend.prompt import (
     prompt_template_followup,
-    prompt_template_ingredient_summary,
+    prompt_template_ingredient_benefits,
     prompt_template_recommendation,
 )
 
+# (base_url, model, temperature) -> shared ChatOllama
+_llms = {}
+_llms_lock = threading.Lock()
+
+
+def _callbacks():
+    callbacks = [MetricsCallbackHandler()]
+    if LLM_ECHO_TOKENS:
+        callbacks.append(StreamingStdOutCallbackHandler())
+    return callbacks
+
 
-def get_llm() -> ChatOllama:
+def get_llm(
+    base_url: str = LLM_BASE_URL,
+    model: str = LLM_MODEL,
+    temperature: float = LLM_TEMPERATURE,
+) -> ChatOllama:
     """
-    Initialize and return the LLM instance.
+    Return the shared LLM instance for a configuration, creating it on first use.
 
     Args:
-        None
+        base_url (str, optional): Ollama server URL. Defaults to `LLM_BASE_URL`.
+        model (str, optional): Model name. Defaults to `LLM_MODEL`.
+        temperature (float, optional): Sampling temperature. Defaults to `LLM_TEMPERATURE`.
 
     Returns:
-        ChatOllama: An instance of the ChatOllama language model.
+        ChatOllama: The `ChatOllama` instance shared by every caller with the same configuration.
 
     Description:
-        This function initializes a `ChatOllama` instance.
+        Chains and conversation sessions reference this instance instead of owning one, so all of
+        them reuse its keep-alive connections to Ollama. The pool holds up to
+        `LLM_POOL_MAX_CONNECTIONS` connections, keeps `LLM_POOL_MAX_KEEPALIVE` of them open for
+        `LLM_KEEPALIVE_EXPIRY` seconds when idle, and requests time out after `LLM_TIMEOUT`
+        seconds. The underlying httpx client is thread-safe.
+
+        Every generation is measured by a `MetricsCallbackHandler` into `llm_metrics`, under the
+        `endpoint` passed in the run's metadata. Tokens are echoed to stdout only if
+        `LLM_ECHO_TOKENS` is set.
 
     Example:
         >>> llm = get_llm()
-        >>> print(llm)
-        <ChatOllama instance>
+        >>> get_llm() is llm
+        True
     """
-    return ChatOllama(
-        base_url=LLM_BASE_URL,
-        model=LLM_MODEL,
-        temperature=LLM_TEMPERATURE,
-        streaming=True,
-        callbacks=[StreamingStdOutCallbackHandler()],
-    )
+    key = (base_url, model, temperature)
+    with _llms_lock:
+        llm = _llms.get(key)
+        if llm is None:
+            llm = ChatOllama(
+                base_url=base_url,
+                model=model,
+                temperature=temperature,
+                streaming=True,
+                callbacks=_callbacks(),
+                client_kwargs={
+                    "limits": httpx.Limits(
+                        max_connections=LLM_POOL_MAX_CONNECTIONS,
+                        max_keepalive_connections=LLM_POOL_MAX_KEEPALIVE,
+                        keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+                    ),
+                    "timeout": LLM_TIMEOUT,
+                },
+            )
+            _llms[key] = llm
+        return llm
 
 
 def get_llm_chain() -> LLMChain:
@@ -49,7 +101,7 @@ def get_llm_chain() -> LLMChain:
         LLMChain: An instance of LLMChain configured with the initialized LLM and prompt template.
 
     Description:
-        This function first initializes the LLM using `get_llm()`, then constructs an `LLMChain`
+        This function first gets the shared LLM using `get_llm()`, then constructs an `LLMChain`
         with the given prompt template. The chain is used to process input through the model.
 
     Example:
@@ -70,7 +122,7 @@ def create_conversation_chain() -> ConversationChain:
         None
 
     Returns:
-        ConversationChain: An instance of `ConversationChain` configured with an initialized LLM
+        ConversationChain: An instance of `ConversationChain` configured with the shared LLM
                            and a `ConversationBufferMemory` to store conversation context.
 
     Description:
@@ -90,6 +142,29 @@ def create_conversation_chain() -> ConversationChain:
     return ConversationChain(llm=llm, memory=memory, prompt=prompt_template_followup)
 
 
-def get_ingredient_summary_chain() -> LLMChain:
+def get_ingredient_benefits_chain() -> LLMChain:
+    """
+    Create and return an LLM chain that describes the benefits of ingredients.
+
+    Args:
+        None
+
+    Returns:
+        LLMChain: An instance of LLMChain configured with the shared LLM and
+                  `prompt_template_ingredient_benefits`.
+
+    Description:
+        The chain takes newline-separated ingredient names as `ingredients` and answers with a
+        JSON object mapping each name to its benefits (see `parse_benefits`). Each ingredient is
+        asked about once: `IngredientBenefitStore.generate` runs the chain only for ingredients
+        missing from the lexicon and the benefit store, in batches of
+        `INGREDIENT_BENEFITS_BATCH_SIZE`, and stores the answers for later requests.
+
+    Example:
+        >>> chain = get_ingredient_benefits_chain()
+        >>> response = chain.invoke({"ingredients": "Glycerin\\nPhenoxyethanol"})
+        >>> print(response["text"])
+        {"Glycerin": ["Hydrating"], "Phenoxyethanol": []}
+    """
     llm = get_llm()
-    return LLMChain(llm=llm, prompt=prompt_template_ingredient_summary)
+    return LLMChain(llm=llm, prompt=prompt_template_ingredient_benefits)
@@ -0,0 +1,185 @@
+import hashlib
+import math
+import threading
+import time
+from collections import Counter
+
+from backend.config.settings import NEGATIVE_CACHE_CAPACITY, NEGATIVE_CACHE_TTL_SECONDS
+from backend.normalize import normalize_query
+
+# Scraper errors that mean "this query has no usable product", as opposed to crashes
+NEGATIVE_CACHE_ERRORS = {
+    "No products found",
+    "Ingredient table did not load",
+    "No ingredient data found",
+}
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over string keys.
+
+    Membership tests never return false negatives, and return false positives at roughly
+    `error_rate` once `capacity` keys have been added.
+
+    Args:
+        capacity (int): Number of keys the filter is sized for.
+        error_rate (float, optional): Target false positive rate at `capacity`.
+
+    Example:
+        >>> bloom = BloomFilter(1000)
+        >>> bloom.add("cerave")
+        >>> "cerave" in bloom
+        True
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        # Double hashing: k positions derived from two 64-bit halves of one digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+
+class NegativeCache:
+    """
+    Short-lived cache of failed product lookups, keyed by normalized query.
+
+    Kept apart from the product cache and held in memory only. A Bloom filter sits in front
+    of the entry table so the common case (a query that never failed) is rejected without
+    touching the table. Entries expire after `ttl_seconds`; the filter is rebuilt from the
+    live entries once it has absorbed `capacity` insertions. A rebuild keeps at most half of
+    `capacity` entries, dropping those closest to expiry, so the table stays bounded and a
+    rebuild happens at most once per `capacity / 2` insertions.
+
+    Args:
+        ttl_seconds (float, optional): How long a failure is remembered. Defaults to `NEGATIVE_CACHE_TTL_SECONDS`.
+        capacity (int, optional): Bloom filter size. Defaults to `NEGATIVE_CACHE_CAPACITY`.
+
+    Example:
+        >>> negative_cache = NegativeCache(ttl_seconds=600)
+        >>> negative_cache.put("Cerave Moisturising Creme", {"error": "No products found"})
+        >>> negative_cache.get("cerave moisturising creme")
+        {'error': 'No products found'}
+        >>> negative_cache.clear("cerave moisturising creme")
+        True
+    """
+
+    def __init__(
+        self, ttl_seconds=NEGATIVE_CACHE_TTL_SECONDS, capacity=NEGATIVE_CACHE_CAPACITY
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._bloom = BloomFilter(capacity)
+        self._stats = Counter()
+
+    def get(self, product_name):
+        """Return the cached failure for `product_name`, or `None` if there is none."""
+        key = normalize_query(product_name)
+        if key not in self._bloom:
+            with self._lock:
+                self._stats["bloom_rejects"] += 1
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["bloom_false_positives"] += 1
+                return None
+            error, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                self._stats["expired"] += 1
+                return None
+            self._stats["hits"] += 1
+            return dict(error)
+
+    def put(self, product_name, error):
+        """Remember that looking up `product_name` failed with `error`."""
+        key = normalize_query(product_name)
+        with self._lock:
+            if self._bloom.count >= self.capacity:
+                self._rebuild()
+            self._entries[key] = (dict(error), time.monotonic() + self.ttl_seconds)
+            self._bloom.add(key)
+
+    def clear(self, product_name):
+        """
+        Forget the cached failure for `product_name`.
+
+        Returns:
+            bool: `True` if an entry was removed.
+        """
+        with self._lock:
+            return self._entries.pop(normalize_query(product_name), None) is not None
+
+    def _rebuild(self):
+        now = time.monotonic()
+        live = [(k, v) for k, v in self._entries.items() if v[1] > now]
+        keep = self.capacity // 2
+        if len(live) > keep:
+            live.sort(key=lambda item: item[1][1])
+            self._stats["evictions"] += len(live) - keep
+            live = live[len(live) - keep :]
+        self._entries = dict(live)
+        self._bloom = BloomFilter(self.capacity)
+        for key in self._entries:
+            self._bloom.add(key)
+
+    def stats(self):
+        """
+        Return negative cache statistics.
+
+        Returns:
+            dict: Number of live entries, hits, Bloom filter rejects and false positives,
+                  expired entries dropped on lookup, and entries evicted to bound the table.
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self._stats["hits"],
+                "bloom_rejects": self._stats["bloom_rejects"],
+                "bloom_false_positives": self._stats["bloom_false_positives"],
+                "expired": self._stats["expired"],
+                "evictions": self._stats["evictions"],
+            }
+
+
+# Shared negative cache used by the scraper and the Flask routes
+negative_cache = NegativeCache()
+
+
+def clear_negative_entry(product_name):
+    """
+    Manually clear the cached failure for a query, so the next lookup scrapes again.
+
+    Args:
+        product_name (str): The searching keyword (normalized before lookup).
+
+    Returns:
+        bool: `True` if a negative entry existed and was removed.
+
+    Example:
+        >>> clear_negative_entry("CeraVe Moisturizing Cream")
+        True
+    """
+    return negative_cache.clear(product_name)
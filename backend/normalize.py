@@ -0,0 +1,25 @@
+import re
+import unicodedata
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize_query(text: str) -> str:
+    """
+    Normalize a product search query into a cache key.
+
+    Args:
+        text (str): The raw search string, e.g. "  CeraVe Moisturizing-Cream ".
+
+    Returns:
+        str: The query with Unicode compatibility forms folded, case folded, punctuation
+             replaced by spaces and runs of whitespace collapsed.
+
+    Example:
+        >>> normalize_query("  CeraVe Moisturizing-Cream ")
+        'cerave moisturizing cream'
+        >>> normalize_query("La Roche-Posay") == normalize_query("la roche posay")
+        True
+    """
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return " ".join(_NON_WORD.sub(" ", text).split())
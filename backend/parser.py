@@ -0,0 +1,149 @@
+from urllib.parse import urljoin
+
+import lxml.html
+
+
+def _has_class(name):
+    # XPath predicate matching one class in a space-separated class attribute
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+_PRODUCT_NAME = f"//h2[{_has_class('product-name')} and {_has_class('text-block')}]"
+_INGREDIENT_ROWS = (
+    f"//tr[{_has_class('ingredient-overview-tr')}"
+    f" or {_has_class('ingredient-more-info-wrapper')}]"
+)
+_INGREDIENT_NAME = (
+    f".//td[{_has_class('td-ingredient')}]//*[{_has_class('td-ingredient-interior')}]"
+)
+_INGREDIENT_SCORE = (
+    f".//td[{_has_class('td-score')}]//img[{_has_class('ingredient-score')}]/@alt"
+)
+_DETAIL_ROWS = f".//div[{_has_class('ingredient-more-info')}]//table//tr"
+_PRODUCT_LISTINGS = f"//section[{_has_class('product-listings')}]"
+_LISTING_NAME = f".//*[{_has_class('product-name')}]"
+
+
+def parse_search_results(html, base_url):
+    """
+    Extract the listed products from an EWG Skin Deep search results page.
+
+    Args:
+        html (str): The search page source.
+        base_url (str): URL the page was served from, used to resolve relative links.
+
+    Returns:
+        list[dict] | None: `product_url` and `product_name` (`None` if the listing shows no name)
+                           of each product in listing order, an empty list if the listing is present
+                           but empty, or `None` if the page has no product listing at all (e.g. it is
+                           rendered client-side).
+
+    Example:
+        >>> parse_search_results(html, "https://www.ewg.org")
+        [{"product_url": "https://www.ewg.org/skindeep/products/123456-CeraVe_Moisturizing_Cream/",
+          "product_name": "CeraVe Moisturizing Cream"}]
+    """
+    if not html or not html.strip():
+        return None
+    listings = lxml.html.fromstring(html).xpath(_PRODUCT_LISTINGS)
+    if not listings:
+        return None
+
+    # Each listing links a product from both its image and its name
+    products = {}
+    for listing in listings:
+        for link in listing.xpath(".//a[@href]"):
+            product_url = urljoin(base_url, link.get("href"))
+            names = link.xpath(_LISTING_NAME)
+            name = names[0].text_content().strip() if names else None
+            if not products.get(product_url):
+                products[product_url] = name or None
+    return [
+        {"product_url": product_url, "product_name": name}
+        for product_url, name in products.items()
+    ]
+
+
+def parse_concerns(cell):
+    """
+    Split the CONCERNS cell of an ingredient's detail table into a list of concerns.
+
+    Args:
+        cell (lxml.html.HtmlElement): The `<td>` holding the bulleted concerns.
+
+    Returns:
+        list[str]: Concerns with surrounding whitespace and bullet characters removed.
+    """
+    concerns = []
+    for text in cell.xpath(".//text()"):
+        for line in text.split("\n"):
+            concern = line.replace("•", "").strip()
+            if concern:
+                concerns.append(concern)
+    return concerns
+
+
+def _parse_details(row):
+    # The detail row holds a small label/value table; only the CONCERNS entry is used
+    for tr in row.xpath(_DETAIL_ROWS):
+        cells = tr.xpath("./td")
+        if len(cells) > 1 and "CONCERNS" in cells[0].text_content():
+            return parse_concerns(cells[1])
+    return []
+
+
+def parse_product_page(html):
+    """
+    Extract a product's name and ingredient details from an EWG Skin Deep product page.
+
+    Args:
+        html (str): The product page source, e.g. `driver.page_source`.
+
+    Returns:
+        dict: The product name (`None` if missing) and the list of ingredients with their
+              hazard scores (`"N/A"` if missing) and concerns.
+
+    Description:
+        - Parses the page once with lxml; no WebDriver calls are made.
+        - Walks the ingredient table in document order: each `ingredient-overview-tr` row starts
+          an ingredient, and the `ingredient-more-info-wrapper` row after it supplies its concerns.
+
+    Example:
+        >>> parse_product_page(driver.page_source)
+        {
+            "product_name": "CeraVe Moisturizing Cream",
+            "ingredients": [
+                { "name": "Water", "score": "1", "concerns": []},
+                { "name": "Fragrance", "score": "8", "concerns": ["Allergies/immunotoxicity (high)"] }
+            ]
+        }
+    """
+    if not html or not html.strip():
+        return {"product_name": None, "ingredients": []}
+    document = lxml.html.fromstring(html)
+
+    name_elements = document.xpath(_PRODUCT_NAME)
+    product_name = name_elements[0].text_content().strip() if name_elements else None
+
+    ingredients = []
+    for row in document.xpath(_INGREDIENT_ROWS):
+        if "ingredient-overview-tr" in row.get("class", "").split():
+            names = row.xpath(_INGREDIENT_NAME)
+            if not names:
+                continue
+            scores = row.xpath(_INGREDIENT_SCORE)
+            ingredients.append(
+                {
+                    "name": names[0].text_content().strip(),
+                    "score": (
+                        scores[0].replace("Ingredient score: ", "").strip()
+                        if scores
+                        else "N/A"
+                    ),
+                    "concerns": [],
+                }
+            )
+        elif ingredients:
+            ingredients[-1]["concerns"] = _parse_details(row)
+
+    return {"product_name": product_name, "ingredients": ingredients}
@@ -0,0 +1,205 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from backend.config.settings import CACHE_FLUSH_INTERVAL
+from backend.storage import load_cache, save_cache
+
+
+def fingerprint(value):
+    """
+    Return a SHA-256 hex digest of a JSON-serializable value in canonical form.
+
+    Example:
+        >>> fingerprint({"b": 1, "a": [2]}) == fingerprint({"a": [2], "b": 1})
+        True
+    """
+    return hashlib.sha256(
+        json.dumps(value, sort_keys=True, separators=(",", ":")).encode()
+    ).hexdigest()
+
+
+class PersistentLRUCache:
+    """
+    Key -> JSON value cache with a TTL and an LRU size limit, persisted to a JSON file.
+
+    Entries expire after `ttl_days`; the least recently used are dropped beyond `max_entries`.
+    Changes are written to disk in the background at most every `flush_interval` seconds, so
+    entries survive restarts. Server processes sharing the file pick up each other's entries:
+    the file is merged back in when a lookup misses after it has changed, and before every write.
+    Discarded keys are not merged back from entries stored before they were discarded.
+
+    Args:
+        path (str | None): JSON file to persist to, or `None` to keep entries in memory only.
+        ttl_days (float): Age after which an entry is ignored.
+        max_entries (int): Entry limit.
+        flush_interval (float, optional): Seconds to wait before writing changes.
+
+    Example:
+        >>> cache = PersistentLRUCache("answers.json", ttl_days=30, max_entries=1000)
+        >>> cache.put(fingerprint(request), ["Hydrating", "Soothing"])
+        >>> cache.get(fingerprint(request))
+        ['Hydrating', 'Soothing']
+    """
+
+    def __init__(
+        self, path, ttl_days, max_entries, flush_interval=CACHE_FLUSH_INTERVAL
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_days * 86400
+        self.max_entries = max_entries
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._entries = None  # key -> [value, stored_at], loaded lazily
+        self._mtime = None  # Modification time of the file when last read or written
+        self._discarded = {}  # key -> time it was discarded, until the next write
+        self._dirty = False
+        self._timer = None
+        self._stats = Counter()
+
+    def _load(self):
+        # Caller holds self._lock
+        if self._entries is None:
+            self._entries = OrderedDict()
+            self._merge_file()
+        return self._entries
+
+    def _file_mtime(self):
+        try:
+            return os.path.getmtime(self.path)
+        except OSError:
+            return None
+
+    def _merge_file(self):
+        # Caller holds self._lock. Adds entries other processes wrote since the last read.
+        if not self.path:
+            return
+        mtime = self._file_mtime()
+        if mtime is None or mtime == self._mtime:
+            return
+        self._mtime = mtime
+        now = time.time()
+        for key, entry in sorted(
+            load_cache(self.path).items(), key=lambda kv: kv[1][1]
+        ):
+            current = self._entries.get(key)
+            if now - entry[1] > self.ttl_seconds:
+                continue
+            if entry[1] <= self._discarded.get(key, -1):
+                continue
+            if current is None or current[1] < entry[1]:
+                self._entries[key] = entry
+        self._evict()
+
+    def _evict(self):
+        # Caller holds self._lock
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _lookup(self, key):
+        # Caller holds self._lock. Returns the live entry of `key` as most recently used, or None.
+        entries = self._load()
+        if key not in entries:
+            self._merge_file()
+        entry = entries.get(key)
+        if entry is None:
+            self._stats["misses"] += 1
+            return None
+        if time.time() - entry[1] > self.ttl_seconds:
+            del entries[key]
+            self._stats["expired"] += 1
+            self._stats["misses"] += 1
+            return None
+        entries.move_to_end(key)
+        return entry
+
+    def _set(self, key, entry):
+        # Caller holds self._lock. `entry` is `[value, stored_at]`, optionally followed by
+        # fields of a subclass.
+        entries = self._load()
+        entries[key] = entry
+        entries.move_to_end(key)
+        self._evict()
+
+    def get(self, key):
+        """Return the value cached under `key`, or `None` if unknown or expired."""
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                return None
+            self._stats["hits"] += 1
+            return entry[0]
+
+    def put(self, key, value):
+        """Cache `value` under `key`."""
+        with self._lock:
+            self._set(key, [value, time.time()])
+        self._mark_dirty()
+
+    def discard(self, key):
+        """
+        Forget the entry of `key`.
+
+        Returns:
+            bool: `True` if an entry was removed.
+        """
+        with self._lock:
+            removed = self._load().pop(key, None) is not None
+            if removed:
+                self._discarded[key] = time.time()
+        if removed:
+            self._mark_dirty()
+        return removed
+
+    def _mark_dirty(self):
+        if not self.path:
+            return
+        with self._lock:
+            self._dirty = True
+            if self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Write pending changes to disk. Does nothing if there are none."""
+        with self._flush_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if not self._dirty or not self.path:
+                    return
+                self._merge_file()
+                snapshot = dict(self._entries)
+                discarded = dict(self._discarded)
+                self._dirty = False
+            save_cache(snapshot, self.path)
+            with self._lock:
+                self._mtime = self._file_mtime()
+                # The file no longer holds the discarded entries
+                for key, discarded_at in discarded.items():
+                    if self._discarded.get(key) == discarded_at:
+                        del self._discarded[key]
+
+    def stats(self):
+        """
+        Return cache statistics.
+
+        Returns:
+            dict: Number of entries, hits, misses (including expired entries), expired entries
+                  dropped on lookup, and entries evicted by the size limit.
+        """
+        with self._lock:
+            return {
+                "entries": len(self._load()),
+                "hits": self._stats["hits"],
+                "misses": self._stats["misses"],
+                "expired": self._stats["expired"],
+                "evictions": self._stats["evictions"],
+            }
@@ -26,18 +26,16 @@ prompt_template_followup = PromptTemplate(
     ),
 )
 
-prompt_template_ingredient_summary = PromptTemplate(
+prompt_template_ingredient_benefits = PromptTemplate(
     input_variables=["ingredients"],
     template=(
-        "You are a skincare expert analyzing ingredient lists.\n"
-        "Given this skincare ingredient list:\n"
+        "You are a skincare expert analyzing ingredients.\n"
+        "For each of these skincare ingredients, one per line:\n"
         "{ingredients}\n\n"
-        "The hazard score represents the potential risk level of the ingredient. "
-        "A lower score (1-2) means it's considered low risk, 3-6 indicates moderate risk, "
-        "and 7-10 suggests a higher hazard potential. "
-        "Extract the **5 most relevant skincare benefits** as a structured JSON array.\n"
-        "Focus on properties like Hydrating, Exfoliating, Soothing, Brightening, Antioxidant, etc.\n"
-        "Return only a **valid JSON list** with no extra text.\n"
-        'Example output: ["Hydrating", "Brightening", "Exfoliating", "Soothing", "Antioxidant"]'
+        "List up to 3 of its main skincare benefits, such as Hydrating, Exfoliating, Soothing, "
+        "Brightening, Antioxidant, Barrier Repair, Anti-aging or Oil Control. "
+        "Use an empty list for ingredients without a skincare benefit, such as preservatives or fragrance.\n"
+        "Return only a **valid JSON object** mapping each ingredient name, exactly as given, to its list of benefits, with no extra text.\n"
+        'Example output: {{"Glycerin": ["Hydrating"], "Niacinamide": ["Brightening", "Oil Control", "Barrier Repair"], "Phenoxyethanol": []}}'
     ),
 )
@@ -0,0 +1,45 @@
+import atexit
+
+from backend.config.settings import (
+    RECOMMENDATION_CACHE_FILE,
+    RECOMMENDATION_CACHE_MAX_ENTRIES,
+    RECOMMENDATION_CACHE_TTL_DAYS,
+)
+from backend.persistent_cache import PersistentLRUCache, fingerprint
+
+
+def recommendation_fingerprint(model, prompt_version, llm_input):
+    """
+    Return the cache key of a recommendation.
+
+    The key covers exactly what the LLM is given, so a cached recommendation is only replayed
+    for a request rendering the same prompt.
+
+    Args:
+        model (str): Name of the model generating the recommendation.
+        prompt_version (str): Version of the recommendation prompt, so a changed template
+            never serves recommendations made with the old one.
+        llm_input (str): The product name, ingredients and user profile as rendered into the
+            prompt (see `build_recommendation_input`).
+
+    Returns:
+        str: A SHA-256 hex digest.
+
+    Example:
+        >>> recommendation_fingerprint("llama3.2", "3f1c9a", llm_input) == recommendation_fingerprint(
+        ...     "mistral", "3f1c9a", llm_input
+        ... )
+        False
+    """
+    return fingerprint(
+        {"model": model, "prompt_version": prompt_version, "input": llm_input}
+    )
+
+
+# Shared cache of the streamed chunks of each /recommend answer, by `recommendation_fingerprint`
+recommendation_cache = PersistentLRUCache(
+    RECOMMENDATION_CACHE_FILE,
+    ttl_days=RECOMMENDATION_CACHE_TTL_DAYS,
+    max_entries=RECOMMENDATION_CACHE_MAX_ENTRIES,
+)
+atexit.register(recommendation_cache.flush)
@@ -0,0 +1,251 @@
+"""
+Record EWG Skin Deep pages and replay them from a local HTTP server.
+
+A fixture directory holds the recorded pages plus an `index.json` manifest mapping each
+request (URL path, and the normalized `search` parameter for search pages) to its file:
+
+    {
+        "base_url": "https://www.ewg.org",
+        "pages": {
+            "/skindeep/search/?search=cerave": "search_cerave.html",
+            "/skindeep/products/123456-CeraVe_Moisturizing_Cream/": "product_123456-CeraVe_Moisturizing_Cream.html"
+        }
+    }
+
+Pointing `EWG_BASE_URL` at a `ReplayServer` lets the scraper run fully offline, on the HTTP
+fast path as well as in a browser session.
+
+Usage:
+    python -m backend.replay record "CeraVe Moisturizing Cream" "The Ordinary Niacinamide"
+    python -m backend.replay serve --port 8800  # then EWG_BASE_URL=http://127.0.0.1:8800
+"""
+
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, quote, urlsplit
+
+from backend.config.settings import EWG_BASE_URL
+from backend.http_client import fetch_html
+from backend.normalize import normalize_query
+from backend.parser import parse_search_results
+from backend.upstream import upstream
+
+FIXTURES_DIR = Path(__file__).parent / "tests" / "fixtures" / "ewg"
+MANIFEST = "index.json"
+
+
+def page_key(url):
+    """
+    Return the manifest key of a request URL.
+
+    Example:
+        >>> page_key("https://www.ewg.org/skindeep/search/?search=CeraVe%20Cream")
+        '/skindeep/search/?search=cerave cream'
+    """
+    parts = urlsplit(url)
+    search = parse_qs(parts.query).get("search")
+    if search:
+        return f"{parts.path}?search={normalize_query(search[0])}"
+    return parts.path
+
+
+def load_manifest(fixture_dir=FIXTURES_DIR):
+    """Return the manifest of `fixture_dir`, or an empty one if there is none yet."""
+    path = Path(fixture_dir) / MANIFEST
+    if path.exists():
+        return json.loads(path.read_text(encoding="utf-8"))
+    return {"base_url": EWG_BASE_URL, "pages": {}}
+
+
+def _file_name(key):
+    path, _, search = key.partition("?search=")
+    if search:
+        return f"search_{'_'.join(search.split())}.html"
+    return f"product_{path.rstrip('/').rsplit('/', 1)[-1]}.html"
+
+
+def record(queries, fixture_dir=FIXTURES_DIR, base_url=EWG_BASE_URL, fetch=fetch_html):
+    """
+    Save the search page of each query and its first product page to a fixture directory.
+
+    Args:
+        queries (list[str]): Product searches to record.
+        fixture_dir (str | Path, optional): Where pages and the manifest are written.
+        base_url (str, optional): Site to record from. Defaults to `EWG_BASE_URL`.
+        fetch (callable, optional): Returns the HTML of a URL. Defaults to `fetch_html`, i.e.
+            pages as served to plain HTTP; requests go through the shared `upstream` scheduler.
+
+    Returns:
+        list[str]: Manifest keys of the recorded pages.
+    """
+    fixture_dir = Path(fixture_dir)
+    fixture_dir.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(fixture_dir)
+    manifest["base_url"] = base_url
+    recorded = []
+
+    def save(url):
+        html = upstream.call(fetch, url)
+        key = page_key(url)
+        manifest["pages"][key] = _file_name(key)
+        (fixture_dir / manifest["pages"][key]).write_text(html, encoding="utf-8")
+        recorded.append(key)
+        print(f"💾 Recorded {url}")
+        return html
+
+    for query in queries:
+        search_url = f"{base_url}/skindeep/search/?search={quote(query)}"
+        listings = parse_search_results(save(search_url), search_url)
+        if listings:
+            save(listings[0]["product_url"])
+        else:
+            print(f"⚠️ No server-rendered product listing for {query}")
+
+    (fixture_dir / MANIFEST).write_text(
+        json.dumps(manifest, indent=4, sort_keys=True) + "\n", encoding="utf-8"
+    )
+    return recorded
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """Serve recorded pages by manifest key from `server.pages`."""
+
+    protocol_version = "HTTP/1.1"  # Keep connections alive like the real site
+    disable_nagle_algorithm = True  # Headers and body are separate writes
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        with self.server.lock:
+            self.server.requested.append(path)
+        # Recorded search pages are matched by query, hand-written ones by path alone
+        page = self.server.pages.get(page_key(self.path), self.server.pages.get(path))
+        if page is None:
+            self.send_response(404)
+            body = b"Not found"
+        elif isinstance(page, int):
+            self.send_response(page)
+            body = b"Error"
+        else:
+            self.send_response(200)
+            body = (self.server.fixture_dir / page).read_bytes()
+            # Links in recorded pages point at the live site
+            body = body.replace(self.server.recorded_base_url, self.server.base_url)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ReplayServer:
+    """
+    Local HTTP server standing in for www.ewg.org, serving the pages of a fixture directory.
+
+    Args:
+        fixture_dir (str | Path, optional): Directory with the recorded pages. Defaults to the
+            test fixtures.
+        pages (dict, optional): Manifest key -> file name, or an HTTP status code to answer
+            with. Defaults to the pages of the directory's manifest. May be changed while serving.
+        port (int, optional): Port to listen on; 0 picks a free one.
+
+    Attributes:
+        base_url (str): The server's URL, to use as `EWG_BASE_URL`.
+        requested (list[str]): URL paths requested so far, in order.
+        connections (int): TCP connections accepted so far.
+
+    Example:
+        >>> with ReplayServer() as server:
+        ...     fetch_html(server.base_url + "/skindeep/search/?search=cerave")
+    """
+
+    def __init__(self, fixture_dir=FIXTURES_DIR, pages=None, port=0):
+        manifest = load_manifest(fixture_dir)
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), ReplayHandler)
+        self._server.fixture_dir = Path(fixture_dir)
+        self._server.pages = dict(manifest["pages"]) if pages is None else pages
+        self._server.recorded_base_url = manifest["base_url"].encode()
+        self._server.base_url = self.base_url.encode()
+        self._server.requested = []
+        self._server.connections = 0
+        self._server.lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    @property
+    def pages(self):
+        return self._server.pages
+
+    @property
+    def requested(self):
+        return self._server.requested
+
+    @property
+    def connections(self):
+        return self._server.connections
+
+    def start(self):
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, args=(0.01,), daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serve requests on the calling thread until interrupted."""
+        self._server.serve_forever()
+
+    def stop(self):
+        """Stop serving and close the listening socket."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    record_parser = commands.add_parser("record", help="record searches from EWG")
+    record_parser.add_argument("queries", nargs="+")
+    record_parser.add_argument("--dir", default=FIXTURES_DIR)
+    serve_parser = commands.add_parser("serve", help="serve recorded pages")
+    serve_parser.add_argument("--dir", default=FIXTURES_DIR)
+    serve_parser.add_argument("--port", type=int, default=8800)
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.queries, args.dir)
+        return
+
+    server = ReplayServer(args.dir, port=args.port)
+    print(f"🎞️ Replaying {len(server.pages)} page(s) at {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
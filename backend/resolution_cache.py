@@ -0,0 +1,128 @@
+import atexit
+import time
+
+from backend.config.settings import (
+    CACHE_FLUSH_INTERVAL,
+    RESOLUTION_CACHE_FILE,
+    RESOLUTION_CACHE_MAX_ENTRIES,
+    RESOLUTION_CACHE_TTL_DAYS,
+)
+from backend.normalize import normalize_query
+from backend.persistent_cache import PersistentLRUCache
+
+# How a query was resolved: searched for directly, or named in another query's listing
+SEARCH = "search"
+LISTING = "listing"
+
+
+class ResolutionCache(PersistentLRUCache):
+    """
+    Query -> product URL cache that lets scrapes skip the EWG search page.
+
+    Kept apart from the product cache with its own, longer TTL: a product's URL outlives its
+    ingredient data, so a refresh of an expired product can go straight to its page. Besides
+    the query that was searched, every product named in a search listing is remembered under
+    its normalized name, so later queries for those products resolve without searching.
+    Listing entries never replace a fresh entry for a query that was searched directly.
+    Entries expire, are evicted and are persisted as in `PersistentLRUCache`.
+
+    Args:
+        path (str | None, optional): JSON file to persist to, or `None` to keep entries in
+            memory only. Defaults to `RESOLUTION_CACHE_FILE`.
+        ttl_days (float, optional): Age after which a resolution is ignored. Defaults to
+            `RESOLUTION_CACHE_TTL_DAYS`.
+        max_entries (int, optional): Entry limit. Defaults to `RESOLUTION_CACHE_MAX_ENTRIES`.
+        flush_interval (float, optional): Seconds to wait before writing changes.
+
+    Example:
+        >>> resolutions = ResolutionCache()
+        >>> resolutions.put("CeraVe cream", "https://www.ewg.org/skindeep/products/123456-CeraVe_Moisturizing_Cream/")
+        >>> resolutions.get("cerave  CREAM")
+        'https://www.ewg.org/skindeep/products/123456-CeraVe_Moisturizing_Cream/'
+    """
+
+    def __init__(
+        self,
+        path=RESOLUTION_CACHE_FILE,
+        ttl_days=RESOLUTION_CACHE_TTL_DAYS,
+        max_entries=RESOLUTION_CACHE_MAX_ENTRIES,
+        flush_interval=CACHE_FLUSH_INTERVAL,
+    ):
+        super().__init__(path, ttl_days, max_entries, flush_interval)
+
+    def get(self, query):
+        """Return the product URL `query` resolved to, or `None` if unknown or expired."""
+        with self._lock:
+            entry = self._lookup(normalize_query(query))
+            if entry is None:
+                return None
+            self._stats[f"{entry[2]}_hits"] += 1
+            return entry[0]
+
+    def put(self, query, product_url, source=SEARCH):
+        """Remember that `query` resolves to `product_url`."""
+        with self._lock:
+            self._set(normalize_query(query), [product_url, time.time(), source])
+        self._mark_dirty()
+
+    def put_listing(self, listings):
+        """
+        Remember every product of a search listing under its normalized product name.
+
+        Args:
+            listings (list[dict]): `product_url` and `product_name` of each listed product,
+                as returned by `parse_search_results`.
+
+        Returns:
+            int: Number of products added or refreshed.
+        """
+        added = 0
+        now = time.time()
+        with self._lock:
+            entries = self._load()
+            for listing in listings:
+                if not listing.get("product_name"):
+                    continue
+                key = normalize_query(listing["product_name"])
+                entry = entries.get(key)
+                searched = entry is not None and entry[2] == SEARCH
+                if searched and now - entry[1] <= self.ttl_seconds:
+                    continue
+                self._set(key, [listing["product_url"], now, LISTING])
+                added += 1
+        if added:
+            self._mark_dirty()
+        return added
+
+    def discard(self, query):
+        """
+        Forget the resolution of `query`, e.g. because its product page has moved.
+
+        Returns:
+            bool: `True` if an entry was removed.
+        """
+        return super().discard(normalize_query(query))
+
+    def stats(self):
+        """
+        Return resolution cache statistics.
+
+        Returns:
+            dict: Number of entries, hits on searched queries and on listing entries, misses
+                  (including expired entries), expired entries dropped on lookup, and entries
+                  evicted by the size limit.
+        """
+        with self._lock:
+            return {
+                "entries": len(self._load()),
+                "search_hits": self._stats["search_hits"],
+                "listing_hits": self._stats["listing_hits"],
+                "misses": self._stats["misses"],
+                "expired": self._stats["expired"],
+                "evictions": self._stats["evictions"],
+            }
+
+
+# Shared resolution cache used by the scraper
+resolution_cache = ResolutionCache()
+atexit.register(resolution_cache.flush)
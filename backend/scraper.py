@@ -1,12 +1,69 @@
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
+import threading
+from collections import Counter
+from urllib.parse import quote
+
+import requests
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
-from webdriver_manager.chrome import ChromeDriverManager
 
-from backend.cache import cache_product_data, get_cached_product
+from backend.cache import (
+    cache_product_data,
+    get_cached_product,
+    get_cached_product_by_url,
+    link_query,
+)
+from backend.config.settings import (
+    CACHE_MAX_AGE_DAYS,
+    CACHE_STALE_GRACE_DAYS,
+    EWG_BASE_URL,
+    HTTP_FAST_PATH,
+    SCRAPE_COALESCE_TIMEOUT,
+    UPSTREAM_STALE_MAX_DAYS,
+)
+from backend.driver_pool import driver_pool
+from backend.http_client import fetch_html
+from backend.negative_cache import NEGATIVE_CACHE_ERRORS, negative_cache
+from backend.normalize import normalize_query
+from backend.parser import parse_product_page, parse_search_results
+from backend.resolution_cache import resolution_cache
+from backend.singleflight import SingleFlight
+from backend.upstream import BlockedPage, UpstreamUnavailable, upstream
+
+# product_url -> thread refreshing that product in the background
+_refreshing = {}
+_refreshing_lock = threading.Lock()
+
+# Concurrent misses for the same normalized query share one scrape
+scrape_flight = SingleFlight(timeout=SCRAPE_COALESCE_TIMEOUT)
+
+# Which path served each scrape: "http", "selenium", plus HTTP fallbacks and errors
+_paths = Counter()
+_paths_lock = threading.Lock()
+
+
+def _count_path(path):
+    with _paths_lock:
+        _paths[path] += 1
+
+
+def get_scrape_stats():
+    """
+    Return how many scrapes were served by the HTTP fast path and by Selenium.
+
+    Returns:
+        dict: Scrapes served over plain HTTP and by a browser session, HTTP attempts that fell
+              back to Selenium because the page lacked the expected markup, and HTTP attempts
+              that failed with a network or status error (also falling back).
+    """
+    with _paths_lock:
+        return {
+            "http": _paths["http"],
+            "selenium": _paths["selenium"],
+            "http_fallbacks": _paths["http_fallbacks"],
+            "http_errors": _paths["http_errors"],
+        }
 
 
 def scrape_product_ingredients(product_name):
@@ -22,9 +79,18 @@ def scrape_product_ingredients(product_name):
 
     Description:
         - First checks if cached data exists for the product to avoid unnecessary web scraping.
-        - If no cache is available, performs a web search on the EWG website.
-        - Extracts the first product result, navigates to its details page, and scrapes ingredient information.
+        - If the cached data expired less than `CACHE_STALE_GRACE_DAYS` ago, returns it flagged with
+          `"stale": True` and refreshes it in the background (see `refresh_in_background`).
+        - If the query failed recently, returns the remembered error from the negative cache.
+        - If no cache is available, performs a web search on the EWG website (see `fetch_product_ingredients`).
+          Concurrent lookups of the same normalized query wait for a single scrape and share its result.
+        - Failures meaning the query has no usable product are remembered in the negative cache.
+        - If the first product result is already cached under another query, links this query to it and returns it.
+        - Otherwise navigates to the product's details page and parses its ingredient information
+          from the page source (see `parse_product_page`).
         - Stores the retrieved data in a local cache to optimize future requests.
+        - Every answer records the path that produced it in `"served_by"`: `"cache"` (product
+          cache or negative cache), `"http"`, `"browser"` or `"stale"` (EWG unavailable).
 
     Response Format:
     ```
@@ -59,160 +125,303 @@ def scrape_product_ingredients(product_name):
         - If no products are found, returns: `{ "error": "No products found" }`
         - If no ingredient data is available, returns: `{ "error": "No ingredient data found" }`
         - If an exception occurs, returns: `{ "error": "<error message>" }`
+        - If a concurrent scrape of the same query takes longer than `SCRAPE_COALESCE_TIMEOUT`, returns:
+          `{ "error": "Timed out waiting for the product lookup" }`
+        - If EWG is unavailable (see `UpstreamScheduler`), returns the cached product if one up to
+          `UPSTREAM_STALE_MAX_DAYS` old exists, flagged `"stale": True`, or:
+          `{ "error": "EWG is temporarily unavailable" }`
+    """
+
+    known = lookup_known_product(product_name)
+    if known:
+        return known
+
+    try:
+        result = scrape_flight.do(
+            normalize_query(product_name), _fetch_and_remember, product_name
+        )
+    except TimeoutError:
+        return {"error": "Timed out waiting for the product lookup"}
+    except UpstreamUnavailable as e:
+        return _serve_stale(product_name, e)
+    return dict(result)  # Coalesced callers share the result; don't let them mutate it
+
+
+def lookup_known_product(product_name):
+    """
+    Answer a product lookup from the product cache or the negative cache, without scraping.
+
+    Args:
+        product_name (str): The searching keyword.
+
+    Returns:
+        JSON | None: The cached product (flagged `"stale": True` and refreshed in the background if
+                     it expired within the grace window), the remembered error of a recently failed
+                     lookup, or `None` if the product has to be scraped.
     """
 
     # First check if cached
-    cached = get_cached_product(product_name)
+    cached = get_cached_product(
+        product_name, CACHE_MAX_AGE_DAYS, stale_grace_days=CACHE_STALE_GRACE_DAYS
+    )
     if cached:
         print(f"✅ Using cached data for {product_name}")
-        return cached
+        if cached.get("stale"):
+            refresh_in_background(product_name, cached["product_url"])
+        return _served_by(cached, "cache")
+
+    # Then check if this query failed recently
+    failure = negative_cache.get(product_name)
+    if failure:
+        print(f"🚫 Using cached failure for {product_name}")
+        return _served_by(failure, "cache")
+    return None
+
+
+def _serve_stale(product_name, error):
+    # EWG is failing or throttling us; an old answer beats none
+    cached = get_cached_product(
+        product_name, CACHE_MAX_AGE_DAYS, stale_grace_days=UPSTREAM_STALE_MAX_DAYS
+    )
+    if cached:
+        print(f"⏳ {error}, using old cached data for {product_name}")
+        return _served_by(dict(cached, stale=True), "stale")
+    print(f"❌ {error}, no cached data for {product_name}")
+    return _served_by({"error": "EWG is temporarily unavailable"}, "stale")
+
+
+def _fetch_and_remember(product_name):
+    result = fetch_product_ingredients(product_name)
+    if result.get("error") in NEGATIVE_CACHE_ERRORS:
+        # Remembered failures are answered from the cache from now on
+        negative_cache.put(
+            product_name, {k: v for k, v in result.items() if k != "served_by"}
+        )
+    return result
 
-    # Construct the search results page URL
-    search_url = f"https://www.ewg.org/skindeep/search/?search={product_name.replace(' ', '%20')}"
 
-    # Set up Selenium WebDriver
-    options = webdriver.ChromeOptions()
-    options.add_argument("--headless")  # Run without opening a browser
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
+def refresh_in_background(product_name, product_url):
+    """
+    Re-scrape a stale product on a background thread and replace its cache entry.
 
-    driver = webdriver.Chrome(
-        service=Service(ChromeDriverManager().install()), options=options
-    )
+    Args:
+        product_name (str): The searching keyword that returned the stale entry.
+        product_url (str): The stale product's URL; at most one refresh runs per product.
 
-    # Load the search results page
-    driver.get(search_url)
+    Returns:
+        bool: `True` if a refresh was started, `False` if one is already running for the product.
+    """
 
-    # Get the first product link from the search results
-    try:
-        # switching to WebDriverWait, wait until the exact element is present
-        product_element = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located(
-                (By.CSS_SELECTOR, "section.product-listings a")
-            )
-        )
-        product_url = product_element.get_attribute("href")
-        print(f"✅ Found product: {product_url}")
-    except:
-        driver.quit()
-        return {"error": "No products found"}
+    def refresh():
+        try:
+            # The product's URL is known, so the refresh skips the search page
+            fetch_product_ingredients(product_name, product_url)
+        except Exception as e:
+            print(f"❌ Background refresh failed for {product_name}: {e}")
+        finally:
+            with _refreshing_lock:
+                _refreshing.pop(product_url, None)
+
+    with _refreshing_lock:
+        if product_url in _refreshing:
+            return False
+        thread = threading.Thread(target=refresh, daemon=True)
+        _refreshing[product_url] = thread
+    print(f"🔄 Refreshing stale data for {product_url}")
+    thread.start()
+    return True
+
+
+def fetch_product_ingredients(product_name, product_url=None):
+    """
+    Scrape a product's ingredient details from EWG Skin Deep, bypassing the product cache lookup.
 
-    # Load the product page
-    driver.get(product_url)
+    Args:
+        product_name (str): The searching keyword.
+        product_url (str, optional): The product's page, if already known.
+
+    Returns:
+        JSON: Same format and errors as `scrape_product_ingredients`, with `"served_by"` set to
+              `"http"` or `"browser"`. Successful results are cached.
+
+    Description:
+        - Skips the search page when the product URL is given or `resolution_cache` knows the query.
+          If that page no longer yields ingredients, the resolution is dropped and the query searched.
+        - First fetches the pages over plain HTTP (see `fetch_over_http`).
+        - Falls back to a warm browser session from `driver_pool` when the server-rendered pages
+          lack the product listing or ingredient table, or the HTTP request fails.
+        - Search results are remembered in `resolution_cache`, including every listed product.
+        - Every page load goes through the shared `upstream` scheduler, which rate limits and retries
+          requests and raises `UpstreamUnavailable` while EWG is unhealthy.
+    """
+    product_url = product_url or resolution_cache.get(product_name)
+    if product_url:
+        print(f"🔗 Skipping search for {product_name}: {product_url}")
+        result = _fetch(product_name, product_url)
+        if "error" not in result:
+            return result
+        print(f"⚠️ {product_url} failed for {product_name}, searching again")
+        resolution_cache.discard(product_name)
+    return _fetch(product_name)
+
+
+def _fetch(product_name, product_url=None):
+    result = fetch_over_http(product_name, product_url) if HTTP_FAST_PATH else None
+    if result is not None:
+        _count_path("http")
+        return _served_by(result, "http")
+
+    with driver_pool.session() as driver:
+        result = _scrape_with_driver(driver, product_name, product_url)
+    _count_path("selenium")
+    return _served_by(result, "browser")
+
+
+def _served_by(result, path):
+    # Tag a copy, so the product cache and negative cache never store the path
+    print(f"📦 {result.get('product_url') or result.get('error')} served by {path}")
+    return dict(result, served_by=path)
+
+
+def fetch_over_http(product_name, product_url=None):
+    """
+    Try to scrape a product from the server-rendered EWG pages without starting a browser.
+
+    Args:
+        product_name (str): The searching keyword.
+        product_url (str, optional): The product's page; skips the search page if given.
 
+    Returns:
+        JSON | None: Same format and errors as `scrape_product_ingredients`, or `None` if the
+                     caller should fall back to Selenium.
+    """
     try:
-        # Wait until ingredient table is present
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located(
-                (By.CSS_SELECTOR, "td.td-ingredient .td-ingredient-interior")
+        if product_url is None:
+            search_url = _search_url(product_name)
+            listings = parse_search_results(
+                upstream.call(fetch_html, search_url), search_url
             )
-        )
-    except:
-        driver.quit()
-        return {"error": "Ingredient table did not load"}
+            if listings is None:
+                print(f"↪️ No server-rendered listing for {product_name}, using browser")
+                _count_path("http_fallbacks")
+                return None
+            if not listings:
+                return {"error": "No products found"}
 
-    # product name
-    try:
-        product_name_element = driver.find_element(
-            By.CSS_SELECTOR, "h2.product-name.text-block"
-        )
-        actual_product_name = product_name_element.text.strip()
-    except:
-        actual_product_name = "Unknown Product"
-
-    # Extract ingredient names
-    ingredient_elements = driver.find_elements(
-        By.CSS_SELECTOR,
-        "tr.ingredient-overview-tr td.td-ingredient .td-ingredient-interior",
-    )
-    ingredients = [elem.text.strip() for elem in ingredient_elements]
+            product_url = listings[0]["product_url"]
+            print(f"✅ Found product: {product_url}")
+            _remember_search(product_name, product_url, listings)
 
-    # Extract hazard scores
-    score_elements = driver.find_elements(
-        By.CSS_SELECTOR, "tr.ingredient-overview-tr td.td-score img.ingredient-score"
-    )
-    scores = [
-        elem.get_attribute("alt").replace("Ingredient score: ", "").strip()
-        for elem in score_elements
-    ]
-
-    # Extract concerns from 'ingredient-more-info-wrapper' sections
-    concern_data = []
-    concern_rows = driver.find_elements(
-        By.CSS_SELECTOR,
-        "tr.ingredient-more-info-wrapper div.ingredient-more-info table tbody",
-    )
+        cached = _link_cached_product(product_name, product_url)
+        if cached:
+            return cached
 
-    print(f"🧐 Found {len(concern_rows)} concern sections")  # Debugging output
+        page = parse_product_page(upstream.call(fetch_html, product_url))
+    except requests.RequestException as e:
+        print(f"❌ HTTP fetch failed for {product_name}: {e}")
+        _count_path("http_errors")
+        return None
 
-    for tbody in concern_rows:
-        try:
-            print(
-                f"🔍 Inspecting tbody: {tbody.get_attribute('outerHTML')}"
-            )  # Print full HTML of tbody
-
-            # Locate all <tr> inside the tbody
-            rows = tbody.find_elements(By.TAG_NAME, "tr")
-
-            concerns_list = []
-            for tr in rows:
-                td_elements = tr.find_elements(By.TAG_NAME, "td")
-
-                # Debugging: Print text in each <td>
-                td_texts = [td.get_attribute("outerHTML") for td in td_elements]
-                print(f"🔹 Found TDs:\n{td_texts}")
-
-                # Look for the row where the first <td> is "CONCERNS"
-                if len(td_texts) > 1 and "CONCERNS" in td_texts[0]:
-                    # Extract concerns from the second <td>
-                    concerns_html = td_elements[1].get_attribute("innerHTML").strip()
-                    soup = BeautifulSoup(concerns_html, "html.parser")
-                    concerns_cleaned = soup.get_text(
-                        separator="\n"
-                    )  # Extract clean text
-
-                    # Format concerns properly into an array
-                    concerns_list = [
-                        c.strip().replace("•", "")
-                        for c in concerns_cleaned.split("\n")
-                        if c
-                    ]
-                    print(f"✅ Extracted concerns: {concerns_list}")  # Debugging output
-                    break  # Stop after finding the concerns section
-
-            concern_data.append(concerns_list)
+    if not page["ingredients"]:
+        print(f"↪️ No server-rendered ingredient table for {product_url}, using browser")
+        _count_path("http_fallbacks")
+        return None
+    return _store_product(product_name, product_url, page)
 
-        except Exception as e:
-            print(f"❌ Error extracting concerns: {e}")
-            concern_data.append([])
 
-    driver.quit()
+def _remember_search(product_name, product_url, listings):
+    resolution_cache.put(product_name, product_url)
+    resolution_cache.put_listing(listings or [])
 
-    if not ingredients:
-        return {"error": "No ingredient data found"}
 
-    # Match ingredients with scores
-    ingredient_data = []
-    for i in range(len(ingredients)):
-        score = scores[i] if i < len(scores) else "N/A"
-        concerns = concern_data[i] if i < len(concern_data) else []
-        ingredient_data.append(
-            {"name": ingredients[i], "score": score, "concerns": concerns}
-        )
+def _search_url(product_name):
+    return f"{EWG_BASE_URL}/skindeep/search/?search={quote(product_name)}"
 
-    print("Scraped ingredient data:", ingredient_data)
 
+def _link_cached_product(product_name, product_url):
+    # Another query may already have resolved to the same product
+    cached = get_cached_product_by_url(product_url, CACHE_MAX_AGE_DAYS)
+    if cached:
+        print(f"✅ Using cached data for {product_url}")
+        link_query(product_name, product_url)
+    return cached
+
+
+def _store_product(product_name, product_url, page):
     result = {
         "product_url": product_url,
-        "product_name": actual_product_name,
-        "ingredients": ingredient_data,
+        "product_name": page["product_name"] or "Unknown Product",
+        "ingredients": page["ingredients"],
     }
+    print("Scraped ingredient data:", result["ingredients"])
 
     # cache before return
     cache_product_data(product_name, result)
     return result
 
 
+def _scrape_with_driver(driver, product_name, product_url=None):
+    # Page loads and block pages are retried by `upstream`; a real page lacking the element we
+    # wait for is answered right away, as it would not render it on a retry either
+    if product_url is None:
+        # Get the first product link from the search results
+        product_url = upstream.call(_open_search, driver, _search_url(product_name))
+        if product_url is None:
+            return {"error": "No products found"}
+        print(f"✅ Found product: {product_url}")
+
+        listings = parse_search_results(driver.page_source, driver.current_url)
+        _remember_search(product_name, product_url, listings)
+
+    cached = _link_cached_product(product_name, product_url)
+    if cached:
+        return cached
+
+    if not upstream.call(_open_product, driver, product_url):
+        return {"error": "Ingredient table did not load"}
+
+    # Grab the rendered page once and parse it locally
+    page = parse_product_page(driver.page_source)
+    if not page["ingredients"]:
+        return {"error": "No ingredient data found"}
+
+    return _store_product(product_name, product_url, page)
+
+
+def _open_search(driver, search_url):
+    # Load the search results page and return the first product's URL, or None if there is none
+    driver.get(search_url)
+    try:
+        # switching to WebDriverWait, wait until the exact element is present
+        product_element = WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located(
+                (By.CSS_SELECTOR, "section.product-listings a")
+            )
+        )
+    except TimeoutException:
+        if parse_search_results(driver.page_source, driver.current_url) is None:
+            raise BlockedPage(f"{search_url} is not a search results page")
+        return None
+    return product_element.get_attribute("href")
+
+
+def _open_product(driver, product_url):
+    # Load the product page and tell whether its ingredient table showed up
+    driver.get(product_url)
+    try:
+        # Wait until ingredient table is present
+        WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located(
+                (By.CSS_SELECTOR, "td.td-ingredient .td-ingredient-interior")
+            )
+        )
+    except TimeoutException:
+        if parse_product_page(driver.page_source)["product_name"] is None:
+            raise BlockedPage(f"{product_url} is not a product page")
+        return False
+    return True
+
+
 # 🔥 Test the scraper
 if __name__ == "__main__":
     print(scrape_product_ingredients("CeraVe Moisturizing Cream"))
@@ -1,31 +1,91 @@
-import hashlib
 import json
+import os
+import queue
 
 from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS
 
-from backend.model import get_ingredient_summary_chain, get_llm
+from backend.cache import get_cache_stats, get_compaction_stats, get_eviction_stats
+from backend.callback import llm_metrics
+from backend.config.settings import (
+    BATCH_MAX_PRODUCTS,
+    DRIVER_POOL_WARM,
+    INGREDIENT_PROMPT_FORMAT,
+    RECOMMENDATION_CACHE,
+)
+from backend.driver_pool import driver_pool, resolve_driver_path
+from backend.ingredient_benefits import ingredient_benefits
+from backend.ingredient_encoding import encode_ingredients
+from backend.jobs import JobQueue, JobQueueFull
+from backend.model import get_llm
+from backend.negative_cache import clear_negative_entry, negative_cache
+from backend.normalize import normalize_query
+from backend.persistent_cache import fingerprint
 from backend.prompt import prompt_template_followup, prompt_template_recommendation
-from backend.scraper import scrape_product_ingredients
+from backend.recommendation_cache import (
+    recommendation_cache,
+    recommendation_fingerprint,
+)
+from backend.resolution_cache import resolution_cache
+from backend.scraper import (
+    get_scrape_stats,
+    lookup_known_product,
+    scrape_flight,
+    scrape_product_ingredients,
+)
+from backend.summary_cache import summary_cache
+from backend.upstream import upstream
 from backend.utils import generate_session_id, get_or_create_conversation
 
+# Frontends allowed to call the API, and the response headers they may read
+CORS_ORIGINS = ["http://localhost:3000"]
+CORS_EXPOSE_HEADERS = ["X-Session-Id", "Location"]
+
 app = Flask(__name__)
 CORS(
     app,
-    expose_headers=["X-Session-Id"],
+    expose_headers=CORS_EXPOSE_HEADERS,
     supports_credentials=True,
     resources={
         r"/*": {
-            "origins": ["http://localhost:3000"],
+            "origins": CORS_ORIGINS,
             "allow_headers": ["Content-Type"],
-            "methods": ["POST", "OPTIONS", "GET"],
+            "methods": ["POST", "OPTIONS", "GET", "DELETE"],
         }
     },
 )
 # Store of active conversations: {session_id -> conversation chain}
 conversation_store = {}
-# In-memory cache for AI-generated summaries
-ingredient_summary_cache = {}
+
+# Background scrapes for /get_ingredients cache misses
+scrape_jobs = JobQueue()
+# Seconds between keep-alive comments on a job's event stream
+JOB_EVENTS_KEEPALIVE = 15
+
+
+def format_lookup_result(product_name, result):
+    """
+    Fill in the response fields of a product lookup result.
+
+    Args:
+        product_name (str): The query, used as the product name if the lookup found none.
+        result (dict): The result of `scrape_product_ingredients` or `lookup_known_product`.
+
+    Returns:
+        dict: `result`, with `product_name` defaulted and `stale` set when ingredients are present.
+    """
+    if "product_name" not in result or not result["product_name"]:
+        result["product_name"] = (
+            product_name  # Default to query if actual name not found
+        )
+    if "ingredients" in result:
+        result["stale"] = result.get("stale", False)
+    return result
+
+
+def scrape_job(product_name):
+    """Scrape a product on a job worker and format the result like `/get_ingredients`."""
+    return format_lookup_result(product_name, scrape_product_ingredients(product_name))
 
 
 @app.route("/get_ingredients", methods=["GET"])
@@ -37,14 +97,22 @@ def get_ingredients():
             product (str): The name of the skincare product to look up.
 
     Returns:
-            JSON: A JSON response containing the product's name, URL, and a list of ingredients with their safety scores.
+            JSON: A JSON response containing the product's name, URL, a list of ingredients with their safety scores,
+                and whether the data is stale.
+                If the product has to be scraped, returns `202` with a scrape job to poll instead.
                 If the product name is missing, returns a 400 error.
+                If too many scrapes are already waiting, returns a 503 error.
                 If the product is not found, returns an empty result.
 
     Description:
-            Calls the `scrape_product_ingredients` function to retrieve product details from the EWG Skin Deep database.
+            Cached products and recently failed lookups are answered immediately (see `lookup_known_product`).
+            Otherwise a `scrape_product_ingredients` job is queued on a background worker, and the response
+            holds its ID together with the URLs of its status endpoint (`GET /jobs/<job_id>`) and event stream
+            (`GET /jobs/<job_id>/events`). Concurrent requests for the same product share one job.
             If no product name is provided, returns a JSON error response.
             If scraping fails or no product is found, the response contains a default product name.
+            `stale` is `true` when expired cached data was served while it is refreshed in the background.
+            `served_by` names the path that answered the lookup: `cache`, `http`, `browser` or `stale`.
 
     Response Format:
         ```
@@ -54,7 +122,9 @@ def get_ingredients():
             "ingredients": [
                 { "name": "Water", "score": "1" },
                 { "name": "Fragrance", "score": "8" }
-            ]
+            ],
+            "stale": false,
+            "served_by": "cache"
         }
         ```
     Example Request:
@@ -68,7 +138,19 @@ def get_ingredients():
             "ingredients": [
                 { "name": "Water", "score": "1" },
                 { "name": "Fragrance", "score": "8" }
-            ]
+            ],
+            "stale": false,
+            "served_by": "cache"
+        }
+        ```
+
+    Example Response (`202 Accepted`, not cached yet):
+        ```json
+        {
+            "job_id": "9f1c2a7e4b6d4e0f8a3b5c7d9e1f2a3b",
+            "status": "queued",
+            "status_url": "/jobs/9f1c2a7e4b6d4e0f8a3b5c7d9e1f2a3b",
+            "events_url": "/jobs/9f1c2a7e4b6d4e0f8a3b5c7d9e1f2a3b/events"
         }
         ```
     """
@@ -77,14 +159,461 @@ def get_ingredients():
     if not product_name:
         return jsonify({"error": "Missing product name"}), 400
 
-    result = scrape_product_ingredients(product_name)
+    result = lookup_known_product(product_name)
+    if result is not None:
+        return jsonify(format_lookup_result(product_name, result))
 
-    if "product_name" not in result or not result["product_name"]:
-        result["product_name"] = (
-            product_name  # Default to query if actual name not found
+    try:
+        job = scrape_jobs.submit(
+            normalize_query(product_name), scrape_job, product_name
+        )
+    except JobQueueFull:
+        return (
+            jsonify(
+                {"error": "Too many product lookups in progress, try again shortly"}
+            ),
+            503,
+            {"Retry-After": "5"},
+        )
+
+    status_url = f"/jobs/{job.id}"
+    response = dict(
+        job.to_dict(), status_url=status_url, events_url=f"{status_url}/events"
+    )
+    return jsonify(response), 202, {"Location": status_url}
+
+
+@app.route("/get_ingredients/batch", methods=["POST"])
+def get_ingredients_batch():
+    """
+    Retrieve ingredient information for several skincare products, streamed as each one completes.
+
+    Request Body:
+        ```json
+        { "products": ["CeraVe Moisturizing Cream", "Cetaphil Gentle Skin Cleanser"] }
+        ```
+
+    Returns:
+            Response: One line per product as newline-delimited JSON (`application/x-ndjson`), or as
+                Server-Sent Events if the request accepts `text/event-stream`. Each line holds the
+                product query, the lookup `status` (see `GET /jobs/<job_id>`, plus "rejected" if the
+                job queue was full), whether it was served from the cache, and the `/get_ingredients`
+                response as `result` (or an `error` message).
+                If the product list is missing or longer than `BATCH_MAX_PRODUCTS`, returns a 400 error.
+
+    Description:
+            Cached products and recently failed lookups are sent first. Misses are queued as scrape jobs,
+            so they run at most `SCRAPE_WORKERS` at a time and share jobs with concurrent `/get_ingredients`
+            requests; each product is sent as soon as its scrape finishes.
+
+    Example Response:
+        ```
+        {"product": "CeraVe Moisturizing Cream", "status": "done", "cached": true, "result": {...}}
+        {"product": "Unknown", "status": "done", "cached": false, "result": {"error": "No products found", "product_name": "Unknown"}}
+        {"product": "Cetaphil Gentle Skin Cleanser", "status": "timed_out", "cached": false, "error": "Job timed out after 120s"}
+        ```
+    """
+    data = request.json or {}
+    products = data.get("products")
+
+    if not isinstance(products, list) or not products:
+        return jsonify({"error": "Missing product list"}), 400
+    if not all(isinstance(product, str) and product for product in products):
+        return jsonify({"error": "Product names must be non-empty strings"}), 400
+    if len(products) > BATCH_MAX_PRODUCTS:
+        return (
+            jsonify({"error": f"At most {BATCH_MAX_PRODUCTS} products per batch"}),
+            400,
+        )
+
+    sse = (
+        request.accept_mimetypes.best_match(
+            ["application/x-ndjson", "text/event-stream"]
         )
+        == "text/event-stream"
+    )
+
+    def encode(item):
+        line = json.dumps(item)
+        return f"data: {line}\n\n" if sse else f"{line}\n"
+
+    def items():
+        finished = queue.Queue()
+        pending = 0
+        for product_name in products:
+            result = lookup_known_product(product_name)
+            if result is not None:
+                yield encode(
+                    {
+                        "product": product_name,
+                        "status": "done",
+                        "cached": True,
+                        "result": format_lookup_result(product_name, result),
+                    }
+                )
+                continue
+            try:
+                job = scrape_jobs.submit(
+                    normalize_query(product_name), scrape_job, product_name
+                )
+            except JobQueueFull as e:
+                yield encode(
+                    {
+                        "product": product_name,
+                        "status": "rejected",
+                        "cached": False,
+                        "error": str(e),
+                    }
+                )
+                continue
+            pending += 1
+            job.add_done_callback(
+                lambda job, name=product_name: finished.put((name, job))
+            )
+
+        # Every job reaches a final state within the job timeout, so this always ends
+        for _ in range(pending):
+            product_name, job = finished.get()
+            state = job.to_dict()
+            item = {"product": product_name, "status": state["status"], "cached": False}
+            if "result" in state:
+                item["result"] = dict(state["result"])
+            if "error" in state:
+                item["error"] = state["error"]
+            yield encode(item)
+
+    return Response(
+        stream_with_context(items()),
+        mimetype="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    """
+    Get the status of a scrape job, and its result once finished.
+
+    Path Parameters:
+            job_id (str): The ID returned by `/get_ingredients`.
+
+    Returns:
+            JSON: The job's ID and status, one of "queued", "running", "done", "failed", "cancelled"
+                or "timed_out". Finished jobs include the `/get_ingredients` response as `result`;
+                failed and timed out jobs include an `error` message.
+                If the job is unknown or expired, returns a 404 error.
+
+    Example Response:
+        ```json
+        {
+            "job_id": "9f1c2a7e4b6d4e0f8a3b5c7d9e1f2a3b",
+            "status": "done",
+            "result": {
+                "product_name": "CeraVe Moisturizing Cream",
+                "product_url": "https://www.ewg.org/skindeep/products/123456-CeraVe_Moisturizing_Cream/",
+                "ingredients": [{ "name": "Water", "score": "1", "concerns": [] }],
+                "stale": false
+            }
+        }
+        ```
+    """
+    job = scrape_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route("/jobs/<job_id>/events", methods=["GET"])
+def stream_job(job_id):
+    """
+    Stream a scrape job's status as Server-Sent Events until it finishes.
+
+    Path Parameters:
+            job_id (str): The ID returned by `/get_ingredients`.
+
+    Returns:
+            Response: An event stream sending the job's current state (as in `GET /jobs/<job_id>`) right away
+                and again once it finishes, with keep-alive comments in between.
+                If the job is unknown or expired, returns a 404 error.
+
+    Example Stream:
+        ```
+        data: {"job_id": "9f1c...", "status": "running"}
+
+        : keep-alive
+
+        data: {"job_id": "9f1c...", "status": "done", "result": {...}}
+        ```
+    """
+    job = scrape_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+
+    def events():
+        yield f"data: {json.dumps(job.to_dict())}\n\n"
+        while not job.wait(JOB_EVENTS_KEEPALIVE):
+            yield ": keep-alive\n\n"
+        yield f"data: {json.dumps(job.to_dict())}\n\n"
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+@app.route("/jobs/<job_id>", methods=["DELETE"])
+def cancel_job(job_id):
+    """
+    Cancel a queued or running scrape job.
+
+    A running scrape is not interrupted, but its result is discarded (it is still cached).
+
+    Path Parameters:
+            job_id (str): The ID returned by `/get_ingredients`.
+
+    Returns:
+            JSON: `{"cancelled": true}` if the job was unfinished, `{"cancelled": false}` if it had already finished.
+                If the job is unknown or expired, returns a 404 error.
+    """
+    if scrape_jobs.get(job_id) is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify({"cancelled": scrape_jobs.cancel(job_id)})
+
+
+@app.route("/negative_cache", methods=["DELETE"])
+def clear_negative_cache():
+    """
+    Clear the cached failure for a product query, so the next lookup scrapes EWG again.
+
+    Query Parameters:
+            product (str): The product query whose negative cache entry should be removed.
+
+    Returns:
+            JSON: `{"cleared": true}` if an entry was removed, `{"cleared": false}` if there was none.
+                If the product name is missing, returns a 400 error.
+
+    Example Request:
+            DELETE /negative_cache?product=Cerave%20Moisturising%20Creme
+    """
+    product_name = request.args.get("product")
+
+    if not product_name:
+        return jsonify({"error": "Missing product name"}), 400
+
+    return jsonify({"cleared": clear_negative_entry(product_name)})
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """
+    Report in-process cache statistics.
+
+    Returns:
+        JSON: A JSON object containing:
+            - `product_cache` (dict): Lookup counts with exact and alias hit rates (see `get_cache_stats`).
+            - `compaction` (dict): Journal compaction statistics, or `null` if the cache
+              is not journal-backed (see `get_compaction_stats`).
+            - `eviction` (dict): Product cache size and eviction counters (see `get_eviction_stats`).
+            - `negative_cache` (dict): Failed lookup cache statistics (see `NegativeCache.stats`).
+            - `resolution_cache` (dict): Query to product URL resolutions (see `ResolutionCache.stats`).
+            - `summary_cache` (dict): Cached ingredient benefit summaries (see `PersistentLRUCache.stats`).
+            - `recommendation_cache` (dict): Cached `/recommend` answers (see `PersistentLRUCache.stats`).
+            - `ingredient_benefits` (dict): Per-ingredient benefit lookups and the LLM calls made for
+              unknown ingredients (see `IngredientBenefitStore.stats`).
+            - `driver_pool` (dict): Browser session pool statistics (see `DriverPool.stats`).
+            - `scrape_paths` (dict): Scrapes served over plain HTTP and by Selenium (see `get_scrape_stats`).
+            - `upstream` (dict): Circuit breaker state and rate limit budget for requests to EWG
+              (see `UpstreamScheduler.stats`).
+            - `coalescing` (dict): Lookups that shared an in-flight scrape (see `SingleFlight.stats`).
+            - `jobs` (dict): Background scrape job queue statistics (see `JobQueue.stats`).
+            - `llm` (dict): LLM generation latency and token metrics per endpoint and model
+              (see `/metrics/llm`).
+
+    Example Response:
+        ```json
+        {
+            "product_cache": {
+                "lookups": 200,
+                "exact_hits": 120,
+                "alias_hits": 40,
+                "stale_hits": 10,
+                "misses": 30,
+                "exact_hit_rate": 0.6,
+                "alias_hit_rate": 0.2,
+                "stale_hit_rate": 0.05
+            },
+            "compaction": {
+                "live_records": 1250,
+                "live_aliases": 1830,
+                "dead_records": 310,
+                "journal_bytes": 2483120,
+                "compactions": 4,
+                "bytes_reclaimed": 1917344
+            },
+            "eviction": {
+                "entries": 1250,
+                "bytes": 5370078,
+                "probation_entries": 300,
+                "protected_entries": 950,
+                "evictions": 0,
+                "evicted_bytes": 0,
+                "promotions": 1004,
+                "demotions": 54,
+                "expired_purged": 97
+            },
+            "negative_cache": {
+                "entries": 12,
+                "hits": 40,
+                "bloom_rejects": 150,
+                "bloom_false_positives": 1,
+                "expired": 3,
+                "evictions": 0
+            },
+            "resolution_cache": {
+                "entries": 4210,
+                "search_hits": 25,
+                "listing_hits": 14,
+                "misses": 88,
+                "expired": 2,
+                "evictions": 0
+            },
+            "summary_cache": {
+                "entries": 830,
+                "hits": 412,
+                "misses": 97,
+                "expired": 5,
+                "evictions": 0
+            },
+            "recommendation_cache": {
+                "entries": 560,
+                "hits": 203,
+                "misses": 388,
+                "expired": 12,
+                "evictions": 0
+            },
+            "ingredient_benefits": {
+                "entries": 2140,
+                "hits": 9311,
+                "misses": 2160,
+                "expired": 0,
+                "evictions": 0,
+                "llm_calls": 131,
+                "generated": 2140,
+                "lexicon_entries": 84,
+                "lexicon_summaries": 5120
+            },
+            "driver_pool": {
+                "size": 2,
+                "live": 2,
+                "idle": 1,
+                "started": 3,
+                "reused": 61,
+                "recycled": 1
+            },
+            "scrape_paths": {
+                "http": 118,
+                "selenium": 9,
+                "http_fallbacks": 7,
+                "http_errors": 2
+            },
+            "upstream": {
+                "breaker": "closed",
+                "breaker_opened": 1,
+                "tokens": 3.5,
+                "in_flight": 2,
+                "calls": 254,
+                "retries": 6,
+                "failures": 2,
+                "rejected": 14,
+                "throttled": 0
+            },
+            "coalescing": {
+                "calls": 127,
+                "coalesced": 31,
+                "timeouts": 0,
+                "errors": 1,
+                "in_flight": 2
+            },
+            "jobs": {
+                "queued": 3,
+                "running": 4,
+                "submitted": 160,
+                "deduplicated": 22,
+                "rejected": 0,
+                "completed": 150,
+                "failed": 1,
+                "cancelled": 2,
+                "timed_out": 0
+            },
+            "llm": {
+                "recommend": {
+                    "llama3.2": {
+                        "generations": 42,
+                        "errors": 1,
+                        "ttft_seconds": {"count": 42, "mean": 0.61, "p50": 0.52, "p90": 1.1, ...},
+                        ...
+                    }
+                }
+            }
+        }
+        ```
+    """
+    return jsonify(
+        {
+            "product_cache": get_cache_stats(),
+            "compaction": get_compaction_stats(),
+            "eviction": get_eviction_stats(),
+            "negative_cache": negative_cache.stats(),
+            "resolution_cache": resolution_cache.stats(),
+            "summary_cache": summary_cache.stats(),
+            "recommendation_cache": recommendation_cache.stats(),
+            "ingredient_benefits": ingredient_benefits.stats(),
+            "driver_pool": driver_pool.stats(),
+            "scrape_paths": get_scrape_stats(),
+            "upstream": upstream.stats(),
+            "coalescing": scrape_flight.stats(),
+            "jobs": scrape_jobs.stats(),
+            "llm": llm_metrics.query(),
+        }
+    )
+
+
+@app.route("/metrics/llm", methods=["GET"])
+def llm_generation_metrics():
+    """
+    Report LLM generation latency and token metrics, optionally for one endpoint or model.
 
-    return jsonify(result)
+    Args:
+        None: Accepts optional query parameters:
+            - `endpoint` (str): Only report generations for this endpoint, e.g. `recommend`.
+            - `model` (str): Only report generations of this model.
+
+    Returns:
+        JSON: endpoint -> model -> counts of generations and errors, and a summary (count, mean,
+              min, p50, p90, p99, max) of each metric: `ttft_seconds` (time to first token),
+              `inter_token_seconds`, `tokens_per_second`, `prompt_tokens`, `completion_tokens`
+              and `duration_seconds` (see `LLMMetricsStore.query`).
+
+    Example:
+        >>> curl "http://localhost:5000/metrics/llm?endpoint=recommend"
+        {
+            "recommend": {
+                "llama3.2": {
+                    "generations": 42,
+                    "errors": 1,
+                    "ttft_seconds": {"count": 42, "mean": 0.61, "min": 0.18, "p50": 0.52, "p90": 1.1, "p99": 1.9, "max": 2.0},
+                    "tokens_per_second": {"count": 42, "mean": 38.5, "min": 21.0, "p50": 39.2, "p90": 45.8, "p99": 47.9, "max": 48.1},
+                    ...
+                }
+            }
+        }
+    """
+    return jsonify(
+        llm_metrics.query(
+            endpoint=request.args.get("endpoint"), model=request.args.get("model")
+        )
+    )
 
 
 def get_formatted_ingredients(data: dict):
@@ -160,18 +689,25 @@ def ingredient_summary():
     Returns:
         dict: A JSON object containing:
             - summary (list of str): A list of up to 5 keywords summarizing the main skincare benefits of the ingredients.
+            - coverage (float): Share of the ingredients known to the curated ingredient lexicon.
+            - source (str): What produced the summary: `"cache"`, `"lexicon"`, `"store"` or `"llm"`
+              (see `IngredientBenefitStore.summarize`).
 
         Example Success Response:
         ```json
         {
-            "summary": ["Hydrating", "Soothing", "Brightening", "Antioxidant", "Exfoliating"]
+            "summary": ["Hydrating", "Soothing", "Brightening", "Antioxidant", "Exfoliating"],
+            "coverage": 0.92,
+            "source": "lexicon"
         }
         ```
 
         Example Empty Response (No valid ingredients):
         ```json
         {
-            "summary": []
+            "summary": [],
+            "coverage": 1.0,
+            "source": "lexicon"
         }
         ```
 
@@ -186,69 +722,214 @@ def ingredient_summary():
             ```
 
     Description:
-        This API endpoint receives a list of skincare ingredients and their hazard scores,
-        formats them into a structured text format, and then invokes a language model (LLM)
-        to generate a concise summary of key skincare benefits. The response is a list of up to
-        5 keywords highlighting the main properties of the ingredients.
-
-        The AI is prompted to return a **valid JSON list** containing only relevant benefits
-        such as **"Hydrating"**, **"Brightening"**, **"Exfoliating"**, etc.
+        This API endpoint receives a list of skincare ingredients and their hazard scores and
+        returns a concise summary of key skincare benefits: a list of up to 5 keywords
+        highlighting the main properties of the ingredients.
+
+        The benefits of each ingredient, such as **"Hydrating"**, **"Brightening"** or
+        **"Exfoliating"**, are kept in `ingredient_benefits`, and the product's summary ranks
+        them by how many of its ingredients provide them. Well-known ingredients are answered
+        from the lexicon in `INGREDIENT_LEXICON_FILE`; only ingredients never seen before are
+        sent to the LLM, in batches of `INGREDIENT_BENEFITS_BATCH_SIZE` per call. When the
+        lexicon covers at least `INGREDIENT_LEXICON_COVERAGE` of the ingredients, the summary
+        does not wait for the LLM, which generates the remainder in the background.
+
+        Summaries are cached in `summary_cache` by the set of ingredients, so the same ingredients
+        in another order or spelling are answered without invoking the LLM again.
     """
     try:
         data = request.json
         try:
-            ingredient_details = get_formatted_ingredients(data)
+            get_formatted_ingredients(data)  # Validate the ingredients
         except ValueError as e:
             return jsonify({"error": str(e)}), 400
 
-        llm_input = (
-            f"Skincare Ingredients:\n{ingredient_details}\n\n"
-            "Generate a **list** (max 5 words) of key skincare benefits. Return only a JSON list."
+        # Check cache first; the same ingredients in any order share one entry
+        names = [str(ingredient["name"]) for ingredient in data["ingredients"]]
+        cached_summary = summary_cache.get(data["ingredients"])
+        if cached_summary is not None:
+            print("Using cached summary")
+            return jsonify(
+                {
+                    "summary": cached_summary,
+                    "coverage": ingredient_benefits.coverage(names),
+                    "source": "cache",
+                }
+            )
+
+        # Only ingredients missing from the lexicon and never seen before are sent to the LLM
+        result = ingredient_benefits.summarize(names)
+        if result.pop("complete"):
+            summary_cache.put(data["ingredients"], result["summary"])  # Store in cache
+        return jsonify(result)
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 500
+
+
+def sse_event(payload: dict) -> str:
+    """
+    Format a payload as one Server-Sent Event.
+
+    Example:
+        >>> sse_event({"content": "Hi"})
+        'data: {"content": "Hi"}\\n\\n'
+    """
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+def chunk_content(chunk) -> str:
+    """Return the text of a chunk streamed by the LLM."""
+    if isinstance(chunk, str):
+        return chunk
+    return chunk.content if hasattr(chunk, "content") else str(chunk)
+
+
+def build_recommendation_input(data: dict) -> str:
+    """
+    Build the LLM input of a `/recommend` request from its product, ingredients and user profile.
+
+    Args:
+        data (dict): The `/recommend` request body.
+
+    Returns:
+        str: The product name, ingredients, user profile and an explanation of hazard scores, to
+            be filled into `prompt_template_recommendation`. Ingredients are listed by
+            `encode_ingredients` unless `INGREDIENT_PROMPT_FORMAT` is `"verbose"`.
+
+    Raises:
+        ValueError: If the product name is missing, or the ingredients are missing or invalid.
+    """
+    product_name = data.get("product_name")
+    user_profile = data.get(
+        "user_profile"
+    )  # Get user profile information for customized recommendation
+
+    if not product_name:
+        raise ValueError("Missing product_name")
+    if not user_profile:
+        user_profile = {
+            "skinType": "Unknown",
+            "skinConcerns": None,
+            "allergies": None,
+        }  # Do not return error to ensure that the chatbox works for non user-login case.
+
+    try:
+        ingredient_details = get_formatted_ingredients(data)
+    except Exception as e:
+        raise ValueError(str(e)) from e
+    if INGREDIENT_PROMPT_FORMAT == "compact":
+        ingredient_details = encode_ingredients(data["ingredients"], user_profile)
+
+    profile_details = (
+        f"User Profile:\n"
+        f"- Skin Type: {user_profile.get('skinType', 'Unknown')}\n"
+        f"- Skin Concerns: {user_profile.get('skinConcerns', 'None')}\n"
+        f"- Allergies: {user_profile.get('allergies', 'None')}\n"
+    )
+
+    # Explain hazard ratings to the LLM
+    explanation = (
+        "The hazard score represents the potential risk level of the ingredient. "
+        "A lower score (1-2) means it's considered low risk, 3-6 indicates moderate risk, "
+        "and 7-10 suggests a higher hazard potential. "
+        "Please analyze the safety of the product based on these scores along with the concerns for the ingredients. "
+        "In addition, use user's skin type, skin concerns, and allergies while making recommendations."
+    )
+
+    return f"Product Name: {product_name}\nIngredients:\n{ingredient_details}\n\n{profile_details}\n\n{explanation}"
+
+
+# Version of the recommendation prompt: the prompt rendered for a sample request changes with the
+# template and with how requests are formatted into it
+RECOMMENDATION_PROMPT_VERSION = fingerprint(
+    prompt_template_recommendation.format(
+        input=build_recommendation_input(
+            {
+                "product_name": "Sample Product",
+                "ingredients": [{"name": "Water", "score": "1", "concerns": []}],
+                "user_profile": {
+                    "skinType": "Normal",
+                    "skinConcerns": "Dryness",
+                    "allergies": "None",
+                },
+            }
         )
+    )
+)[:16]
 
-        # Generate a hash key based on ingredient details
-        ingredients_key = hashlib.md5(
-            json.dumps(ingredient_details, sort_keys=True).encode()
-        ).hexdigest()
 
-        # Check cache first
-        if ingredients_key in ingredient_summary_cache:
-            print("Using cached summary")
-            return jsonify({"summary": ingredient_summary_cache[ingredients_key]})
+def recommendation_cache_key(llm_input: str, llm):
+    """
+    Return the `recommendation_cache` key of a `/recommend` request.
 
-        llm_chain = get_ingredient_summary_chain()
-        response = llm_chain.invoke({"ingredients": llm_input})
+    Args:
+        llm_input (str): The request's LLM input (see `build_recommendation_input`).
+        llm (ChatOllama): The LLM that answers the request.
 
-        try:
-            summary_list = json.loads(response["text"].strip())
-            if isinstance(summary_list, list):
-                summary_list = summary_list[:5]  # Ensure max 5 words
-                ingredient_summary_cache[ingredients_key] = (
-                    summary_list  # Store in cache
-                )
-                return jsonify({"summary": summary_list})
-            else:
-                return jsonify({"summary": []})  # Return empty if not a valid list
-        except json.JSONDecodeError:
-            return jsonify({"summary": []})  # Handle JSON parsing errors
+    Returns:
+        str | None: A fingerprint of the model, `RECOMMENDATION_PROMPT_VERSION` and the LLM
+            input, or `None` if the cache is disabled or the LLM's answers are not
+            deterministic (a temperature other than 0).
+    """
+    if not RECOMMENDATION_CACHE or getattr(llm, "temperature", None) != 0:
+        return None
+    return recommendation_fingerprint(
+        llm.model, RECOMMENDATION_PROMPT_VERSION, llm_input
+    )
 
-    except ValueError as e:
-        return jsonify({"error": str(e)}), 500
+
+def cached_recommendation(cache_key: str):
+    """
+    Return the cached chunks of a recommendation, or `None` if `cache_key` is `None` or unknown.
+
+    May read `recommendation_cache`'s file; async callers run it on an executor.
+    """
+    return recommendation_cache.get(cache_key) if cache_key else None
 
 
-def stream_recommend(llm_input: str, session_id: str):
+def save_recommendation(prompt: str, chunks: list, session_id: str, cache_key=None):
+    """
+    Save a streamed recommendation to the session's conversation memory for follow-up questions.
+
+    Args:
+        prompt (str): The prompt the recommendation answers.
+        chunks (list[str]): The streamed chunks of the recommendation.
+        session_id (str): Unique session identifier for conversation context tracking.
+        cache_key (str, optional): Key to add a generated, non-empty recommendation to
+            `recommendation_cache` under; `None` for replayed or uncached recommendations.
+    """
+    full_response = "".join(chunks)
+    if cache_key and full_response:
+        recommendation_cache.put(cache_key, chunks)
+    conversation_chain = get_or_create_conversation(conversation_store, session_id)
+    conversation_chain.memory.save_context({"input": prompt}, {"output": full_response})
+
+
+def chat_prompt(conversation_chain, user_message: str) -> str:
+    """Fill `prompt_template_followup` with a session's history and the user's message."""
+    return prompt_template_followup.format(
+        history=conversation_chain.memory.buffer, input=user_message
+    )
+
+
+def stream_recommend(llm_input: str, session_id: str, cache_key: str = None):
     """
     Stream AI-generated recommendations based on product details and user profile.
 
     Args:
         llm_input (str): Formatted input string containing product name, ingredients, and user profile.
         session_id (str): Unique session identifier for conversation context tracking.
+        cache_key (str, optional): Key of the recommendation in `recommendation_cache`
+            (see `recommendation_cache_key`), or `None` to always generate it.
 
     Yields:
         Streaming JSON chunks containing the AI's response.
 
     Description:
         - Feeds prompt and input into the LLM and streams the response.
+        - A recommendation found in `recommendation_cache` is replayed chunk by chunk instead,
+          and complete generations are added to it.
         - Saves the full response to conversation memory for follow-up questions.
     """
     llm = get_llm()
@@ -256,27 +937,28 @@ def stream_recommend(llm_input: str, session_id: str):
     # Add the prompt to the LLM input
     llm_input = prompt_template_recommendation.format(input=llm_input)  # Add prompt
 
-    full_response = ""
+    cached_chunks = cached_recommendation(cache_key)
 
     try:
-        for chunk in llm.stream(llm_input):
-            if isinstance(chunk, str):
-                content = chunk
-            else:
-                content = chunk.content if hasattr(chunk, "content") else str(chunk)
-
-            print(f"Streaming chunk: {content}")  # Debug log
-            full_response += content
-            yield f"data: {json.dumps({'content': content})}\n\n"
+        if cached_chunks is not None:
+            chunks = cached_chunks
+            for content in chunks:
+                yield sse_event({"content": content})
+            cache_key = None  # Already cached
+        else:
+            chunks = []
+            for chunk in llm.stream(
+                llm_input, config={"metadata": {"endpoint": "recommend"}}
+            ):
+                content = chunk_content(chunk)
+                chunks.append(content)
+                yield sse_event({"content": content})
 
         # Save to conversation memory after complete
-        conversation_chain = get_or_create_conversation(conversation_store, session_id)
-        conversation_chain.memory.save_context(
-            {"input": llm_input}, {"output": full_response}
-        )
+        save_recommendation(llm_input, chunks, session_id, cache_key)
     except Exception as e:
         print("Error during streaming:", str(e))
-        yield f"data: {json.dumps({'error': str(e)})}\n\n"
+        yield sse_event({"error": str(e)})
 
 
 @app.route("/recommend", methods=["POST"])
@@ -313,6 +995,11 @@ def recommend_product():
           will return the new `session_id`.
         - The conversation chain memory is stored on the server side, enabling follow-up questions
           via the `/chat` endpoint, where the LLM will recall the context of this recommendation.
+        - While `LLM_TEMPERATURE` is 0, the same prompt always gets the same recommendation, so a
+          request rendering the same product, ingredients and user profile is replayed from
+          `recommendation_cache` in the same stream format (and still recorded in the session).
+          The cache is keyed by model and prompt version as well, so changing either regenerates
+          recommendations.
 
         Expected output format:
         ```json
@@ -342,49 +1029,20 @@ def recommend_product():
         }
     """
     data = request.json
-    product_name = data.get("product_name")
     session_id = data.get("session_id")
-    user_profile = data.get(
-        "user_profile"
-    )  # Get user profile information for customized recommendation
-
-    if not product_name:
-        return jsonify({"error": "Missing product_name"}), 400
-    if not user_profile:
-        user_profile = {
-            "skinType": "Unknown",
-            "skinConcerns": None,
-            "allergies": None,
-        }  # Do not return error to ensure that the chatbox works for non user-login case.
 
     try:
-        ingredient_details = get_formatted_ingredients(data)
-    except Exception as e:
+        llm_input = build_recommendation_input(data)
+    except ValueError as e:
         return jsonify({"error": str(e)}), 400
 
     # If client didn't provide a session_id, generate one automatically
     if not session_id:
         session_id = generate_session_id()
 
-    profile_details = (
-        f"User Profile:\n"
-        f"- Skin Type: {user_profile.get('skinType', 'Unknown')}\n"
-        f"- Skin Concerns: {user_profile.get('skinConcerns', 'None')}\n"
-        f"- Allergies: {user_profile.get('allergies', 'None')}\n"
-    )
-
-    # Explain hazard ratings to the LLM
-    explanation = (
-        "The hazard score represents the potential risk level of the ingredient. "
-        "A lower score (1-2) means it's considered low risk, 3-6 indicates moderate risk, "
-        "and 7-10 suggests a higher hazard potential. "
-        "Please analyze the safety of the product based on these scores along with the concerns for the ingredients. "
-        "In addition, use user's skin type, skin concerns, and allergies while making recommendations."
-    )
-
-    llm_input = f"Product Name: {product_name}\nIngredients:\n{ingredient_details}\n\n{profile_details}\n\n{explanation}"
+    cache_key = recommendation_cache_key(llm_input, get_llm())
     return Response(
-        stream_with_context(stream_recommend(llm_input, session_id)),
+        stream_with_context(stream_recommend(llm_input, session_id, cache_key)),
         mimetype="text/event-stream",
         headers={"Cache-Control": "no-cache", "X-Session-Id": session_id},
     )
@@ -414,18 +1072,12 @@ def stream_chat(user_message: str, session_id: str):
 
         print("Starting stream processing...")
         for chunk in conversation_chain.llm.stream(
-            prompt_template_followup.format(
-                history=conversation_chain.memory.buffer, input=user_message
-            )
+            chat_prompt(conversation_chain, user_message),
+            config={"metadata": {"endpoint": "chat"}},
         ):
-            if isinstance(chunk, str):
-                content = chunk
-            else:
-                content = chunk.content if hasattr(chunk, "content") else str(chunk)
-
-            print(f"Processing chunk: {content}")
+            content = chunk_content(chunk)
             full_response += content
-            yield f"data: {json.dumps({'content': content})}\n\n"
+            yield sse_event({"content": content})
 
         # Save to conversation memory after complete
         conversation_chain.memory.save_context(
@@ -438,7 +1090,7 @@ def stream_chat(user_message: str, session_id: str):
         import traceback
 
         print(f"Traceback: {traceback.format_exc()}")
-        yield f"data: {json.dumps({'error': str(e)})}\n\n"
+        yield sse_event({"error": str(e)})
 
 
 @app.route("/chat", methods=["POST"])
@@ -509,4 +1161,10 @@ def chat():
 
 
 if __name__ == "__main__":
-    app.run(debug=True, port=5000)
+    app.debug = True
+    # Resolve chromedriver and start browser sessions before the first cache miss, only in the
+    # process that serves requests: the debug reloader's parent process never scrapes
+    if not app.debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        resolve_driver_path()
+        driver_pool.warm(DRIVER_POOL_WARM)
+    app.run(port=5000)
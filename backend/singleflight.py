@@ -0,0 +1,92 @@
+import threading
+from collections import Counter
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into a single execution.
+
+    The first caller for a key runs the function; callers arriving while it is still running
+    wait on the same future and receive its result, or re-raise its exception. Once the call
+    finishes the key is released, so later callers start a fresh call.
+
+    Args:
+        timeout (float, optional): Seconds a coalesced caller waits before giving up. The
+            caller running the function is not affected.
+
+    Example:
+        >>> flight = SingleFlight(timeout=60)
+        >>> flight.do("cerave", fetch_product_ingredients, "CeraVe")
+        {'product_url': '...', 'product_name': 'CeraVe Moisturizing Cream', 'ingredients': [...]}
+    """
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._calls = {}  # key -> Future of the call in flight
+        self._stats = Counter()
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Run `fn(*args, **kwargs)` unless a call for `key` is already in flight, then share its outcome.
+
+        Returns:
+            The value returned by the call that ran.
+
+        Raises:
+            TimeoutError: If a coalesced caller waited longer than `timeout`.
+            Exception: Whatever the shared call raised.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self._stats["calls"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            try:
+                return future.result(self.timeout)
+            except FutureTimeoutError:
+                with self._lock:
+                    self._stats["timeouts"] += 1
+                raise TimeoutError(f"Timed out waiting for in-flight call '{key}'")
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            with self._lock:
+                self._calls.pop(key, None)
+                self._stats["errors"] += 1
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._calls.pop(key, None)
+        future.set_result(result)
+        return result
+
+    def in_flight(self):
+        """Return the number of keys with a call currently running."""
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self):
+        """
+        Return coalescing statistics.
+
+        Returns:
+            dict: Calls actually executed, callers coalesced onto an in-flight call, coalesced
+                  callers that timed out, executed calls that raised, and calls in flight.
+        """
+        with self._lock:
+            return {
+                "calls": self._stats["calls"],
+                "coalesced": self._stats["coalesced"],
+                "timeouts": self._stats["timeouts"],
+                "errors": self._stats["errors"],
+                "in_flight": len(self._calls),
+            }
@@ -0,0 +1,853 @@
+"""
+Storage backends for the product cache.
+
+Every backend implements the `CacheStorage` interface, so `backend.cache` can swap
+between a JSONL journal, a single JSON file, a SQLite database, etc. via the
+`CACHE_BACKEND` setting.
+
+Backends hold two kinds of entries: canonical product records keyed by `product_url`, and
+aliases mapping normalized query keys (see `normalize_query`) to a `product_url`.
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from backend.config.settings import (
+    CACHE_COMPACT_MIN_DEAD,
+    CACHE_COMPACT_RATIO,
+    CACHE_DB_FILE,
+    CACHE_FILE,
+    CACHE_FLUSH_INTERVAL,
+    CACHE_FLUSH_THRESHOLD,
+    CACHE_JOURNAL_FILE,
+)
+from backend.normalize import normalize_query
+
+
+def load_cache(path=CACHE_FILE):
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            return json.load(f)
+    return {}
+
+
+def save_cache(cache, path=CACHE_FILE):
+    """
+    Atomically write the cache to disk.
+
+    The data is written to a temporary file in the same directory and then renamed over
+    `path`, so readers never observe a partially written cache file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=".product_cache.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(cache, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def split_legacy_entries(entries):
+    """
+    Convert legacy `{query: record}` cache entries into products and aliases.
+
+    Args:
+        entries (iterable): `(query, record)` pairs as stored by the original cache format.
+
+    Returns:
+        tuple: A `{product_url: record}` dict (newest record wins when several queries
+               resolved to the same product) and a list of `(key, product_url, query)` aliases.
+    """
+    products = {}
+    aliases = []
+    for query, record in entries:
+        product_url = record.get("product_url") or query
+        current = products.get(product_url)
+        if current is None or current["last_updated"] < record["last_updated"]:
+            products[product_url] = record
+        aliases.append((normalize_query(query), product_url, query))
+    return products, aliases
+
+
+class CacheStorage:
+    """
+    Interface implemented by all product cache storage backends.
+
+    Product records are plain dicts keyed by `product_url`. Every record carries a
+    `last_updated` ISO-8601 timestamp, which backends may index for expiry purges.
+    Aliases map a normalized query key to the `product_url` it resolved to, along with the
+    raw query that created the alias.
+
+    Backends that several processes write to set `shared`; they bound their own size (see
+    `SQLiteStorage.evict`), since no process sees the others' reads and writes.
+    """
+
+    shared = False
+
+    def get(self, product_url):
+        """Return the product record stored under `product_url`, or `None`."""
+        raise NotImplementedError
+
+    def put(self, product_url, record):
+        """Insert or replace the product record stored under `product_url`."""
+        raise NotImplementedError
+
+    def delete(self, product_url):
+        """Remove the product record stored under `product_url` and its aliases."""
+        raise NotImplementedError
+
+    def items(self):
+        """Return a list of `(product_url, record)` pairs for every stored product."""
+        raise NotImplementedError
+
+    def get_alias(self, key):
+        """Return the `(product_url, query)` pair aliased by `key`, or `None`."""
+        raise NotImplementedError
+
+    def put_alias(self, key, product_url, query):
+        """Point the normalized query `key` at `product_url`."""
+        raise NotImplementedError
+
+    def aliases(self):
+        """Return a list of `(key, product_url, query)` triples for every alias."""
+        raise NotImplementedError
+
+    def touch(self, product_url):
+        """Record a read of `product_url`, for backends that evict by recency themselves."""
+
+    def evict(self, max_entries, max_bytes):
+        """
+        Delete the least recently used products until at most `max_entries` products of at
+        most `max_bytes` in total remain. Only implemented by `shared` backends.
+
+        Returns:
+            list: `(product_url, size)` of every evicted product.
+        """
+        raise NotImplementedError
+
+    def purge_expired(self, cutoff):
+        """
+        Delete every product last updated before `cutoff`, along with its aliases.
+
+        Args:
+            cutoff (str): ISO-8601 timestamp; older records are removed.
+
+        Returns:
+            list: The `product_url` of every removed product.
+        """
+        raise NotImplementedError
+
+    def import_legacy(self, entries):
+        """
+        Import `(query, record)` pairs from the original query-keyed cache format.
+
+        Returns:
+            int: The number of imported products.
+        """
+        products, aliases = split_legacy_entries(entries)
+        for product_url, record in products.items():
+            self.put(product_url, record)
+        for key, product_url, query in aliases:
+            self.put_alias(key, product_url, query)
+        return len(products)
+
+    def flush(self):
+        """Persist any pending changes. Backends that write through need not override."""
+
+    def close(self):
+        """Flush pending changes and release any resources held by the backend."""
+        self.flush()
+
+    def __len__(self):
+        return len(self.items())
+
+    def __contains__(self, product_url):
+        return self.get(product_url) is not None
+
+
+class _ResidentStorage(CacheStorage):
+    """
+    In-memory product and alias index shared by the file-based backends.
+
+    Subclasses implement `_read()` to populate `_products` and `_aliases` from disk on
+    first access, and persist their own changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._products = None
+        self._aliases = None
+
+    def _load(self):
+        if self._products is None:
+            with self._lock:
+                if self._products is None:
+                    self._read()
+        return self._products
+
+    def _read(self):
+        raise NotImplementedError
+
+    def _drop_aliases(self, product_urls):
+        # Callers hold the lock; returns how many aliases pointed at `product_urls`
+        dropped = [
+            key for key, (url, _) in self._aliases.items() if url in product_urls
+        ]
+        for key in dropped:
+            del self._aliases[key]
+        return len(dropped)
+
+    def get(self, product_url):
+        return self._load().get(product_url)
+
+    def items(self):
+        with self._lock:
+            return list(self._load().items())
+
+    def get_alias(self, key):
+        self._load()
+        return self._aliases.get(key)
+
+    def aliases(self):
+        products = self._load()
+        with self._lock:
+            # Skip aliases pointing at a product that is not stored (yet)
+            return [
+                (key, product_url, query)
+                for key, (product_url, query) in self._aliases.items()
+                if product_url in products
+            ]
+
+    def __len__(self):
+        return len(self._load())
+
+
+class JsonFileStorage(_ResidentStorage):
+    """
+    Resident, dict-indexed product cache with write-behind persistence.
+
+    The cache file is read once (on first access) into an in-memory dict, so lookups and
+    inserts cost O(1) regardless of how many products are cached. Inserts only mark the
+    cache dirty; the file is rewritten in the background once `flush_interval` seconds
+    have passed, or immediately once `flush_threshold` unsaved changes have accumulated.
+    Files in the original `{query: record}` format are converted on load.
+
+    Args:
+        path (str, optional): Location of the JSON cache file. Defaults to `CACHE_FILE`.
+        flush_interval (float, optional): Seconds to wait before flushing pending changes.
+        flush_threshold (int, optional): Number of pending changes that forces a flush.
+
+    Example:
+        >>> cache = JsonFileStorage("product_cache.json")
+        >>> cache.put(product_url, {"product_name": "CeraVe Moisturizing Cream", ...})
+        >>> cache.get(product_url)["product_name"]
+        'CeraVe Moisturizing Cream'
+        >>> cache.flush()  # Persist pending changes right away
+    """
+
+    def __init__(
+        self,
+        path=CACHE_FILE,
+        flush_interval=CACHE_FLUSH_INTERVAL,
+        flush_threshold=CACHE_FLUSH_THRESHOLD,
+    ):
+        super().__init__()
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self._flush_lock = threading.Lock()
+        self._dirty = 0
+        self._timer = None
+
+    def _read(self):
+        data = load_cache(self.path)
+        if set(data) == {"products", "aliases"}:
+            self._aliases = {
+                key: tuple(alias) for key, alias in data["aliases"].items()
+            }
+            self._products = data["products"]
+        else:
+            products, aliases = split_legacy_entries(data.items())
+            self._aliases = {key: (url, query) for key, url, query in aliases}
+            self._products = products
+
+    def put(self, product_url, record):
+        """Store `record` under `product_url` and schedule it to be written to disk."""
+        products = self._load()
+        with self._lock:
+            products[product_url] = dict(record)
+        self._mark_dirty()
+
+    def put_alias(self, key, product_url, query):
+        self._load()
+        with self._lock:
+            if self._aliases.get(key, (None,))[0] == product_url:
+                return
+            self._aliases[key] = (product_url, query)
+        self._mark_dirty()
+
+    def _mark_dirty(self, count=1):
+        with self._lock:
+            self._dirty += count
+            flush_now = self._dirty >= self.flush_threshold
+            if not flush_now and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if flush_now:
+            self.flush()
+
+    def delete(self, product_url):
+        products = self._load()
+        with self._lock:
+            removed = products.pop(product_url, None) is not None
+            if removed:
+                self._drop_aliases({product_url})
+        if removed:
+            self._mark_dirty()
+
+    def purge_expired(self, cutoff):
+        products = self._load()
+        with self._lock:
+            expired = [k for k, v in products.items() if v["last_updated"] < cutoff]
+            for product_url in expired:
+                del products[product_url]
+            self._drop_aliases(set(expired))
+        if expired:
+            self._mark_dirty(len(expired))
+        return expired
+
+    def flush(self):
+        """Write all pending changes to disk. Does nothing if the cache is clean."""
+        with self._flush_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if not self._dirty:
+                    return
+                snapshot = {
+                    "products": dict(self._products),
+                    "aliases": {
+                        key: [product_url, query]
+                        for key, product_url, query in self.aliases()
+                    },
+                }
+                self._dirty = 0
+            save_cache(snapshot, self.path)
+
+
+class JournalStorage(_ResidentStorage):
+    """
+    Append-only JSONL journal with startup replay and background compaction.
+
+    Every change is a single appended line (`{"op": "put", "key": ..., "record": ...}`,
+    `{"op": "alias", "key": ..., "product_url": ..., "query": ...}` or
+    `{"op": "del", "key": ...}`, which also removes the product's aliases), so inserts cost
+    O(1) no matter how large the cache is.
+    The journal is replayed into an in-memory index on first access; a torn last line left
+    by a crash is ignored. Once superseded ("dead") lines reach `compact_min_dead` and make
+    up at least `compact_ratio` of the journal, a background thread rewrites it with only
+    the live records.
+
+    The index lives in this process only: other processes appending to the same journal are
+    not seen, and a compaction would drop their appends. Use `SQLiteStorage` for several
+    server workers.
+
+    Args:
+        path (str, optional): Location of the journal. Defaults to `CACHE_JOURNAL_FILE`.
+        legacy_path (str, optional): JSON cache file imported when no journal exists yet.
+        compact_min_dead (int, optional): Minimum dead lines before compaction is considered.
+        compact_ratio (float, optional): Minimum dead / total line ratio that triggers compaction.
+        fsync (bool, optional): Whether to fsync after each append (survives power loss,
+            not just process crashes, at the cost of write latency).
+
+    Example:
+        >>> storage = JournalStorage("product_cache.jsonl")
+        >>> storage.put(product_url, {"product_name": "CeraVe Moisturizing Cream", ...})
+        >>> storage.compaction_stats()["live_records"]
+        1
+    """
+
+    def __init__(
+        self,
+        path=CACHE_JOURNAL_FILE,
+        legacy_path=None,
+        compact_min_dead=CACHE_COMPACT_MIN_DEAD,
+        compact_ratio=CACHE_COMPACT_RATIO,
+        fsync=False,
+    ):
+        super().__init__()
+        self.path = path
+        self.legacy_path = legacy_path
+        self.compact_min_dead = compact_min_dead
+        self.compact_ratio = compact_ratio
+        self.fsync = fsync
+        self._file = None
+        self._dead = 0
+        self._compacting = False
+        self._pending = []
+        self._compactions = 0
+        self._bytes_reclaimed = 0
+
+    def _read(self):
+        products = {}
+        aliases = {}
+        alias_keys = {}  # product_url -> keys of its aliases, for "del" lines
+        dead = 0
+        valid_bytes = 0
+        if not os.path.exists(self.path):
+            self._products = {}
+            self._aliases = {}
+            if self.legacy_path and os.path.exists(self.legacy_path):
+                self.import_legacy(load_cache(self.legacy_path).items())
+            return
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break  # Torn write from a crash: drop it and everything after
+                valid_bytes += len(line)
+                key = entry["key"]
+                if entry["op"] == "alias":
+                    if key in aliases:
+                        dead += 1  # The earlier alias line for this key is superseded
+                        alias_keys[aliases[key][0]].discard(key)
+                    aliases[key] = (entry["product_url"], entry["query"])
+                    alias_keys.setdefault(entry["product_url"], set()).add(key)
+                    continue
+                if key in products:
+                    dead += 1  # The earlier line for this product is now superseded
+                if entry["op"] == "put":
+                    products[key] = entry["record"]
+                else:
+                    products.pop(key, None)
+                    dead += 1  # The tombstone itself is dead weight as well
+                    for alias_key in alias_keys.pop(key, ()):
+                        del aliases[alias_key]
+                        dead += 1
+        if valid_bytes < os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(valid_bytes)
+        live_aliases = {k: v for k, v in aliases.items() if v[0] in products}
+        self._products = products
+        self._aliases = live_aliases
+        self._dead = dead + len(aliases) - len(live_aliases)
+
+    def _append(self, entry):
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        if self._file is None:
+            self._file = open(self.path, "a")
+        self._file.write(line)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        if self._compacting:
+            self._pending.append(line)
+
+    def put(self, product_url, record):
+        products = self._load()
+        with self._lock:
+            if product_url in products:
+                self._dead += 1
+            products[product_url] = dict(record)
+            self._append(
+                {"op": "put", "key": product_url, "record": products[product_url]}
+            )
+        self._maybe_compact()
+
+    def put_alias(self, key, product_url, query):
+        self._load()
+        with self._lock:
+            current = self._aliases.get(key)
+            if current is not None and current[0] == product_url:
+                return
+            if current is not None:
+                self._dead += 1
+            self._aliases[key] = (product_url, query)
+            self._append(
+                {"op": "alias", "key": key, "product_url": product_url, "query": query}
+            )
+        self._maybe_compact()
+
+    def delete(self, product_url):
+        self._delete([product_url])
+
+    def purge_expired(self, cutoff):
+        expired = [k for k, v in self.items() if v["last_updated"] < cutoff]
+        self._delete(expired)
+        return expired
+
+    def _delete(self, product_urls):
+        products = self._load()
+        with self._lock:
+            deleted = {
+                url for url in product_urls if products.pop(url, None) is not None
+            }
+            if not deleted:
+                return
+            for product_url in deleted:
+                self._append({"op": "del", "key": product_url})
+            # The removed records, their tombstones and their aliases' lines
+            self._dead += 2 * len(deleted) + self._drop_aliases(deleted)
+        self._maybe_compact()
+
+    def _maybe_compact(self):
+        with self._lock:
+            total = len(self._products) + len(self._aliases) + self._dead
+            if (
+                self._compacting
+                or self._dead < self.compact_min_dead
+                or self._dead < self.compact_ratio * total
+            ):
+                return
+        threading.Thread(target=self.compact, daemon=True).start()
+
+    def compact(self):
+        """
+        Rewrite the journal so it only contains the live records and aliases.
+
+        Appends keep going to the old journal while the snapshot is written; they are
+        replayed into the new journal before it atomically replaces the old one.
+        """
+        products = self._load()
+        with self._lock:
+            if self._compacting:
+                return
+            self._compacting = True
+            self._pending = []
+            snapshot = list(products.items())
+            aliases = self.aliases()
+            dead_before = self._dead
+        tmp_path = None
+        try:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(
+                dir=directory, prefix=".product_cache.", suffix=".tmp"
+            )
+            with os.fdopen(fd, "w") as f:
+                for product_url, record in snapshot:
+                    entry = {"op": "put", "key": product_url, "record": record}
+                    f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+                for key, product_url, query in aliases:
+                    entry = {
+                        "op": "alias",
+                        "key": key,
+                        "product_url": product_url,
+                        "query": query,
+                    }
+                    f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+                with self._lock:
+                    f.writelines(self._pending)
+                    f.flush()
+                    os.fsync(f.fileno())
+                    size_before = os.path.getsize(self.path)
+                    if self._file is not None:
+                        self._file.close()
+                        self._file = None
+                    os.replace(tmp_path, self.path)
+                    # Dangling aliases were not rewritten, so they are gone as well
+                    self._aliases = {
+                        key: (product_url, query)
+                        for key, product_url, query in self.aliases()
+                    }
+                    # Lines appended during compaction may themselves be dead; keep those
+                    self._dead -= dead_before
+                    self._compactions += 1
+                    self._bytes_reclaimed += size_before - os.path.getsize(self.path)
+        finally:
+            with self._lock:
+                self._compacting = False
+                self._pending = []
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def compaction_stats(self):
+        """
+        Return journal compaction statistics.
+
+        Returns:
+            dict: A dictionary containing:
+                - "live_records" (int): Products currently in the index.
+                - "live_aliases" (int): Query aliases currently in the index.
+                - "dead_records" (int): Superseded lines and tombstones in the journal.
+                - "journal_bytes" (int): Current size of the journal file.
+                - "compactions" (int): Number of completed compactions.
+                - "bytes_reclaimed" (int): Total bytes removed by compactions.
+        """
+        products = self._load()
+        with self._lock:
+            return {
+                "live_records": len(products),
+                "live_aliases": len(self._aliases),
+                "dead_records": self._dead,
+                "journal_bytes": (
+                    os.path.getsize(self.path) if os.path.exists(self.path) else 0
+                ),
+                "compactions": self._compactions,
+                "bytes_reclaimed": self._bytes_reclaimed,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class SQLiteStorage(CacheStorage):
+    """
+    SQLite-backed product cache storage with one row per cached product.
+
+    The database runs in WAL mode, so several Flask worker processes can read the cache
+    concurrently while one of them writes. Products are indexed on `product_url` (primary
+    key) and on `last_updated`, and aliases on their query key, which keeps lookups,
+    inserts and expiry purges at O(log n). The database is opened on first access.
+
+    Because every worker writes to the same database, the size bound is enforced here rather
+    than by a process-local policy: each product records when it was last written or read
+    (`touch`), and `evict` deletes the least recently used products across all workers.
+
+    Args:
+        path (str, optional): Location of the SQLite database. Defaults to `CACHE_DB_FILE`.
+        timeout (float, optional): Seconds to wait for a competing writer's lock.
+        legacy_path (str, optional): JSON cache file imported when the database is created.
+
+    Example:
+        >>> storage = SQLiteStorage("product_cache.db")
+        >>> storage.put(product_url, {"product_name": "CeraVe Moisturizing Cream", ...})
+        >>> storage.purge_expired("2025-03-01T00:00:00")
+        []
+    """
+
+    shared = True
+
+    def __init__(self, path=CACHE_DB_FILE, timeout=5.0, legacy_path=None):
+        self.path = path
+        self.timeout = timeout
+        self.legacy_path = legacy_path
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._schema_lock = threading.Lock()
+        self._ready = False
+
+    def _create_schema(self, conn):
+        with self._schema_lock:
+            if self._ready:
+                return
+            new = not conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'products'"
+            ).fetchone()
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS products (
+                    product_url TEXT PRIMARY KEY,
+                    record TEXT NOT NULL,
+                    last_updated TEXT NOT NULL,
+                    accessed_at REAL NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS idx_products_last_updated
+                    ON products (last_updated);
+                CREATE TABLE IF NOT EXISTS aliases (
+                    query_key TEXT PRIMARY KEY,
+                    product_url TEXT NOT NULL,
+                    query TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_aliases_product_url
+                    ON aliases (product_url);
+                """
+            )
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(products)")]
+            if "accessed_at" not in columns:
+                # Databases created before the size bound; their products count as unread
+                conn.execute(
+                    "ALTER TABLE products ADD COLUMN accessed_at REAL NOT NULL DEFAULT 0"
+                )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_products_accessed_at"
+                " ON products (accessed_at)"
+            )
+            conn.commit()
+            self._ready = True
+            if new and self.legacy_path and os.path.exists(self.legacy_path):
+                self.import_legacy(load_cache(self.legacy_path).items())
+
+    def _connection(self):
+        # sqlite3 connections cannot be shared between threads, so keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path, timeout=self.timeout, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        if not self._ready:
+            self._create_schema(conn)
+        return conn
+
+    def get(self, product_url):
+        row = (
+            self._connection()
+            .execute(
+                "SELECT record FROM products WHERE product_url = ?", (product_url,)
+            )
+            .fetchone()
+        )
+        return json.loads(row[0]) if row else None
+
+    def put(self, product_url, record):
+        with self._connection() as conn:
+            self._upsert_products(conn, [(product_url, record)])
+
+    @staticmethod
+    def _upsert_products(conn, records):
+        now = time.time()
+        conn.executemany(
+            """
+            INSERT INTO products (product_url, record, last_updated, accessed_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (product_url) DO UPDATE SET
+                record = excluded.record,
+                last_updated = excluded.last_updated,
+                accessed_at = excluded.accessed_at
+            """,
+            [
+                (product_url, json.dumps(record), record["last_updated"], now)
+                for product_url, record in records
+            ],
+        )
+
+    @staticmethod
+    def _upsert_aliases(conn, aliases):
+        conn.executemany(
+            """
+            INSERT INTO aliases (query_key, product_url, query)
+            VALUES (?, ?, ?)
+            ON CONFLICT (query_key) DO UPDATE SET
+                product_url = excluded.product_url,
+                query = excluded.query
+            """,
+            aliases,
+        )
+
+    def delete(self, product_url):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM products WHERE product_url = ?", (product_url,))
+            conn.execute("DELETE FROM aliases WHERE product_url = ?", (product_url,))
+
+    def touch(self, product_url):
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE products SET accessed_at = ? WHERE product_url = ?",
+                (time.time(), product_url),
+            )
+
+    def usage(self):
+        """Return the number of stored products and their total size in bytes."""
+        return tuple(
+            self._connection()
+            .execute("SELECT COUNT(*), COALESCE(SUM(length(record)), 0) FROM products")
+            .fetchone()
+        )
+
+    def evict(self, max_entries, max_bytes):
+        conn = self._connection()
+        with conn:
+            # Take the write lock up front, so two workers never pick the same victims
+            conn.execute("BEGIN IMMEDIATE")
+            count, size = self.usage()
+            evicted = []
+            if count > max_entries or size > max_bytes:
+                rows = conn.execute(
+                    "SELECT product_url, length(record) FROM products"
+                    " ORDER BY accessed_at"
+                )
+                for product_url, record_size in rows:
+                    if count <= max_entries and size <= max_bytes:
+                        break
+                    evicted.append((product_url, record_size))
+                    count -= 1
+                    size -= record_size
+                rows.close()
+                conn.executemany(
+                    "DELETE FROM products WHERE product_url = ?",
+                    [(product_url,) for product_url, _ in evicted],
+                )
+                conn.executemany(
+                    "DELETE FROM aliases WHERE product_url = ?",
+                    [(product_url,) for product_url, _ in evicted],
+                )
+        return evicted
+
+    def items(self):
+        rows = self._connection().execute("SELECT product_url, record FROM products")
+        return [(product_url, json.loads(record)) for product_url, record in rows]
+
+    def get_alias(self, key):
+        row = (
+            self._connection()
+            .execute(
+                "SELECT product_url, query FROM aliases WHERE query_key = ?", (key,)
+            )
+            .fetchone()
+        )
+        return tuple(row) if row else None
+
+    def put_alias(self, key, product_url, query):
+        with self._connection() as conn:
+            self._upsert_aliases(conn, [(key, product_url, query)])
+
+    def aliases(self):
+        rows = self._connection().execute(
+            "SELECT query_key, product_url, query FROM aliases"
+        )
+        return [tuple(row) for row in rows]
+
+    def import_legacy(self, entries):
+        # One transaction for the whole import instead of one per record
+        products, aliases = split_legacy_entries(entries)
+        with self._connection() as conn:
+            self._upsert_products(conn, products.items())
+            self._upsert_aliases(conn, aliases)
+        return len(products)
+
+    def purge_expired(self, cutoff):
+        with self._connection() as conn:
+            expired = [
+                row[0]
+                for row in conn.execute(
+                    "DELETE FROM products WHERE last_updated < ? RETURNING product_url",
+                    (cutoff,),
+                ).fetchall()
+            ]
+            conn.executemany(
+                "DELETE FROM aliases WHERE product_url = ?",
+                [(product_url,) for product_url in expired],
+            )
+        return expired
+
+    def close(self):
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM products").fetchone()[0]
@@ -0,0 +1,105 @@
+import atexit
+
+from backend.config.settings import (
+    CACHE_FLUSH_INTERVAL,
+    SUMMARY_CACHE_FILE,
+    SUMMARY_CACHE_MAX_ENTRIES,
+    SUMMARY_CACHE_TTL_DAYS,
+)
+from backend.normalize import normalize_query
+from backend.persistent_cache import PersistentLRUCache, fingerprint
+
+
+def canonical_ingredients(ingredients):
+    """
+    Return ingredients in a canonical form, whatever their order or spelling.
+
+    Each ingredient is reduced to its normalized name, its score and its sorted, normalized
+    concerns, and the list of these is sorted.
+
+    Args:
+        ingredients (list[dict]): Ingredients with `name`, `score` and `concerns`.
+
+    Returns:
+        list[list]: `[name, score, concerns]` of each ingredient.
+
+    Example:
+        >>> canonical_ingredients([{"name": " Fragrance", "score": 8, "concerns": ["Irritant", "Allergen"]}])
+        [['fragrance', '8', ['allergen', 'irritant']]]
+    """
+    return sorted(
+        [
+            normalize_query(str(ingredient["name"])),
+            str(ingredient["score"]).strip(),
+            sorted(normalize_query(str(c)) for c in ingredient.get("concerns") or []),
+        ]
+        for ingredient in ingredients
+    )
+
+
+def ingredient_fingerprint(ingredients):
+    """
+    Return a key identifying a set of ingredients, whatever their order or spelling.
+
+    Args:
+        ingredients (list[dict]): Ingredients with `name`, `score` and `concerns`.
+
+    Returns:
+        str: A SHA-256 hex digest of `canonical_ingredients`.
+
+    Example:
+        >>> a = [{"name": "Water", "score": 1, "concerns": []},
+        ...      {"name": "Fragrance", "score": "8", "concerns": ["Allergen", "Irritant"]}]
+        >>> b = [{"name": " FRAGRANCE", "score": 8, "concerns": ["irritant", "allergen"]},
+        ...      {"name": "water", "score": "1", "concerns": []}]
+        >>> ingredient_fingerprint(a) == ingredient_fingerprint(b)
+        True
+    """
+    return fingerprint(canonical_ingredients(ingredients))
+
+
+class SummaryCache(PersistentLRUCache):
+    """
+    Ingredient list -> AI-generated benefit summary cache for `/ingredient-summary`.
+
+    Summaries are keyed by `ingredient_fingerprint`, so the same ingredients in any order,
+    case or spacing share one entry. Entries expire, are evicted and are persisted as in
+    `PersistentLRUCache`.
+
+    Args:
+        path (str | None, optional): JSON file to persist to, or `None` to keep entries in
+            memory only. Defaults to `SUMMARY_CACHE_FILE`.
+        ttl_days (float, optional): Age after which a summary is regenerated. Defaults to
+            `SUMMARY_CACHE_TTL_DAYS`.
+        max_entries (int, optional): Entry limit. Defaults to `SUMMARY_CACHE_MAX_ENTRIES`.
+        flush_interval (float, optional): Seconds to wait before writing changes.
+
+    Example:
+        >>> summaries = SummaryCache()
+        >>> summaries.put(ingredients, ["Hydrating", "Soothing"])
+        >>> summaries.get(list(reversed(ingredients)))
+        ['Hydrating', 'Soothing']
+    """
+
+    def __init__(
+        self,
+        path=SUMMARY_CACHE_FILE,
+        ttl_days=SUMMARY_CACHE_TTL_DAYS,
+        max_entries=SUMMARY_CACHE_MAX_ENTRIES,
+        flush_interval=CACHE_FLUSH_INTERVAL,
+    ):
+        super().__init__(path, ttl_days, max_entries, flush_interval)
+
+    def get(self, ingredients):
+        """Return the cached summary of `ingredients`, or `None` if unknown or expired."""
+        summary = super().get(ingredient_fingerprint(ingredients))
+        return None if summary is None else list(summary)
+
+    def put(self, ingredients, summary):
+        """Remember the summary of `ingredients`."""
+        super().put(ingredient_fingerprint(ingredients), list(summary))
+
+
+# Shared summary cache used by /ingredient-summary
+summary_cache = SummaryCache()
+atexit.register(summary_cache.flush)
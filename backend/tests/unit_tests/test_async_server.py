@@ -0,0 +1,215 @@
+import asyncio
+import json
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from backend.async_server import create_app
+from backend.benchmarks.stream_load import (
+    FakeOllama,
+    load,
+    offline_llm,
+    serve_async,
+    serve_flask,
+)
+from backend.callback import LLMMetricsStore
+from backend.persistent_cache import PersistentLRUCache
+
+RECOMMEND_REQUEST = {
+    "product_name": "Test Product",
+    "ingredients": [
+        {"name": "Ingredient A", "score": "1", "concerns": ["Concern X"]},
+    ],
+    "user_profile": {"skinType": "Normal", "skinConcerns": "None", "allergies": "None"},
+}
+
+
+def send(method, path, **kwargs):
+    """Send one request to the async server; returns its status, headers and body."""
+
+    async def run():
+        async with TestClient(TestServer(create_app())) as client:
+            response = await client.request(method, path, **kwargs)
+            return response.status, response.headers, await response.text()
+
+    return asyncio.run(run())
+
+
+def events(body):
+    """Return the payloads of the Server-Sent Events in a response body."""
+    return [
+        json.loads(line[len("data: ") :])
+        for line in body.split("\n\n")
+        if line.startswith("data: ")
+    ]
+
+
+def astream(*chunks, error=None):
+    """Return a fake `astream` yielding `chunks`, then raising `error` if given."""
+
+    async def stream(prompt, config=None):
+        for chunk in chunks:
+            yield chunk
+        if error:
+            raise error
+
+    return stream
+
+
+@pytest.fixture
+def conversation(mocker):
+    """Fixture for the conversation chain of every session."""
+    chain = mocker.MagicMock()
+    chain.memory.buffer = "Previous conversation history"
+    mocker.patch("backend.async_server.get_or_create_conversation", return_value=chain)
+    mocker.patch("backend.server.get_or_create_conversation", return_value=chain)
+    return chain
+
+
+def test_recommend_streams_same_events_as_flask(mocker, conversation):
+    """
+    Test that /recommend streams the LLM's chunks as SSE content events and saves them to memory.
+    """
+    llm = mocker.MagicMock()
+    llm.astream = astream("Test", " response")
+    mocker.patch("backend.async_server.get_llm", return_value=llm)
+
+    status, headers, body = send(
+        "POST", "/recommend", json=dict(RECOMMEND_REQUEST, session_id="abc123DEF")
+    )
+
+    assert status == 200
+    assert headers["Content-Type"].startswith("text/event-stream")
+    assert headers["X-Session-Id"] == "abc123DEF"
+    assert body == 'data: {"content": "Test"}\n\ndata: {"content": " response"}\n\n'
+    inputs, outputs = conversation.memory.save_context.call_args.args
+    assert "Test Product" in inputs["input"]
+    assert outputs == {"output": "Test response"}
+
+
+def test_recommend_replays_cached_recommendation(mocker, conversation):
+    """
+    Test that a cached recommendation is replayed in the same format without the LLM.
+    """
+    cache = PersistentLRUCache(path=None, ttl_days=1, max_entries=100)
+    mocker.patch("backend.server.recommendation_cache", cache)
+    llm = mocker.MagicMock(model="llama3.2", temperature=0.0)
+    llm.astream = mocker.MagicMock(side_effect=astream("Test", " response"))
+    mocker.patch("backend.async_server.get_llm", return_value=llm)
+
+    _, _, first = send("POST", "/recommend", json=RECOMMEND_REQUEST)
+    _, _, second = send("POST", "/recommend", json=RECOMMEND_REQUEST)
+
+    assert second == first
+    assert [e["content"] for e in events(second)] == ["Test", " response"]
+    llm.astream.assert_called_once()
+    assert conversation.memory.save_context.call_count == 2
+
+
+def test_recommend_rejects_invalid_request():
+    """
+    Test that /recommend answers the same 400 errors as the Flask route.
+    """
+    status, _, body = send("POST", "/recommend", json={"product_name": "Test"})
+
+    assert status == 400
+    assert json.loads(body) == {"error": "Missing ingredients"}
+
+    status, _, body = send("POST", "/recommend", data="not json")
+
+    assert status == 400
+    assert json.loads(body) == {"error": "Invalid JSON body"}
+
+
+def test_chat_streams_from_session(conversation):
+    """
+    Test that /chat streams from the session's LLM with its history and saves the answer.
+    """
+    conversation.llm.astream = astream("Chat", " answer")
+
+    status, headers, body = send(
+        "POST", "/chat", json={"session_id": "abc123DEF", "message": "Is it safe?"}
+    )
+
+    assert status == 200
+    assert headers["X-Session-Id"] == "abc123DEF"
+    assert [e["content"] for e in events(body)] == ["Chat", " answer"]
+    conversation.memory.save_context.assert_called_once_with(
+        {"input": "Is it safe?"}, {"output": "Chat answer"}
+    )
+
+    status, _, body = send("POST", "/chat", json={"message": "Is it safe?"})
+
+    assert status == 400
+    assert json.loads(body) == {"error": "Missing session_id"}
+
+
+def test_stream_error_is_sent_as_event(conversation):
+    """
+    Test that an LLM failure mid-stream ends the stream with an error event.
+    """
+    conversation.llm.astream = astream("Partial", error=RuntimeError("LLM down"))
+
+    _, _, body = send(
+        "POST", "/chat", json={"session_id": "abc123DEF", "message": "Is it safe?"}
+    )
+
+    assert events(body) == [{"content": "Partial"}, {"error": "LLM down"}]
+    conversation.memory.save_context.assert_not_called()
+
+
+def test_other_routes_are_served_by_flask():
+    """
+    Test that routes without an async handler, and CORS preflights, are answered by Flask.
+    """
+    status, _, body = send("GET", "/jobs/unknown")
+
+    assert status == 404
+    assert json.loads(body) == {"error": "Unknown job"}
+
+    status, headers, _ = send(
+        "OPTIONS",
+        "/recommend",
+        headers={
+            "Origin": "http://localhost:3000",
+            "Access-Control-Request-Method": "POST",
+        },
+    )
+
+    assert status == 200
+    assert headers["Access-Control-Allow-Origin"] == "http://localhost:3000"
+
+
+def test_wsgi_write_is_sent_before_body(mocker):
+    """
+    Test that data passed to the WSGI `write` callable is sent ahead of the returned body.
+    """
+
+    def legacy_app(environ, start_response):
+        write = start_response("200 OK", [("Content-Type", "text/plain")])
+        write(b"written ")
+        return [b"returned"]
+
+    mocker.patch("backend.async_server.app", legacy_app)
+
+    status, _, body = send("GET", "/legacy")
+
+    assert (status, body) == (200, "written returned")
+
+
+def test_holds_more_concurrent_streams_than_flask_threads(mocker):
+    """
+    Test that the asyncio mode streams every client at once, while Flask is capped at its threads.
+    """
+    mocker.patch.dict("backend.server.conversation_store", clear=True)
+    mocker.patch("backend.callback.llm_metrics", LLMMetricsStore())
+    with FakeOllama(tokens=5, token_delay=0.02) as ollama, offline_llm(ollama.base_url):
+        with serve_flask(threads=2) as base_url:
+            flask = load(base_url, 8, ollama)
+        with serve_async() as base_url:
+            asyncio_mode = load(base_url, 8, ollama)
+
+    assert flask["completed"] == asyncio_mode["completed"] == 8
+    assert flask["peak_generations"] <= 2
+    assert asyncio_mode["peak_generations"] == 8
+    assert asyncio_mode["seconds"] < flask["seconds"]
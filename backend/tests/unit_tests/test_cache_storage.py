@@ -0,0 +1,595 @@
+import json
+import multiprocessing
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend import cache, storage
+from backend.cache import (
+    cache_product_data,
+    get_cache_stats,
+    get_cached_product,
+    get_eviction_stats,
+    migrate_json_cache,
+    purge_expired_products,
+)
+from backend.eviction import SegmentedLRU
+from backend.storage import JournalStorage, JsonFileStorage, SQLiteStorage, save_cache
+
+URL = "https://www.ewg.org/skindeep/products/123456-CeraVe_Moisturizing_Cream/"
+PRODUCT = {
+    "product_url": URL,
+    "product_name": "CeraVe Moisturizing Cream",
+    "ingredients": [{"name": "Water", "score": "1", "concerns": []}],
+}
+
+
+def record(last_updated, product_url=URL):
+    return dict(PRODUCT, product_url=product_url, last_updated=last_updated)
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "product_cache.json")
+
+
+@pytest.fixture
+def shared_cache(mocker, cache_path):
+    """Replace the module-level cache with one backed by a temporary file."""
+    product_cache = JsonFileStorage(cache_path, flush_interval=60, flush_threshold=100)
+    mocker.patch.object(cache, "product_cache", product_cache)
+    mocker.patch.object(cache, "_stats", cache.Counter())
+    mocker.patch.object(cache, "eviction_policy", SegmentedLRU(3, 1024 * 1024))
+    mocker.patch.object(cache, "_tracking", {"seeded": False, "last_purge": 0})
+    mocker.patch.object(cache, "CACHE_PURGE_INTERVAL", float("inf"))
+    return product_cache
+
+
+def test_cache_file_is_loaded_once(mocker, cache_path):
+    """
+    Test that repeated lookups are served from memory instead of re-reading the file.
+    """
+    save_cache({"CeraVe": record("2025-03-01T12:00:00")}, cache_path)
+    mock_load = mocker.patch("backend.storage.load_cache", wraps=storage.load_cache)
+
+    product_cache = JsonFileStorage(cache_path)
+    for _ in range(5):
+        assert product_cache.get(URL)["product_name"] == PRODUCT["product_name"]
+
+    mock_load.assert_called_once()
+
+
+def test_legacy_json_is_converted(cache_path):
+    """
+    Test that a query-keyed legacy cache file is split into products and aliases.
+    """
+    save_cache(
+        {
+            "CeraVe": record("2025-03-01T12:00:00"),
+            "CeraVe Moisturizing Cream": record("2025-03-02T12:00:00"),
+        },
+        cache_path,
+    )
+
+    product_cache = JsonFileStorage(cache_path)
+    assert product_cache.items() == [(URL, record("2025-03-02T12:00:00"))]
+    assert product_cache.get_alias("cerave") == (URL, "CeraVe")
+    assert product_cache.get_alias("cerave moisturizing cream") == (
+        URL,
+        "CeraVe Moisturizing Cream",
+    )
+
+
+def test_put_is_written_behind(cache_path):
+    """
+    Test that inserts are not written to disk until the cache is flushed.
+    """
+    product_cache = JsonFileStorage(cache_path, flush_interval=60, flush_threshold=100)
+    product_cache.put(URL, PRODUCT)
+    product_cache.put_alias("cerave", URL, "CeraVe")
+
+    assert product_cache.get(URL) == PRODUCT
+    with pytest.raises(FileNotFoundError):
+        open(cache_path)
+
+    product_cache.flush()
+    with open(cache_path) as f:
+        assert json.load(f) == {
+            "products": {URL: PRODUCT},
+            "aliases": {"cerave": [URL, "CeraVe"]},
+        }
+
+
+def test_flush_on_dirty_threshold(cache_path):
+    """
+    Test that reaching the dirty-count threshold flushes pending changes immediately.
+    """
+    product_cache = JsonFileStorage(cache_path, flush_interval=60, flush_threshold=3)
+    for i in range(3):
+        product_cache.put(f"{URL}{i}", PRODUCT)
+
+    with open(cache_path) as f:
+        assert len(json.load(f)["products"]) == 3
+
+
+def test_flush_leaves_no_temp_files(tmp_path, cache_path):
+    """
+    Test that the atomic write replaces the cache file without leaving temp files behind.
+    """
+    product_cache = JsonFileStorage(cache_path, flush_interval=60, flush_threshold=1)
+    product_cache.put(URL, PRODUCT)
+    product_cache.put_alias("cerave", URL, "CeraVe")
+
+    assert [p.name for p in tmp_path.iterdir()] == ["product_cache.json"]
+
+
+def test_get_cached_product_round_trip(shared_cache):
+    """
+    Test that `cache_product_data` and `get_cached_product` work against the shared cache.
+    """
+    cache_product_data("CeraVe", dict(PRODUCT))
+    cached = get_cached_product("CeraVe")
+
+    assert cached["product_url"] == PRODUCT["product_url"]
+    assert "last_updated" in cached
+    assert get_cached_product("Unknown") is None
+
+
+def test_get_cached_product_normalizes_query(shared_cache):
+    """
+    Test that differently cased, spaced or punctuated queries hit the same product.
+    """
+    cache_product_data("CeraVe", dict(PRODUCT))
+
+    assert get_cached_product("cerave ")["product_url"] == URL
+    assert get_cached_product("  CERAVE!")["product_url"] == URL
+    assert get_cached_product("CeraVe Cream") is None
+
+
+def test_cache_stats_split_exact_and_alias_hits(shared_cache):
+    """
+    Test that exact hits and alias-only hits are reported separately.
+    """
+    cache_product_data("CeraVe", dict(PRODUCT))
+    get_cached_product("CeraVe")
+    get_cached_product("cerave")
+    get_cached_product("Unknown")
+    get_cached_product("CeraVe")
+
+    stats = get_cache_stats()
+    assert stats["lookups"] == 4
+    assert stats["exact_hits"] == 2
+    assert stats["alias_hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["exact_hit_rate"] == 0.5
+    assert stats["alias_hit_rate"] == 0.25
+
+
+def test_get_cached_product_expired(shared_cache):
+    """
+    Test that entries older than `max_age_days` are treated as a cache miss.
+    """
+    expired = dict(PRODUCT)
+    expired["last_updated"] = (datetime.now() - timedelta(days=8)).isoformat()
+    shared_cache.put(URL, expired)
+    shared_cache.put_alias("cerave", URL, "CeraVe")
+
+    assert get_cached_product("CeraVe") is None
+    assert get_cached_product("CeraVe", max_age_days=30) is not None
+
+
+def test_get_cached_product_stale_within_grace(shared_cache):
+    """
+    Test that expired entries inside the grace window are returned flagged as stale.
+    """
+    expired = dict(PRODUCT)
+    expired["last_updated"] = (datetime.now() - timedelta(days=8)).isoformat()
+    shared_cache.put(URL, expired)
+    shared_cache.put_alias("cerave", URL, "CeraVe")
+
+    stale = get_cached_product("CeraVe", max_age_days=7, stale_grace_days=2)
+    assert stale["stale"] is True
+    assert stale["product_url"] == URL
+    assert "stale" not in shared_cache.get(URL)  # The stored record is untouched
+    assert get_cached_product("CeraVe", max_age_days=7, stale_grace_days=0.5) is None
+    assert get_cache_stats()["stale_hits"] == 1
+
+
+def test_cache_product_data_evicts_beyond_max_entries(shared_cache):
+    """
+    Test that inserting past the entry limit removes the evicted product from storage.
+    """
+    for i in range(4):
+        cache_product_data(f"product {i}", record("", f"{URL}{i}"))
+
+    assert len(shared_cache) == 3
+    assert shared_cache.get(f"{URL}0") is None
+    assert get_cached_product("product 0") is None
+    assert get_eviction_stats()["evictions"] == 1
+
+
+def test_popular_product_survives_long_tail(shared_cache):
+    """
+    Test that a product requested again is not pushed out by a stream of one-off queries.
+    """
+    cache_product_data("CeraVe", dict(PRODUCT))
+    assert get_cached_product("CeraVe") is not None  # Promoted to the protected segment
+
+    for i in range(10):
+        cache_product_data(f"one-off {i}", record("", f"{URL}{i}"))
+
+    assert get_cached_product("CeraVe") is not None
+    assert len(shared_cache) == 3
+
+
+def test_existing_products_seed_the_eviction_policy(shared_cache):
+    """
+    Test that products already in storage count towards the limits, oldest evicted first.
+    """
+    for i in range(5):
+        shared_cache.put(f"{URL}{i}", record(f"2025-03-0{i + 1}T12:00:00", f"{URL}{i}"))
+
+    cache_product_data("CeraVe", dict(PRODUCT))
+
+    assert sorted(url for url, _ in shared_cache.items()) == [
+        URL,
+        f"{URL}3",
+        f"{URL}4",
+    ]
+
+
+def test_purge_expired_products(shared_cache):
+    """
+    Test that expired products are purged from storage and from the eviction policy.
+    """
+    old = (datetime.now() - timedelta(days=30)).isoformat()
+    shared_cache.put(f"{URL}old", record(old, f"{URL}old"))
+    cache_product_data("CeraVe", dict(PRODUCT))
+
+    assert purge_expired_products(max_age_days=14) == 1
+    assert [url for url, _ in shared_cache.items()] == [URL]
+    stats = get_eviction_stats()
+    assert stats["entries"] == 1
+    assert stats["expired_purged"] == 1
+
+
+@pytest.fixture
+def sqlite_storage(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "product_cache.db"))
+    yield storage
+    storage.close()
+
+
+def test_sqlite_round_trip(sqlite_storage):
+    """
+    Test that records survive a round trip through SQLite and are replaced on re-insert.
+    """
+    sqlite_storage.put("CeraVe", record("2025-03-01T12:00:00"))
+    sqlite_storage.put("CeraVe", record("2025-03-02T12:00:00"))
+
+    assert sqlite_storage.get("CeraVe") == record("2025-03-02T12:00:00")
+    assert sqlite_storage.get("Unknown") is None
+    assert len(sqlite_storage) == 1
+
+    sqlite_storage.delete("CeraVe")
+    assert sqlite_storage.get("CeraVe") is None
+
+
+def test_sqlite_uses_wal_and_expiry_index(sqlite_storage):
+    """
+    Test that the database runs in WAL mode and expiry purges use the `last_updated` index.
+    """
+    conn = sqlite_storage._connection()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    plan = conn.execute(
+        "EXPLAIN QUERY PLAN DELETE FROM products WHERE last_updated < ?", ("x",)
+    ).fetchall()
+    assert "idx_products_last_updated" in str(plan)
+
+
+def test_sqlite_purge_expired(sqlite_storage):
+    """
+    Test that `purge_expired` removes only records older than the cutoff.
+    """
+    sqlite_storage.put("old", record("2025-01-01T00:00:00"))
+    sqlite_storage.put("new", record("2025-03-01T00:00:00"))
+
+    assert sqlite_storage.purge_expired("2025-02-01T00:00:00") == ["old"]
+    assert [key for key, _ in sqlite_storage.items()] == ["new"]
+
+
+def test_sqlite_shared_between_connections(tmp_path):
+    """
+    Test that a write from one storage instance is visible to another (e.g. another worker).
+    """
+    path = str(tmp_path / "product_cache.db")
+    writer, reader = SQLiteStorage(path), SQLiteStorage(path)
+
+    writer.put("CeraVe", record("2025-03-01T12:00:00"))
+    assert reader.get("CeraVe")["product_name"] == PRODUCT["product_name"]
+
+    writer.close()
+    reader.close()
+
+
+def _put_products(path, worker, count):
+    # Runs in a separate process, as a server worker would
+    storage = SQLiteStorage(path)
+    for i in range(count):
+        url = f"https://www.ewg.org/skindeep/products/{worker}{i:04d}-Product/"
+        storage.put(url, record("2025-03-01T12:00:00", url))
+    storage.close()
+
+
+def test_sqlite_shared_between_processes(tmp_path):
+    """
+    Test that products written concurrently by two worker processes are all kept and visible.
+    """
+    path = str(tmp_path / "product_cache.db")
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(target=_put_products, args=(path, worker, 200))
+        for worker in (1, 2)
+    ]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(60)
+
+    assert [process.exitcode for process in workers] == [0, 0]
+    storage = SQLiteStorage(path)
+    assert len(storage) == 400
+    assert storage.get("https://www.ewg.org/skindeep/products/20199-Product/")
+    storage.close()
+
+
+def test_sqlite_imports_legacy_json_once(tmp_path, cache_path):
+    """
+    Test that an existing JSON cache is imported into a new database, lazily and only once.
+    """
+    save_cache({"CeraVe": record("2025-03-01T12:00:00")}, cache_path)
+    path = str(tmp_path / "product_cache.db")
+
+    database = SQLiteStorage(path, legacy_path=cache_path)
+    assert not (tmp_path / "product_cache.db").exists()
+    assert database.get(URL) == record("2025-03-01T12:00:00")
+    database.delete(URL)
+    database.close()
+
+    assert len(SQLiteStorage(path, legacy_path=cache_path)) == 0
+
+
+def test_migrate_json_cache(tmp_path, cache_path, sqlite_storage):
+    """
+    Test the one-shot migration of an existing `product_cache.json` into SQLite.
+    """
+    other_url = "https://www.ewg.org/skindeep/products/654321-La_Roche_Posay/"
+    save_cache(
+        {
+            "CeraVe": record("2025-03-01T12:00:00"),
+            "La Roche-Posay": record("2025-03-02T12:00:00", other_url),
+        },
+        cache_path,
+    )
+
+    assert migrate_json_cache(cache_path, sqlite_storage) == 2
+    assert sqlite_storage.get(other_url) == record("2025-03-02T12:00:00", other_url)
+    assert sqlite_storage.get_alias("la roche posay") == (other_url, "La Roche-Posay")
+
+
+def test_sqlite_aliases_follow_products(sqlite_storage):
+    """
+    Test that aliases are replaced on re-insert and removed with their product.
+    """
+    other_url = "https://www.ewg.org/skindeep/products/654321-La_Roche_Posay/"
+    sqlite_storage.put(URL, record("2025-03-01T12:00:00"))
+    sqlite_storage.put(other_url, record("2025-03-01T12:00:00", other_url))
+    sqlite_storage.put_alias("cerave", URL, "CeraVe")
+    sqlite_storage.put_alias("cerave", other_url, "cerave")
+
+    assert sqlite_storage.get_alias("cerave") == (other_url, "cerave")
+
+    sqlite_storage.delete(other_url)
+    assert sqlite_storage.get_alias("cerave") is None
+    assert sqlite_storage.aliases() == []
+
+
+def test_sqlite_evicts_least_recently_used(sqlite_storage, mocker):
+    """
+    Test that eviction removes the least recently written or read products, and their aliases.
+    """
+    mock_time = mocker.patch("backend.storage.time.time")
+    for i in range(4):
+        mock_time.return_value = i
+        sqlite_storage.put(f"{URL}{i}", record("2025-03-01T12:00:00", f"{URL}{i}"))
+        sqlite_storage.put_alias(f"product {i}", f"{URL}{i}", f"product {i}")
+    mock_time.return_value = 10
+    sqlite_storage.touch(f"{URL}0")
+
+    evicted = sqlite_storage.evict(max_entries=2, max_bytes=1024 * 1024)
+
+    assert [url for url, _ in evicted] == [f"{URL}1", f"{URL}2"]
+    assert sorted(url for url, _ in sqlite_storage.items()) == [f"{URL}0", f"{URL}3"]
+    assert sqlite_storage.get_alias("product 1") is None
+
+    size = sqlite_storage.usage()[1]
+    assert len(sqlite_storage.evict(max_entries=2, max_bytes=size - 1)) == 1
+    assert sqlite_storage.items()[0][0] == f"{URL}0"
+
+
+def test_sqlite_size_bound_holds_across_workers(tmp_path, mocker):
+    """
+    Test that workers sharing a database bound it together and respect each other's reads.
+    """
+    path = str(tmp_path / "product_cache.db")
+    first, second = SQLiteStorage(path), SQLiteStorage(path)
+    mocker.patch.object(cache, "_stats", cache.Counter())
+    mocker.patch.object(cache, "CACHE_MAX_ENTRIES", 3)
+    mocker.patch.object(cache, "CACHE_PURGE_INTERVAL", float("inf"))
+
+    mocker.patch.object(cache, "product_cache", first)
+    cache_product_data("CeraVe", dict(PRODUCT))
+    for i in range(2):
+        cache_product_data(f"first {i}", record("", f"{URL}first{i}"))
+    assert get_cached_product("CeraVe") is not None  # Read by the first worker only
+
+    mocker.patch.object(cache, "product_cache", second)
+    for i in range(2):
+        cache_product_data(f"second {i}", record("", f"{URL}second{i}"))
+
+    assert len(first) == 3
+    assert first.get(URL) is not None
+    assert first.get(f"{URL}first0") is None
+    assert get_eviction_stats()["evictions"] == 2
+    first.close()
+    second.close()
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / "product_cache.jsonl")
+
+
+def test_journal_appends_one_line_per_write(journal_path):
+    """
+    Test that each insert or delete appends exactly one line to the journal.
+    """
+    journal = JournalStorage(journal_path, compact_min_dead=100)
+    journal.put("CeraVe", record("2025-03-01T12:00:00"))
+    journal.put("La Roche-Posay", record("2025-03-01T12:00:00"))
+    journal.delete("CeraVe")
+
+    with open(journal_path) as f:
+        ops = [json.loads(line)["op"] for line in f]
+    assert ops == ["put", "put", "del"]
+
+
+def test_journal_replay_rebuilds_index(journal_path):
+    """
+    Test that a fresh instance replays the journal into the same index.
+    """
+    journal = JournalStorage(journal_path, compact_min_dead=100)
+    journal.put("CeraVe", record("2025-03-01T12:00:00"))
+    journal.put("CeraVe", record("2025-03-02T12:00:00"))
+    journal.put("La Roche-Posay", record("2025-03-01T12:00:00"))
+    journal.delete("La Roche-Posay")
+    journal.close()
+
+    replayed = JournalStorage(journal_path, compact_min_dead=100)
+    assert replayed.items() == [("CeraVe", record("2025-03-02T12:00:00"))]
+    stats = replayed.compaction_stats()
+    assert stats["live_records"] == 1
+    assert stats["dead_records"] == 3
+
+
+def test_journal_ignores_torn_write(journal_path):
+    """
+    Test that a partially written last line (e.g. after a crash) is dropped on replay.
+    """
+    journal = JournalStorage(journal_path, compact_min_dead=100)
+    journal.put("CeraVe", record("2025-03-01T12:00:00"))
+    journal.close()
+    with open(journal_path, "a") as f:
+        f.write('{"op": "put", "key": "La Roche')
+
+    replayed = JournalStorage(journal_path, compact_min_dead=100)
+    assert [key for key, _ in replayed.items()] == ["CeraVe"]
+
+    replayed.put("La Roche-Posay", record("2025-03-01T12:00:00"))
+    replayed.close()
+    assert len(JournalStorage(journal_path)) == 2
+
+
+def test_journal_compaction(journal_path):
+    """
+    Test that compaction keeps only live records and reports the reclaimed bytes.
+    """
+    journal = JournalStorage(journal_path, compact_min_dead=1000)
+    for day in range(1, 10):
+        journal.put("CeraVe", record(f"2025-03-0{day}T12:00:00"))
+    size_before = journal.compaction_stats()["journal_bytes"]
+
+    journal.compact()
+
+    stats = journal.compaction_stats()
+    assert stats["live_records"] == 1
+    assert stats["dead_records"] == 0
+    assert stats["compactions"] == 1
+    assert stats["bytes_reclaimed"] == size_before - stats["journal_bytes"]
+    assert JournalStorage(journal_path).get("CeraVe") == record("2025-03-09T12:00:00")
+
+
+def test_journal_compacts_in_background(journal_path, mocker):
+    """
+    Test that crossing the dead-record threshold starts a background compaction.
+    """
+    mock_thread = mocker.patch("backend.storage.threading.Thread")
+    journal = JournalStorage(journal_path, compact_min_dead=3, compact_ratio=0.5)
+    for _ in range(3):
+        journal.put("CeraVe", record("2025-03-01T12:00:00"))
+    mock_thread.assert_not_called()
+
+    journal.put("CeraVe", record("2025-03-01T12:00:00"))
+    mock_thread.assert_called_once_with(target=journal.compact, daemon=True)
+
+
+def test_journal_imports_legacy_json(journal_path, cache_path):
+    """
+    Test that an existing `product_cache.json` seeds a new journal.
+    """
+    save_cache({"CeraVe": record("2025-03-01T12:00:00")}, cache_path)
+
+    journal = JournalStorage(journal_path, legacy_path=cache_path)
+    assert journal.get(URL) == record("2025-03-01T12:00:00")
+    journal.close()
+    assert JournalStorage(journal_path).get_alias("cerave") == (URL, "CeraVe")
+
+
+def test_journal_replays_aliases(journal_path):
+    """
+    Test that alias lines are replayed and aliases of deleted products are dropped.
+    """
+    other_url = "https://www.ewg.org/skindeep/products/654321-La_Roche_Posay/"
+    journal = JournalStorage(journal_path, compact_min_dead=100)
+    journal.put(URL, record("2025-03-01T12:00:00"))
+    journal.put(other_url, record("2025-03-01T12:00:00", other_url))
+    journal.put_alias("cerave", URL, "CeraVe")
+    journal.put_alias("cerave", URL, "cerave")  # Same product: nothing to append
+    journal.put_alias("la roche posay", other_url, "La Roche-Posay")
+    journal.delete(other_url)
+    journal.close()
+
+    with open(journal_path) as f:
+        assert len(f.readlines()) == 5
+
+    replayed = JournalStorage(journal_path, compact_min_dead=100)
+    assert replayed.aliases() == [("cerave", URL, "CeraVe")]
+    assert replayed.compaction_stats()["dead_records"] == 3
+
+
+@pytest.mark.parametrize("backend", ["json", "journal", "sqlite"])
+def test_deleted_product_takes_its_aliases(tmp_path, backend):
+    """
+    Test that every backend deletes a product's aliases with it, so a re-insert starts without them.
+    """
+    path = tmp_path / "product_cache"
+    open_storage = {
+        "json": lambda: JsonFileStorage(str(path), flush_interval=0),
+        "journal": lambda: JournalStorage(str(path)),
+        "sqlite": lambda: SQLiteStorage(str(path)),
+    }[backend]
+    storage_backend = open_storage()
+    storage_backend.put(URL, record("2025-03-01T12:00:00"))
+    storage_backend.put_alias("cerave", URL, "CeraVe")
+
+    storage_backend.delete(URL)
+    assert storage_backend.get_alias("cerave") is None
+
+    storage_backend.put(URL, record("2025-03-02T12:00:00"))
+    storage_backend.close()
+
+    reopened = open_storage()
+    assert reopened.get(URL)["last_updated"] == "2025-03-02T12:00:00"
+    assert reopened.get_alias("cerave") is None
+    assert reopened.aliases() == []
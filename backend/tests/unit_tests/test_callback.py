@@ -0,0 +1,98 @@
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessageChunk
+from langchain_core.outputs import ChatGenerationChunk, LLMResult
+
+from backend.callback import (
+    COUNT_BOUNDS,
+    LATENCY_BOUNDS,
+    Histogram,
+    LLMMetricsStore,
+    MetricsCallbackHandler,
+    _token_counts,
+)
+
+
+def test_histogram_summary():
+    """
+    Test that the histogram reports count, mean, extremes and bucket-interpolated percentiles.
+    """
+    histogram = Histogram(COUNT_BOUNDS)
+    for value in range(1, 101):
+        histogram.observe(value)
+
+    summary = histogram.summary()
+
+    assert summary["count"] == 100
+    assert summary["mean"] == pytest.approx(50.5)
+    assert summary["min"] == 1 and summary["max"] == 100
+    assert 32 <= summary["p50"] <= 64
+    assert 64 <= summary["p90"] <= 100
+    assert Histogram(LATENCY_BOUNDS).summary() == {"count": 0}
+
+
+def test_store_query_filters_by_endpoint_and_model():
+    """
+    Test that metrics are kept per endpoint and model and can be queried for either.
+    """
+    store = LLMMetricsStore()
+    store.observe("recommend", "llama3.2", ttft_seconds=0.5, completion_tokens=100)
+    store.observe("chat", "llama3.2", ttft_seconds=0.2)
+    store.record_error("chat", "mistral")
+
+    assert set(store.query()) == {"recommend", "chat"}
+    recommend = store.query(endpoint="recommend")
+    assert recommend["recommend"]["llama3.2"]["ttft_seconds"]["p50"] == 0.5
+    assert recommend["recommend"]["llama3.2"]["generations"] == 1
+    mistral = store.query(model="mistral")
+    assert list(mistral) == ["chat"] and list(mistral["chat"]) == ["mistral"]
+    assert mistral["chat"]["mistral"]["errors"] == 1
+
+
+def test_handler_measures_streamed_generation():
+    """
+    Test that a streamed generation records time to first token, gaps and token counts.
+    """
+    store = LLMMetricsStore()
+    llm = FakeListChatModel(
+        responses=["Looks safe"], callbacks=[MetricsCallbackHandler(store)]
+    )
+
+    chunks = list(llm.stream("Is it safe?", config={"metadata": {"endpoint": "chat"}}))
+
+    series = store.query(endpoint="chat")["chat"]["unknown"]
+    assert series["generations"] == 1
+    assert series["ttft_seconds"]["count"] == 1
+    assert series["inter_token_seconds"]["count"] == len(chunks) - 1
+    assert series["completion_tokens"]["max"] == len(chunks)
+    assert series["duration_seconds"]["max"] >= series["ttft_seconds"]["max"]
+
+
+def test_handler_counts_errors():
+    """
+    Test that a failed generation is counted as an error, not as a generation.
+    """
+    store = LLMMetricsStore()
+    handler = MetricsCallbackHandler(store)
+
+    handler.on_chat_model_start(
+        {}, [], run_id="run", metadata={"endpoint": "recommend", "ls_model_name": "m"}
+    )
+    handler.on_llm_error(RuntimeError("connection refused"), run_id="run")
+
+    assert store.query()["recommend"]["m"]["errors"] == 1
+    assert store.query()["recommend"]["m"]["generations"] == 0
+
+
+def test_token_counts_from_usage_metadata():
+    """
+    Test that prompt and completion token counts are read from the model's usage report.
+    """
+    message = AIMessageChunk(
+        content="",
+        usage_metadata={"input_tokens": 120, "output_tokens": 80, "total_tokens": 200},
+    )
+    response = LLMResult(generations=[[ChatGenerationChunk(message=message)]])
+
+    assert _token_counts(response) == (120, 80)
+    assert _token_counts(LLMResult(generations=[[]])) == (None, None)
@@ -0,0 +1,217 @@
+import threading
+from unittest.mock import MagicMock, PropertyMock
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+from backend import driver_pool as driver_pool_module
+from backend.driver_pool import (
+    BLOCKED_URL_PATTERNS,
+    DriverPool,
+    chrome_options,
+    create_driver,
+    resolve_driver_path,
+)
+from backend.upstream import UpstreamUnavailable
+
+
+@pytest.fixture
+def factory():
+    """Fixture for a driver factory that hands out fresh mock drivers."""
+    return MagicMock(side_effect=lambda: MagicMock())
+
+
+def test_reuses_warm_driver(factory):
+    """
+    Test that consecutive sessions reuse the same browser instead of starting a new one.
+    """
+    pool = DriverPool(size=2, max_uses=10, factory=factory)
+
+    with pool.session() as first:
+        pass
+    with pool.session() as second:
+        pass
+
+    assert first is second
+    assert factory.call_count == 1
+    first.quit.assert_not_called()
+    assert pool.stats()["reused"] == 1
+
+
+def test_recycles_driver_after_max_uses(factory):
+    """
+    Test that a driver is quit and replaced once it has served `max_uses` sessions.
+    """
+    pool = DriverPool(size=1, max_uses=2, factory=factory)
+
+    with pool.session() as first:
+        pass
+    with pool.session() as again:
+        pass
+    with pool.session() as replacement:
+        pass
+
+    assert again is first
+    assert replacement is not first
+    first.quit.assert_called_once()
+    assert pool.stats()["recycled"] == 1
+
+
+def test_replaces_driver_after_crash(factory):
+    """
+    Test that a WebDriverException inside a session discards the driver.
+    """
+    pool = DriverPool(size=1, factory=factory)
+
+    with pytest.raises(WebDriverException):
+        with pool.session() as crashed:
+            raise WebDriverException("chrome not reachable")
+    with pool.session() as driver:
+        pass
+
+    crashed.quit.assert_called_once()
+    assert driver is not crashed
+    assert pool.stats()["live"] == 1
+
+
+def test_replaces_driver_behind_upstream_failure(factory):
+    """
+    Test that a WebDriverException wrapped in UpstreamUnavailable still discards the driver.
+    """
+    pool = DriverPool(size=1, factory=factory)
+
+    with pytest.raises(UpstreamUnavailable):
+        with pool.session() as crashed:
+            try:
+                raise WebDriverException("unknown error: net::ERR_CONNECTION_RESET")
+            except WebDriverException as e:
+                raise UpstreamUnavailable("EWG request failed") from e
+    with pool.session() as driver:
+        pass
+
+    crashed.quit.assert_called_once()
+    assert driver is not crashed
+
+
+def test_health_check_skips_dead_idle_driver(factory):
+    """
+    Test that an idle driver whose browser died is replaced on checkout.
+    """
+    pool = DriverPool(size=1, factory=factory)
+    with pool.session() as dead:
+        pass
+    type(dead).current_url = PropertyMock(side_effect=WebDriverException("gone"))
+
+    with pool.session() as driver:
+        pass
+
+    assert driver is not dead
+    assert factory.call_count == 2
+
+
+def test_waits_for_a_free_driver(factory):
+    """
+    Test that checkouts beyond the pool size wait for a driver to be released.
+    """
+    pool = DriverPool(size=1, acquire_timeout=5, factory=factory)
+    driver = pool.acquire()
+    acquired = []
+
+    waiter = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+    waiter.start()
+    waiter.join(0.1)
+    assert acquired == []  # Still waiting
+
+    pool.release(driver)
+    waiter.join(5)
+    assert acquired == [driver]
+    assert factory.call_count == 1
+
+
+def test_acquire_times_out_when_exhausted(factory):
+    """
+    Test that a checkout fails once `acquire_timeout` passes with every driver busy.
+    """
+    pool = DriverPool(size=1, acquire_timeout=0.05, factory=factory)
+    pool.acquire()
+
+    with pytest.raises(RuntimeError, match="Timed out"):
+        pool.acquire()
+
+
+def test_warm_and_shutdown():
+    """
+    Test that warm() pre-starts drivers and shutdown() quits them.
+    """
+    started = []
+    pool = DriverPool(
+        size=3, factory=lambda: started.append(MagicMock()) or started[-1]
+    )
+
+    assert pool.warm(2) == 2
+    assert pool.stats()["idle"] == 2
+
+    pool.shutdown()
+    assert pool.stats()["live"] == 0
+    assert all(driver.quit.called for driver in started)
+    with pytest.raises(RuntimeError, match="shut down"):
+        pool.acquire()
+
+
+def test_driver_path_is_resolved_once(mocker):
+    """
+    Test that chromedriver is only looked up by ChromeDriverManager once per process.
+    """
+    mocker.patch.dict(driver_pool_module._driver_path, {"path": None})
+    manager = mocker.patch("backend.driver_pool.ChromeDriverManager")
+    manager.return_value.install.return_value = "/tmp/chromedriver"
+
+    assert resolve_driver_path() == "/tmp/chromedriver"
+    assert resolve_driver_path() == "/tmp/chromedriver"
+    manager.return_value.install.assert_called_once()
+
+
+def test_lean_chrome_options():
+    """
+    Test that the lean profile loads eagerly without images, extensions or background networking.
+    """
+    options = chrome_options(lean=True, cache_dir="")
+
+    assert options.page_load_strategy == "eager"
+    assert "--disable-extensions" in options.arguments
+    assert "--disable-background-networking" in options.arguments
+    assert (
+        options.experimental_options["prefs"][
+            "profile.managed_default_content_settings.images"
+        ]
+        == 2
+    )
+    assert not any(a.startswith("--disk-cache-dir") for a in options.arguments)
+
+
+def test_default_chrome_options_with_disk_cache(tmp_path):
+    """
+    Test that the plain profile keeps the normal load strategy and can use a persistent cache.
+    """
+    options = chrome_options(lean=False, cache_dir=str(tmp_path))
+
+    assert options.page_load_strategy == "normal"
+    assert "--disable-extensions" not in options.arguments
+    assert f"--disk-cache-dir={tmp_path}" in options.arguments
+
+
+def test_create_driver_blocks_resources(mocker):
+    """
+    Test that lean sessions block images, fonts, stylesheets and trackers through CDP.
+    """
+    mocker.patch("backend.driver_pool.resolve_driver_path", return_value="chromedriver")
+    mocker.patch("backend.driver_pool.Service")
+    chrome = mocker.patch("backend.driver_pool.webdriver.Chrome")
+
+    driver = create_driver(lean=True)
+
+    driver.execute_cdp_cmd.assert_any_call(
+        "Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS}
+    )
+    create_driver(lean=False)
+    assert chrome.return_value.execute_cdp_cmd.call_count == 2  # Only the lean session
@@ -0,0 +1,93 @@
+from backend.eviction import SegmentedLRU
+
+
+def test_evicts_least_recently_used_first():
+    """
+    Test that the least recently admitted key is evicted once the entry limit is exceeded.
+    """
+    policy = SegmentedLRU(max_entries=3, max_bytes=1024)
+    for key in ["a", "b", "c"]:
+        assert policy.admit(key, 10) == []
+
+    assert policy.admit("d", 10) == ["a"]
+    assert policy.stats()["entries"] == 3
+
+
+def test_evicts_by_byte_size():
+    """
+    Test that keys are evicted until the total size fits the byte limit.
+    """
+    policy = SegmentedLRU(max_entries=100, max_bytes=250)
+    policy.admit("a", 100)
+    policy.admit("b", 100)
+
+    assert policy.admit("c", 120) == ["a"]
+    assert policy.admit("d", 200) == ["b", "c"]
+    stats = policy.stats()
+    assert stats["bytes"] == 200
+    assert stats["evicted_bytes"] == 320
+
+
+def test_repeated_keys_are_protected_from_one_off_keys():
+    """
+    Test that keys hit more than once survive a long tail of keys seen only once.
+    """
+    policy = SegmentedLRU(max_entries=5, max_bytes=1024 * 1024, protected_ratio=0.6)
+    for key in ["popular 1", "popular 2"]:
+        policy.admit(key, 10)
+        policy.touch(key)
+
+    evicted = []
+    for i in range(50):
+        evicted += policy.admit(f"one-off {i}", 10)
+
+    assert "popular 1" not in evicted
+    assert "popular 2" not in evicted
+    assert len(evicted) == 47
+
+
+def test_protected_segment_demotes_when_full():
+    """
+    Test that the protected segment is capped and demotes its least recently used key.
+    """
+    policy = SegmentedLRU(max_entries=4, max_bytes=1024, protected_ratio=0.5)
+    for key in ["a", "b", "c"]:
+        policy.admit(key, 10)
+        policy.touch(key)
+
+    stats = policy.stats()
+    assert stats["protected_entries"] == 2
+    assert stats["demotions"] == 1
+
+    # "a" was demoted back to probation, so it is the next victim
+    policy.admit("d", 10)
+    assert policy.admit("e", 10) == ["a"]
+
+
+def test_replacing_a_key_updates_its_size():
+    """
+    Test that re-admitting a key replaces its size instead of adding it twice.
+    """
+    policy = SegmentedLRU(max_entries=10, max_bytes=1024)
+    policy.admit("a", 100)
+    policy.admit("a", 300)
+
+    assert policy.stats()["entries"] == 1
+    assert policy.stats()["bytes"] == 300
+
+
+def test_discard():
+    """
+    Test that discarded keys no longer count towards the limits.
+    """
+    policy = SegmentedLRU(max_entries=10, max_bytes=1024)
+    policy.admit("a", 100)
+    policy.touch("a")
+    policy.admit("b", 100)
+
+    policy.discard("a")
+    policy.discard("b")
+    policy.discard("missing")
+
+    assert policy.stats()["entries"] == 0
+    assert policy.stats()["bytes"] == 0
@@ -0,0 +1,308 @@
+import json
+import threading
+
+import pytest
+
+from backend.jobs import JobQueue, JobQueueFull
+from backend.server import app
+
+PRODUCT = {
+    "product_url": "https://www.ewg.org/skindeep/products/123456-CeraVe_Moisturizing_Cream/",
+    "product_name": "CeraVe Moisturizing Cream",
+    "ingredients": [{"name": "Water", "score": "1", "concerns": []}],
+}
+
+
+@pytest.fixture
+def client():
+    """
+    Flask test client for calling endpoints.
+    """
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.fixture
+def jobs(mocker):
+    """
+    Fresh scrape job queue for each test.
+    """
+    return mocker.patch("backend.server.scrape_jobs", JobQueue(workers=1, timeout=5))
+
+
+def test_get_ingredients_missing_product(client):
+    """
+    Test error response when the product query parameter is missing.
+    """
+    response = client.get("/get_ingredients")
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "Missing product name"
+
+
+def test_get_ingredients_fresh(client, mocker):
+    """
+    Test that cached results are returned synchronously with `stale` set to false.
+    """
+    mocker.patch("backend.server.lookup_known_product", return_value=dict(PRODUCT))
+
+    response = client.get("/get_ingredients?product=CeraVe")
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["product_name"] == "CeraVe Moisturizing Cream"
+    assert data["stale"] is False
+
+
+def test_get_ingredients_stale(client, mocker):
+    """
+    Test that stale cached results are flagged in the response.
+    """
+    mocker.patch(
+        "backend.server.lookup_known_product",
+        return_value=dict(PRODUCT, stale=True),
+    )
+
+    response = client.get("/get_ingredients?product=CeraVe")
+
+    assert response.status_code == 200
+    assert response.get_json()["stale"] is True
+
+
+def test_get_ingredients_not_found(client, mocker):
+    """
+    Test that remembered scraper errors fall back to the query as the product name.
+    """
+    mocker.patch(
+        "backend.server.lookup_known_product",
+        return_value={"error": "No products found"},
+    )
+
+    response = client.get("/get_ingredients?product=Unknown")
+
+    data = response.get_json()
+    assert data["error"] == "No products found"
+    assert data["product_name"] == "Unknown"
+    assert "stale" not in data
+
+
+def test_get_ingredients_miss_queues_job(client, mocker, jobs):
+    """
+    Test that a cache miss returns 202 with a job whose result can be polled.
+    """
+    mocker.patch("backend.server.lookup_known_product", return_value=None)
+    mock_scrape = mocker.patch(
+        "backend.server.scrape_product_ingredients", return_value=dict(PRODUCT)
+    )
+
+    response = client.get("/get_ingredients?product=CeraVe")
+
+    assert response.status_code == 202
+    data = response.get_json()
+    assert data["status_url"] == f"/jobs/{data['job_id']}"
+    assert data["events_url"] == f"/jobs/{data['job_id']}/events"
+    assert response.headers["Location"] == data["status_url"]
+
+    assert jobs.get(data["job_id"]).wait(5)
+    job = client.get(data["status_url"]).get_json()
+    assert job["status"] == "done"
+    assert job["result"]["product_name"] == "CeraVe Moisturizing Cream"
+    assert job["result"]["stale"] is False
+    mock_scrape.assert_called_once_with("CeraVe")
+
+
+def test_get_ingredients_job_not_found(client, mocker, jobs):
+    """
+    Test that a scraped "not found" result falls back to the query as the product name.
+    """
+    mocker.patch("backend.server.lookup_known_product", return_value=None)
+    mocker.patch(
+        "backend.server.scrape_product_ingredients",
+        return_value={"error": "No products found"},
+    )
+
+    job_id = client.get("/get_ingredients?product=Unknown").get_json()["job_id"]
+    jobs.get(job_id).wait(5)
+
+    result = client.get(f"/jobs/{job_id}").get_json()["result"]
+    assert result == {"error": "No products found", "product_name": "Unknown"}
+
+
+def test_get_ingredients_queue_full(client, mocker):
+    """
+    Test that a full job queue is reported as 503 with a Retry-After header.
+    """
+    mocker.patch("backend.server.lookup_known_product", return_value=None)
+    mocker.patch("backend.server.scrape_jobs.submit", side_effect=JobQueueFull)
+
+    response = client.get("/get_ingredients?product=CeraVe")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+
+
+def test_job_events_stream_until_done(client, mocker, jobs):
+    """
+    Test that the job event stream sends the current state and then the final result.
+    """
+    mocker.patch("backend.server.lookup_known_product", return_value=None)
+    release = threading.Event()
+    mocker.patch(
+        "backend.server.scrape_product_ingredients",
+        side_effect=lambda name: release.wait(5) and dict(PRODUCT),
+    )
+    mocker.patch("backend.server.JOB_EVENTS_KEEPALIVE", 0.01)
+    job_id = client.get("/get_ingredients?product=CeraVe").get_json()["job_id"]
+
+    response = client.get(f"/jobs/{job_id}/events")
+    stream = response.iter_encoded()
+    first = next(stream).decode()
+    assert first.startswith("data: ")
+    assert json.loads(first[6:])["status"] in ("queued", "running")
+    assert next(stream).decode() == ": keep-alive\n\n"
+
+    release.set()
+    events = [chunk.decode() for chunk in stream]
+    final = json.loads(events[-1][6:])
+    assert final["status"] == "done"
+    assert final["result"]["product_name"] == "CeraVe Moisturizing Cream"
+
+
+def test_cancel_job(client, mocker, jobs):
+    """
+    Test that DELETE /jobs/<job_id> cancels an unfinished job.
+    """
+    mocker.patch("backend.server.lookup_known_product", return_value=None)
+    release = threading.Event()
+    mocker.patch(
+        "backend.server.scrape_product_ingredients",
+        side_effect=lambda name: release.wait(5),
+    )
+    job_id = client.get("/get_ingredients?product=CeraVe").get_json()["job_id"]
+
+    response = client.delete(f"/jobs/{job_id}")
+    release.set()
+
+    assert response.get_json() == {"cancelled": True}
+    assert client.get(f"/jobs/{job_id}").get_json()["status"] == "cancelled"
+    assert client.delete(f"/jobs/{job_id}").get_json() == {"cancelled": False}
+
+
+def test_unknown_job(client):
+    """
+    Test that unknown job IDs return 404.
+    """
+    assert client.get("/jobs/missing").status_code == 404
+    assert client.get("/jobs/missing/events").status_code == 404
+    assert client.delete("/jobs/missing").status_code == 404
+
+
+def test_clear_negative_cache(client, mocker):
+    """
+    Test that DELETE /negative_cache clears the entry for the given product.
+    """
+    mock_clear = mocker.patch("backend.server.clear_negative_entry", return_value=True)
+
+    response = client.delete("/negative_cache?product=Cerave%20Creme")
+
+    assert response.status_code == 200
+    assert response.get_json() == {"cleared": True}
+    mock_clear.assert_called_once_with("Cerave Creme")
+
+
+def test_clear_negative_cache_missing_product(client):
+    """
+    Test error response when the product query parameter is missing.
+    """
+    response = client.delete("/negative_cache")
+    assert response.status_code == 400
+
+
+def test_get_ingredients_batch_streams_each_product(client, mocker, jobs):
+    """
+    Test that cache hits are streamed first and misses follow as their scrapes finish.
+    """
+    mocker.patch(
+        "backend.server.lookup_known_product",
+        side_effect=lambda name: dict(PRODUCT) if name == "CeraVe" else None,
+    )
+    mocker.patch(
+        "backend.server.scrape_product_ingredients",
+        side_effect=lambda name: (
+            {"error": "No products found"}
+            if name == "Unknown"
+            else dict(PRODUCT, product_name=name)
+        ),
+    )
+
+    response = client.post(
+        "/get_ingredients/batch", json={"products": ["Cetaphil", "CeraVe", "Unknown"]}
+    )
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    items = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert items[0]["product"] == "CeraVe"
+    assert items[0]["cached"] is True
+    by_product = {item["product"]: item for item in items}
+    assert set(by_product) == {"Cetaphil", "CeraVe", "Unknown"}
+    assert by_product["Cetaphil"]["status"] == "done"
+    assert by_product["Cetaphil"]["cached"] is False
+    assert by_product["Cetaphil"]["result"]["product_name"] == "Cetaphil"
+    assert by_product["Unknown"]["result"] == {
+        "error": "No products found",
+        "product_name": "Unknown",
+    }
+
+
+def test_get_ingredients_batch_sse(client, mocker):
+    """
+    Test that the batch is streamed as Server-Sent Events when the client asks for them.
+    """
+    mocker.patch("backend.server.lookup_known_product", return_value=dict(PRODUCT))
+
+    response = client.post(
+        "/get_ingredients/batch",
+        json={"products": ["CeraVe"]},
+        headers={"Accept": "text/event-stream"},
+    )
+
+    assert response.mimetype == "text/event-stream"
+    body = response.get_data(as_text=True)
+    assert body.startswith("data: ")
+    assert json.loads(body[6:])["status"] == "done"
+
+
+def test_get_ingredients_batch_queue_full(client, mocker):
+    """
+    Test that products that cannot be queued are reported as rejected.
+    """
+    mocker.patch("backend.server.lookup_known_product", return_value=None)
+    mocker.patch(
+        "backend.server.scrape_jobs.submit", side_effect=JobQueueFull("Queue full")
+    )
+
+    response = client.post("/get_ingredients/batch", json={"products": ["CeraVe"]})
+
+    item = json.loads(response.get_data(as_text=True))
+    assert item == {
+        "product": "CeraVe",
+        "status": "rejected",
+        "cached": False,
+        "error": "Queue full",
+    }
+
+
+def test_get_ingredients_batch_invalid(client, mocker):
+    """
+    Test error responses for a missing, malformed or oversized product list.
+    """
+    mocker.patch("backend.server.BATCH_MAX_PRODUCTS", 2)
+
+    assert client.post("/get_ingredients/batch", json={}).status_code == 400
+    assert (
+        client.post("/get_ingredients/batch", json={"products": [""]}).status_code
+        == 400
+    )
+    response = client.post("/get_ingredients/batch", json={"products": ["a", "b", "c"]})
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "At most 2 products per batch"
@@ -0,0 +1,222 @@
+from collections import Counter
+
+import pytest
+import requests
+
+from backend.http_client import create_session, fetch_html
+from backend.replay import ReplayServer
+from backend.resolution_cache import ResolutionCache
+from backend.scraper import fetch_product_ingredients, get_scrape_stats
+from backend.upstream import UpstreamScheduler, UpstreamUnavailable
+
+PRODUCT_PATH = "/skindeep/products/123456-CeraVe_Moisturizing_Cream/"
+
+
+@pytest.fixture
+def fixture_server(mocker):
+    """Fixture for a local HTTP server standing in for www.ewg.org."""
+    server = ReplayServer(
+        pages={
+            "/skindeep/search/": "search_results.html",
+            PRODUCT_PATH: "product_page.html",
+        }
+    ).start()
+
+    mocker.patch("backend.scraper.EWG_BASE_URL", server.base_url)
+    mocker.patch("backend.http_client.http_session", create_session())
+    mocker.patch("backend.scraper._paths", Counter())
+    mocker.patch("backend.scraper.get_cached_product_by_url", return_value=None)
+    mocker.patch("backend.scraper.link_query")
+    mocker.patch("backend.scraper.resolution_cache", ResolutionCache(path=None))
+    mocker.patch(
+        "backend.scraper.upstream",
+        UpstreamScheduler(rate=1000, burst=1000, backoff_base=0.01),
+    )
+    yield server
+
+    server.stop()
+
+
+@pytest.fixture
+def mock_selenium(mocker):
+    """Fixture to mock the Selenium fallback."""
+    mocker.patch("backend.scraper.driver_pool")
+    return mocker.patch(
+        "backend.scraper._scrape_with_driver", return_value={"error": "from selenium"}
+    )
+
+
+def test_fast_path_serves_server_rendered_pages(fixture_server, mock_selenium, mocker):
+    """
+    Test that a product is scraped over HTTP without starting a browser.
+    """
+    mock_save = mocker.patch("backend.scraper.cache_product_data")
+
+    result = fetch_product_ingredients("cerave")
+
+    assert result["product_url"] == fixture_server.base_url + PRODUCT_PATH
+    assert result["product_name"] == "CeraVe Moisturizing Cream"
+    assert result["ingredients"][1]["concerns"] == [
+        "Allergies/immunotoxicity (high)",
+        "Endocrine disruption (moderate)",
+    ]
+    assert result["served_by"] == "http"
+    stored = {k: v for k, v in result.items() if k != "served_by"}
+    mock_save.assert_called_once_with("cerave", stored)
+    mock_selenium.assert_not_called()
+    assert get_scrape_stats()["http"] == 1
+    assert get_scrape_stats()["selenium"] == 0
+
+
+def test_fast_path_reuses_connections(fixture_server, mock_selenium, mocker):
+    """
+    Test that the search and product pages are fetched over one keep-alive connection.
+    """
+    mocker.patch("backend.scraper.cache_product_data")
+
+    fetch_product_ingredients("cerave")
+    fetch_product_ingredients("cerave cream")
+
+    assert fixture_server.connections == 1
+
+
+def test_fast_path_no_products_found(fixture_server, mock_selenium):
+    """
+    Test that an empty server-rendered listing is a final answer, not a fallback.
+    """
+    fixture_server.pages["/skindeep/search/"] = "search_results_empty.html"
+
+    assert fetch_product_ingredients("zzqx") == {
+        "error": "No products found",
+        "served_by": "http",
+    }
+    mock_selenium.assert_not_called()
+
+
+def test_fast_path_alias_of_cached_product(fixture_server, mock_selenium, mocker):
+    """
+    Test that a query resolving to a cached product skips the product page.
+    """
+    cached = {"product_url": fixture_server.base_url + PRODUCT_PATH}
+    mocker.patch("backend.scraper.get_cached_product_by_url", return_value=cached)
+    mock_link = mocker.patch("backend.scraper.link_query")
+    del fixture_server.pages[PRODUCT_PATH]
+
+    assert fetch_product_ingredients("cerave") == dict(cached, served_by="http")
+    mock_link.assert_called_once_with("cerave", cached["product_url"])
+
+
+def test_resolved_query_skips_search_page(fixture_server, mock_selenium, mocker):
+    """
+    Test that searched queries and the other listed products resolve without a search.
+    """
+    mocker.patch("backend.scraper.cache_product_data")
+    fixture_server.pages["/skindeep/products/654321-CeraVe_Hydrating_Cleanser/"] = (
+        "product_page.html"
+    )
+
+    fetch_product_ingredients("cerave")
+    fetch_product_ingredients("CeraVe")
+    fetch_product_ingredients("cerave hydrating cleanser")
+
+    assert fixture_server.requested == [
+        "/skindeep/search/",
+        PRODUCT_PATH,
+        PRODUCT_PATH,
+        "/skindeep/products/654321-CeraVe_Hydrating_Cleanser/",
+    ]
+
+
+def test_known_product_url_skips_search_page(fixture_server, mock_selenium, mocker):
+    """
+    Test that a refresh with the product's URL goes straight to the product page.
+    """
+    mocker.patch("backend.scraper.cache_product_data")
+
+    result = fetch_product_ingredients("cerave", fixture_server.base_url + PRODUCT_PATH)
+
+    assert result["product_name"] == "CeraVe Moisturizing Cream"
+    assert fixture_server.requested == [PRODUCT_PATH]
+
+
+def test_failed_resolution_searches_again(fixture_server, mock_selenium, mocker):
+    """
+    Test that a resolved URL that no longer works is forgotten and the query searched again.
+    """
+    mocker.patch("backend.scraper.cache_product_data")
+    resolutions = ResolutionCache(path=None)
+    resolutions.put("cerave", fixture_server.base_url + "/skindeep/products/moved/")
+    mocker.patch("backend.scraper.resolution_cache", resolutions)
+    mock_selenium.return_value = {"error": "Failed to scrape product"}
+
+    result = fetch_product_ingredients("cerave")
+
+    assert result["product_url"] == fixture_server.base_url + PRODUCT_PATH
+    assert fixture_server.requested == [
+        "/skindeep/products/moved/",
+        "/skindeep/search/",
+        PRODUCT_PATH,
+    ]
+    assert resolutions.get("cerave") == fixture_server.base_url + PRODUCT_PATH
+
+
+def test_falls_back_to_selenium_without_ingredient_table(fixture_server, mock_selenium):
+    """
+    Test that a product page without a server-rendered ingredient table falls back to Selenium.
+    """
+    fixture_server.pages[PRODUCT_PATH] = "product_page_empty.html"
+
+    assert fetch_product_ingredients("cerave") == {
+        "error": "from selenium",
+        "served_by": "browser",
+    }
+    mock_selenium.assert_called_once()
+    stats = get_scrape_stats()
+    assert stats["http_fallbacks"] == 1
+    assert stats["selenium"] == 1
+    assert stats["http"] == 0
+
+
+def test_falls_back_to_selenium_on_http_error(fixture_server, mock_selenium):
+    """
+    Test that an error status from the site, e.g. a bot challenge, falls back to Selenium.
+    """
+    fixture_server.pages["/skindeep/search/"] = 403
+
+    assert fetch_product_ingredients("cerave") == {
+        "error": "from selenium",
+        "served_by": "browser",
+    }
+    assert get_scrape_stats()["http_errors"] == 1
+
+
+def test_failing_site_is_retried_not_scraped_by_browser(fixture_server, mock_selenium):
+    """
+    Test that server errors are retried and then reported, without falling back to Selenium.
+    """
+    fixture_server.pages["/skindeep/search/"] = 503
+
+    with pytest.raises(UpstreamUnavailable):
+        fetch_product_ingredients("cerave")
+    assert fixture_server.requested == ["/skindeep/search/"] * 3
+    mock_selenium.assert_not_called()
+
+
+def test_fast_path_can_be_disabled(fixture_server, mock_selenium, mocker):
+    """
+    Test that HTTP_FAST_PATH=false always uses Selenium.
+    """
+    mocker.patch("backend.scraper.HTTP_FAST_PATH", False)
+
+    fetch_product_ingredients("cerave")
+
+    mock_selenium.assert_called_once()
+    assert fixture_server.connections == 0
+
+
+def test_fetch_html_raises_on_error_status(fixture_server):
+    """
+    Test that fetch_html raises for error responses instead of returning the error page.
+    """
+    with pytest.raises(requests.HTTPError):
+        fetch_html(fixture_server.base_url + "/missing/")
@@ -0,0 +1,237 @@
+import json
+
+import pytest
+
+from backend.ingredient_benefits import (
+    IngredientBenefitStore,
+    load_lexicon,
+    parse_benefits,
+    rank_benefits,
+)
+
+LEXICON = {"water": [], "glycerin": ["Hydrating"], "niacinamide": ["Brightening"]}
+
+
+@pytest.fixture
+def mock_chain(mocker):
+    """
+    Mock benefits chain; set its answers through `invoke`.
+    """
+    chain = mocker.MagicMock()
+    mocker.patch(
+        "backend.ingredient_benefits.get_ingredient_benefits_chain", return_value=chain
+    )
+    return chain
+
+
+def test_parse_benefits_tolerates_code_fences_and_bad_items():
+    """
+    Test that benefits are read from a fenced JSON object, skipping malformed entries.
+    """
+    text = (
+        "Here you go:\n```json\n"
+        '{"Glycerin": ["hydrating", "", 3], "Water ": [], "Bad": "Soothing",'
+        ' "Niacinamide": ["A", "B", "C", "D"]}\n```'
+    )
+
+    assert parse_benefits(text) == {
+        "glycerin": ["Hydrating"],
+        "water": [],
+        "niacinamide": ["A", "B", "C"],
+    }
+    assert parse_benefits("not json") == {}
+    assert parse_benefits('["Hydrating"]') == {}
+
+
+def test_rank_benefits_by_ingredient_count_then_position():
+    """
+    Test that benefits shared by more ingredients rank first, ties broken by label order.
+    """
+    benefits = {
+        "water": [],
+        "glycerin": ["Hydrating", "Barrier repair"],
+        "niacinamide": ["Brightening", "hydrating"],
+        "ceramide np": ["Barrier Repair"],
+        "vitamin c": ["Antioxidant", "Brightening"],
+    }
+    names = ["Water", "Glycerin", "Niacinamide", "Ceramide NP", "Vitamin C", "Unknown"]
+
+    assert rank_benefits(names, benefits) == [
+        "Hydrating",
+        "Barrier repair",
+        "Brightening",
+        "Antioxidant",
+    ]
+    assert rank_benefits(names, benefits, limit=2) == ["Hydrating", "Barrier repair"]
+
+
+def test_generates_unknown_ingredients_in_batches(mock_chain):
+    """
+    Test that unknown ingredients are sent in batches, once, and stored by normalized name.
+    """
+    mock_chain.invoke.side_effect = [
+        {"text": '{"Water": [], "Glycerin": ["Hydrating"]}'},
+        {"text": '{"Niacinamide": ["Brightening"]}'},
+    ]
+    store = IngredientBenefitStore(path=None, batch_size=2)
+
+    result = store.summarize(["Water", "Glycerin", "glycerin", "Niacinamide"])
+
+    assert result == {
+        "summary": ["Hydrating", "Brightening"],
+        "coverage": 0.0,
+        "source": "llm",
+        "complete": True,
+    }
+    assert [call.args[0] for call in mock_chain.invoke.call_args_list] == [
+        {"ingredients": "Water\nGlycerin"},
+        {"ingredients": "Niacinamide"},
+    ]
+
+    result = store.summarize(["GLYCERIN", "Water"])
+    assert (result["summary"], result["source"]) == (["Hydrating"], "store")
+    assert mock_chain.invoke.call_count == 2
+    assert store.stats()["llm_calls"] == 2
+    assert store.stats()["generated"] == 3
+
+
+def test_unanswered_ingredients_are_asked_again(mock_chain):
+    """
+    Test that ingredients the LLM left out are not stored and mark the summary incomplete.
+    """
+    mock_chain.invoke.return_value = {"text": '{"Glycerin": ["Hydrating"]}'}
+    store = IngredientBenefitStore(path=None)
+
+    result = store.summarize(["Glycerin", "Squalane"])
+    assert (result["summary"], result["complete"]) == (["Hydrating"], False)
+    store.summarize(["Squalane"])
+
+    assert mock_chain.invoke.call_args.args[0] == {"ingredients": "Squalane"}
+
+
+def test_load_lexicon_from_csv_and_jsonl(tmp_path):
+    """
+    Test that CSV and JSONL lexicons load into the same normalized-name index.
+    """
+    csv_path = tmp_path / "lexicon.csv"
+    csv_path.write_text(
+        "name,benefits\n"
+        "Water,\n"
+        "Sodium Hyaluronate,hydrating; Plumping\n"
+        ",Orphan\n"
+        " GLYCERIN ,Hydrating;Barrier repair;Soothing;Smoothing\n"
+    )
+    jsonl_path = tmp_path / "lexicon.jsonl"
+    jsonl_path.write_text(
+        json.dumps({"name": "Water", "benefits": []})
+        + "\n\n"
+        + json.dumps({"name": "Sodium Hyaluronate", "benefits": "hydrating; Plumping"})
+        + "\n"
+        + json.dumps(
+            {
+                "name": " GLYCERIN ",
+                "benefits": ["Hydrating", "Barrier repair", "Soothing", "Smoothing"],
+            }
+        )
+        + "\n"
+    )
+    expected = {
+        "water": [],
+        "sodium hyaluronate": ["Hydrating", "Plumping"],
+        "glycerin": ["Hydrating", "Barrier repair", "Soothing"],
+    }
+
+    assert load_lexicon(str(csv_path)) == expected
+    assert load_lexicon(str(jsonl_path)) == expected
+    assert load_lexicon(str(tmp_path / "missing.csv")) == {}
+    with pytest.raises(ValueError):
+        load_lexicon(str(tmp_path / "lexicon.txt"))
+
+
+def test_shipped_lexicon_loads():
+    """
+    Test that the lexicon shipped with the backend loads with benefits for common ingredients.
+    """
+    from backend.config.settings import INGREDIENT_LEXICON_FILE
+
+    lexicon = load_lexicon(INGREDIENT_LEXICON_FILE)
+
+    assert lexicon["water"] == []
+    assert "Hydrating" in lexicon["glycerin"]
+
+
+def test_lexicon_answers_without_llm(mock_chain):
+    """
+    Test that a fully covered product is answered from the lexicon without any LLM call.
+    """
+    store = IngredientBenefitStore(path=None, lexicon=LEXICON)
+
+    result = store.summarize(["Water", "Glycerin", "Niacinamide"])
+
+    assert result == {
+        "summary": ["Hydrating", "Brightening"],
+        "coverage": 1.0,
+        "source": "lexicon",
+        "complete": True,
+    }
+    mock_chain.invoke.assert_not_called()
+    assert store.stats()["lexicon_summaries"] == 1
+    assert store.stats()["lexicon_entries"] == 3
+
+
+def test_lexicon_fast_path_generates_remainder_in_background(mock_chain):
+    """
+    Test that above the coverage threshold the remainder is generated after answering.
+    """
+    mock_chain.invoke.return_value = {"text": '{"Squalane": ["Moisturizing"]}'}
+    store = IngredientBenefitStore(path=None, lexicon=LEXICON, lexicon_coverage=0.75)
+    names = ["Water", "Glycerin", "Niacinamide", "Squalane"]
+
+    first = store.summarize(names)
+    store.join()
+    second = store.summarize(names)
+
+    assert first["summary"] == ["Hydrating", "Brightening"]
+    assert (first["coverage"], first["source"], first["complete"]) == (
+        0.75,
+        "lexicon",
+        False,
+    )
+    assert second["summary"] == ["Hydrating", "Brightening", "Moisturizing"]
+    assert second["complete"]
+    mock_chain.invoke.assert_called_once_with(
+        {"ingredients": "Squalane"},
+        config={"metadata": {"endpoint": "ingredient-summary"}},
+    )
+
+
+def test_below_coverage_threshold_waits_for_llm_on_remainder_only(mock_chain):
+    """
+    Test that below the coverage threshold only ingredients missing from the lexicon are generated.
+    """
+    mock_chain.invoke.return_value = {
+        "text": '{"Squalane": ["Moisturizing"], "Bakuchiol": ["Anti-aging"]}'
+    }
+    store = IngredientBenefitStore(path=None, lexicon=LEXICON, lexicon_coverage=0.8)
+
+    result = store.summarize(["Glycerin", "Squalane", "Bakuchiol"])
+
+    assert result == {
+        "summary": ["Hydrating", "Moisturizing", "Anti-aging"],
+        "coverage": 0.33,
+        "source": "llm",
+        "complete": True,
+    }
+    assert mock_chain.invoke.call_args.args[0] == {"ingredients": "Squalane\nBakuchiol"}
+
+
+def test_coverage_threshold_compares_unrounded_coverage(mock_chain):
+    """
+    Test that a coverage just below the threshold is not rounded up to meet it.
+    """
+    mock_chain.invoke.return_value = {"text": '{"Squalane": ["Moisturizing"]}'}
+    store = IngredientBenefitStore(path=None, lexicon=LEXICON, lexicon_coverage=0.67)
+
+    result = store.summarize(["Glycerin", "Niacinamide", "Squalane"])
+
+    assert (result["coverage"], result["source"]) == (0.67, "llm")
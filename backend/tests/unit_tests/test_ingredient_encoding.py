@@ -0,0 +1,215 @@
+import importlib
+
+import pytest
+
+from backend.benchmarks.prompt_encoding import compare
+from backend.config import settings
+from backend.ingredient_encoding import (
+    allergy_terms,
+    encode_ingredients,
+    estimate_tokens,
+    hazard_band,
+)
+from backend.server import build_recommendation_input
+
+INGREDIENTS = [
+    {"name": "Water", "score": "1", "concerns": []},
+    {"name": "Fragrance", "score": "8", "concerns": ["Allergen", "Irritant"]},
+    {"name": "Phenoxyethanol", "score": "4", "concerns": ["Irritant"]},
+    {"name": "Glycerin", "score": "1", "concerns": []},
+    {"name": "Citric Acid", "score": "2", "concerns": ["Data gaps"]},
+    {"name": "Botanical Blend", "score": "", "concerns": []},
+]
+
+
+@pytest.mark.parametrize(
+    "score, band",
+    [
+        ("1", "Low hazard (1-2)"),
+        (2, "Low hazard (1-2)"),
+        ("3", "Moderate hazard (3-6)"),
+        ("1-3", "Low hazard (1-2)"),
+        (" 10 ", "High hazard (7-10)"),
+        ("", "Unrated"),
+        ("N/A", "Unrated"),
+    ],
+)
+def test_hazard_band(score, band):
+    """
+    Test that scores, including ranges and missing scores, fall into the right hazard band.
+    """
+    assert hazard_band(score) == band
+
+
+def test_encode_ingredients_groups_bands_and_dedupes_concerns():
+    """
+    Test that ingredients are grouped by band, shared concerns go to a legend and "None" is omitted.
+    """
+    assert encode_ingredients(INGREDIENTS, token_budget=0) == (
+        "Concerns: [1] Irritant\n"
+        "High hazard (7-10):\n"
+        "- Fragrance (8): Allergen, [1]\n"
+        "Moderate hazard (3-6):\n"
+        "- Phenoxyethanol (4): [1]\n"
+        "Unrated:\n"
+        "- Botanical Blend\n"
+        "Low hazard (1-2):\n"
+        "- Water, Glycerin\n"
+        "- Citric Acid (2): Data gaps"
+    )
+
+
+def test_encode_ingredients_summarizes_low_hazard_tail_over_budget():
+    """
+    Test that over the token budget only the last low hazard ingredients are dropped and counted.
+    """
+    ingredients = [
+        {"name": "Fragrance", "score": "8", "concerns": ["Allergen"]},
+        {"name": "Phenoxyethanol", "score": "4", "concerns": ["Irritant"]},
+    ] + [{"name": f"Ingredient {i}", "score": "1", "concerns": []} for i in range(50)]
+
+    full = encode_ingredients(ingredients, token_budget=0)
+    text = encode_ingredients(ingredients, token_budget=60)
+
+    assert estimate_tokens(text) <= 60 < estimate_tokens(full)
+    assert "- Fragrance (8): Allergen" in text
+    assert "- Phenoxyethanol (4): Irritant" in text
+    assert "Ingredient 0," in text
+    assert "Ingredient 49" not in text
+    kept = text.split("Low hazard (1-2):\n- ")[1].split("\n")[0].count("Ingredient")
+    assert text.endswith(f"- and {50 - kept} more low hazard ingredients")
+
+
+def test_encode_ingredients_legend_covers_only_kept_ingredients():
+    """
+    Test that concerns shared only with dropped ingredients leave the legend once they are dropped.
+    """
+    ingredients = [
+        {"name": "Fragrance", "score": "8", "concerns": ["Allergen"]},
+        {"name": "Citric Acid", "score": "4", "concerns": ["Allergen", "Data gaps"]},
+    ] + [
+        {"name": f"Ingredient {i}", "score": "1", "concerns": ["Data gaps"]}
+        for i in range(20)
+    ]
+
+    text = encode_ingredients(ingredients, token_budget=20)
+
+    assert text.startswith("Concerns: [1] Allergen\nHigh hazard (7-10):")
+    assert "- Citric Acid (4): [1], Data gaps" in text
+    assert "Ingredient 19" not in text
+
+
+def test_encode_ingredients_omits_non_numeric_scores():
+    """
+    Test that placeholder scores such as "N/A" are omitted like missing ones.
+    """
+    ingredients = [{"name": "Botanical Blend", "score": "N/A", "concerns": []}]
+
+    assert encode_ingredients(ingredients) == "Unrated:\n- Botanical Blend"
+
+
+def test_unknown_prompt_format_fails_at_startup(monkeypatch):
+    """
+    Test that a misspelled INGREDIENT_PROMPT_FORMAT is rejected instead of silently ignored.
+    """
+    monkeypatch.setenv("INGREDIENT_PROMPT_FORMAT", "compcat")
+
+    try:
+        with pytest.raises(ValueError, match="compcat"):
+            importlib.reload(settings)
+    finally:
+        monkeypatch.delenv("INGREDIENT_PROMPT_FORMAT")
+        importlib.reload(settings)
+
+
+def test_encode_ingredients_never_drops_hazardous_ingredients():
+    """
+    Test that a budget too small for the hazardous ingredients still lists all of them.
+    """
+    ingredients = [
+        {"name": f"Hazard {i}", "score": "9", "concerns": ["Cancer"]} for i in range(5)
+    ] + [{"name": "Water", "score": "1", "concerns": []}]
+
+    text = encode_ingredients(ingredients, token_budget=1)
+
+    assert all(f"Hazard {i} (9)" in text for i in range(5))
+    assert text.endswith("- and 1 more low hazard ingredients")
+
+
+def test_recommendation_input_formats(mocker):
+    """
+    Test that `/recommend` prompts use the compact encoding unless the verbose format is set.
+    """
+    data = {"product_name": "Test Product", "ingredients": INGREDIENTS}
+
+    compact = build_recommendation_input(data)
+    mocker.patch("backend.server.INGREDIENT_PROMPT_FORMAT", "verbose")
+    verbose = build_recommendation_input(data)
+
+    assert "High hazard (7-10):\n- Fragrance (8): Allergen, [1]" in compact
+    assert "  - Concerns: None" not in compact
+    assert "Water (Hazard Score: 1)\n  - Concerns: None" in verbose
+    assert estimate_tokens(compact) < estimate_tokens(verbose)
+
+
+def test_encode_ingredients_keeps_allergens_over_budget():
+    """
+    Test that low hazard ingredients matching the user's allergies are never dropped.
+    """
+    ingredients = [
+        {"name": "Fragrance", "score": "8", "concerns": ["Allergen"]},
+    ] + [{"name": f"Ingredient {i}", "score": "1", "concerns": []} for i in range(50)]
+    ingredients[40]["name"] = "Sweet Almond Oil"
+    ingredients[45] = {"name": "Methylparaben", "score": "2", "concerns": ["Allergen"]}
+    profile = {"allergies": "Almond, parabens"}
+
+    text = encode_ingredients(ingredients, profile, token_budget=40)
+    without_profile = encode_ingredients(ingredients, token_budget=40)
+
+    assert "Sweet Almond Oil" in text
+    assert "- Methylparaben (2): [1]" in text
+    assert "Sweet Almond Oil" not in without_profile
+    assert text.endswith("- and 48 more low hazard ingredients")
+
+
+@pytest.mark.parametrize(
+    "allergies, terms",
+    [
+        ("Fragrance, parabens and Nuts", ["fragrance", "paraben", "nut"]),
+        (["Tree nuts", "Glass"], ["tree nut", "glass"]),
+        ("None", []),
+        (None, []),
+    ],
+)
+def test_allergy_terms(allergies, terms):
+    """
+    Test that allergies given as text or a list are split and normalized.
+    """
+    assert allergy_terms({"allergies": allergies}) == terms
+
+
+def test_recommendation_input_keeps_allergens():
+    """
+    Test that `/recommend` prompts pass the user's allergies to the encoder.
+    """
+    data = {
+        "product_name": "Test Product",
+        "ingredients": [
+            {"name": f"Ingredient {i}", "score": "1", "concerns": []}
+            for i in range(400)
+        ]
+        + [{"name": "Peanut Oil", "score": "1", "concerns": []}],
+        "user_profile": {"skinType": "Dry", "allergies": "Peanuts"},
+    }
+
+    assert "Peanut Oil" in build_recommendation_input(data)
+
+
+def test_compact_prompt_benchmark():
+    """
+    Test that compact prompts of large products are much smaller than verbose ones.
+    """
+    verbose, compact = compare(sizes=[60])
+
+    assert compact["estimated_tokens"] < 0.6 * verbose["estimated_tokens"]
+    assert compact["prompt_tokens"] is None and compact["ttft_ms"] is None
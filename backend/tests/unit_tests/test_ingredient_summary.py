@@ -1,9 +1,12 @@
-import hashlib
-import json
-
 import pytest
 
-from backend.server import app, get_formatted_ingredients, ingredient_summary_cache
+from backend.ingredient_benefits import IngredientBenefitStore
+from backend.server import app, get_formatted_ingredients
+from backend.summary_cache import SummaryCache
+
+BENEFITS_ANSWER = (
+    '{"Hyaluronic Acid": ["Hydrating"], "Salicylic Acid": ["Exfoliating"]}'
+)
 
 
 def test_get_formatted_ingredients_success():
@@ -80,6 +83,39 @@ def client():
         yield client
 
 
+@pytest.fixture
+def summary_cache(mocker):
+    """
+    In-memory summary cache, so tests neither share summaries nor write to disk.
+    """
+    cache = SummaryCache(path=None)
+    mocker.patch("backend.server.summary_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def benefits(mocker):
+    """
+    In-memory ingredient benefit store.
+    """
+    store = IngredientBenefitStore(path=None)
+    mocker.patch("backend.server.ingredient_benefits", store)
+    return store
+
+
+@pytest.fixture
+def mock_llm_chain(mocker):
+    """
+    Mock benefits chain answering for the two test ingredients.
+    """
+    chain = mocker.MagicMock()
+    chain.invoke.return_value = {"text": BENEFITS_ANSWER}
+    mocker.patch(
+        "backend.ingredient_benefits.get_ingredient_benefits_chain", return_value=chain
+    )
+    return chain
+
+
 def test_get_formatted_ingredients_success():
     """
     Test successful formatting of ingredient details.
@@ -97,15 +133,10 @@ def test_get_formatted_ingredients_success():
     assert get_formatted_ingredients(test_data) == expected_output
 
 
-def test_ingredient_summary_success(client, mocker):
+def test_ingredient_summary_success(client, summary_cache, benefits, mock_llm_chain):
     """
     Test a successful POST /ingredient-summary request with mock LLM response.
     """
-    mock_llm_chain = mocker.MagicMock()
-    mock_llm_chain.invoke.return_value = {"text": '["Hydrating", "Soothing"]'}
-    mocker.patch(
-        "backend.server.get_ingredient_summary_chain", return_value=mock_llm_chain
-    )
 
     response = client.post(
         "/ingredient-summary",
@@ -119,10 +150,10 @@ def test_ingredient_summary_success(client, mocker):
     assert response.status_code == 200
     data = response.get_json()
     assert "summary" in data
-    assert data["summary"] == ["Hydrating", "Soothing"]
+    assert data["summary"] == ["Hydrating", "Exfoliating"]
 
 
-def test_ingredient_summary_cache(client, mocker):
+def test_ingredient_summary_cache(client, summary_cache, benefits, mock_llm_chain):
     """
     Test caching mechanism of /ingredient-summary to ensure cached results are used.
     """
@@ -130,10 +161,7 @@ def test_ingredient_summary_cache(client, mocker):
         {"name": "Hyaluronic Acid", "score": 1, "concerns": ["None"]},
         {"name": "Salicylic Acid", "score": 4, "concerns": ["Irritant"]},
     ]
-    ingredients_key = hashlib.md5(
-        json.dumps(test_ingredients, sort_keys=True).encode()
-    ).hexdigest()
-    ingredient_summary_cache[ingredients_key] = ["Hydrating", "Soothing"]
+    summary_cache.put(test_ingredients, ["Hydrating", "Soothing"])
 
     response = client.post(
         "/ingredient-summary",
@@ -143,7 +171,74 @@ def test_ingredient_summary_cache(client, mocker):
     data = response.get_json()
     assert "summary" in data
     assert data["summary"] == ["Hydrating", "Soothing"]
-    assert response.json["summary"] == ingredient_summary_cache[ingredients_key]
+    mock_llm_chain.invoke.assert_not_called()
+
+
+def test_ingredient_summary_cache_ignores_order_and_spelling(
+    client, summary_cache, benefits, mock_llm_chain
+):
+    """
+    Test that the same ingredients in another order, case or spacing reuse the cached summary.
+    """
+
+    client.post(
+        "/ingredient-summary",
+        json={
+            "ingredients": [
+                {"name": "Hyaluronic Acid", "score": 1, "concerns": ["None"]},
+                {"name": "Salicylic Acid", "score": 4, "concerns": ["Irritant"]},
+            ]
+        },
+    )
+    response = client.post(
+        "/ingredient-summary",
+        json={
+            "ingredients": [
+                {"name": "salicylic  acid", "score": "4", "concerns": ["irritant"]},
+                {"name": "Hyaluronic Acid ", "score": 1, "concerns": ["None"]},
+            ]
+        },
+    )
+
+    assert response.get_json()["summary"] == ["Hydrating", "Exfoliating"]
+    mock_llm_chain.invoke.assert_called_once()
+    assert summary_cache.stats()["hits"] == 1
+
+
+def test_ingredient_summary_asks_llm_only_for_unseen_ingredients(
+    client, summary_cache, benefits, mock_llm_chain
+):
+    """
+    Test that a new product reuses stored ingredient benefits and asks only for new ingredients.
+    """
+    client.post(
+        "/ingredient-summary",
+        json={
+            "ingredients": [
+                {"name": "Hyaluronic Acid", "score": 1, "concerns": []},
+                {"name": "Salicylic Acid", "score": 4, "concerns": ["Irritant"]},
+            ]
+        },
+    )
+    mock_llm_chain.invoke.return_value = {
+        "text": '{"Niacinamide": ["Brightening", "Hydrating"]}'
+    }
+
+    response = client.post(
+        "/ingredient-summary",
+        json={
+            "ingredients": [
+                {"name": "Niacinamide", "score": 1, "concerns": []},
+                {"name": "Hyaluronic Acid", "score": 1, "concerns": []},
+            ]
+        },
+    )
+
+    assert response.get_json()["summary"] == ["Hydrating", "Brightening"]
+    assert response.get_json()["source"] == "llm"
+    assert mock_llm_chain.invoke.call_count == 2
+    assert mock_llm_chain.invoke.call_args.args[0] == {"ingredients": "Niacinamide"}
+    assert benefits.stats()["llm_calls"] == 2
 
 
 def test_ingredient_summary_invalid_ingredients(client):
@@ -166,3 +261,34 @@ def test_ingredient_summary_empty_list(client):
     data = response.get_json()
     assert "error" in data
     assert data["error"] == "Missing ingredients"
+
+
+def test_ingredient_summary_lexicon_fast_path(client, mocker, summary_cache):
+    """
+    Test that a product covered by the lexicon is answered without the LLM and reports its source.
+    """
+    store = IngredientBenefitStore(
+        path=None, lexicon={"glycerin": ["Hydrating"], "water": []}
+    )
+    mocker.patch("backend.server.ingredient_benefits", store)
+    mock_get_chain = mocker.patch(
+        "backend.ingredient_benefits.get_ingredient_benefits_chain"
+    )
+    test_ingredients = [
+        {"name": "Water", "score": 1, "concerns": []},
+        {"name": "Glycerin", "score": 1, "concerns": []},
+    ]
+
+    response = client.post(
+        "/ingredient-summary", json={"ingredients": test_ingredients}
+    )
+    cached = client.post("/ingredient-summary", json={"ingredients": test_ingredients})
+
+    assert response.get_json() == {
+        "summary": ["Hydrating"],
+        "coverage": 1.0,
+        "source": "lexicon",
+    }
+    assert cached.get_json()["source"] == "cache"
+    assert cached.get_json()["coverage"] == 1.0
+    mock_get_chain.assert_not_called()
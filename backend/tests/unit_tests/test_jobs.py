@@ -0,0 +1,146 @@
+import threading
+
+import pytest
+
+from backend.jobs import JobQueue, JobQueueFull
+
+
+@pytest.fixture
+def gate():
+    """Fixture for an event that blocks jobs until the test releases them."""
+    release = threading.Event()
+    yield release
+    release.set()
+
+
+def test_job_runs_in_background():
+    """
+    Test that a submitted job runs on a worker and exposes its result when done.
+    """
+    jobs = JobQueue(workers=1, max_queued=5, timeout=5)
+
+    job = jobs.submit("cerave", lambda name: {"product_name": name}, "CeraVe")
+
+    assert job.wait(5)
+    assert jobs.get(job.id).to_dict() == {
+        "job_id": job.id,
+        "status": "done",
+        "result": {"product_name": "CeraVe"},
+    }
+    assert jobs.stats()["completed"] == 1
+
+
+def test_failed_job_reports_error():
+    """
+    Test that an exception raised by a job is reported as a failed status.
+    """
+    jobs = JobQueue(workers=1, max_queued=5, timeout=5)
+
+    def fail():
+        raise RuntimeError("Driver pool is shut down")
+
+    job = jobs.submit("cerave", fail)
+
+    assert job.wait(5)
+    assert job.to_dict()["status"] == "failed"
+    assert job.to_dict()["error"] == "Driver pool is shut down"
+
+
+def test_unfinished_job_is_deduplicated(gate):
+    """
+    Test that submitting a key that is already queued or running returns the same job.
+    """
+    jobs = JobQueue(workers=1, max_queued=5, timeout=5)
+
+    first = jobs.submit("cerave", gate.wait, 5)
+    second = jobs.submit("cerave", gate.wait, 5)
+
+    assert second is first
+    assert jobs.stats()["deduplicated"] == 1
+    gate.set()
+    assert first.wait(5)
+
+    # Finished jobs are not reused
+    assert jobs.submit("cerave", lambda: None) is not first
+
+
+def test_queue_depth_is_limited(gate):
+    """
+    Test that submissions beyond `max_queued` waiting jobs are rejected.
+    """
+    jobs = JobQueue(workers=1, max_queued=1, timeout=5)
+    running = jobs.submit("a", gate.wait, 5)
+    while running.status != "running":
+        threading.Event().wait(0.001)
+    jobs.submit("b", gate.wait, 5)
+
+    with pytest.raises(JobQueueFull):
+        jobs.submit("c", gate.wait, 5)
+    assert jobs.stats()["rejected"] == 1
+
+
+def test_job_times_out(gate):
+    """
+    Test that a job running past the timeout is reported as timed out.
+    """
+    jobs = JobQueue(workers=1, max_queued=5, timeout=0.05)
+
+    job = jobs.submit("cerave", gate.wait, 5)
+
+    assert job.wait(5)
+    assert job.to_dict()["status"] == "timed_out"
+    assert jobs.stats()["timed_out"] == 1
+
+    # The late result is discarded
+    gate.set()
+    threading.Event().wait(0.05)
+    assert job.to_dict()["status"] == "timed_out"
+
+
+def test_cancel_queued_job(gate):
+    """
+    Test that a cancelled queued job never runs.
+    """
+    jobs = JobQueue(workers=1, max_queued=5, timeout=5)
+    jobs.submit("a", gate.wait, 5)
+    ran = threading.Event()
+    queued = jobs.submit("b", ran.set)
+
+    assert jobs.cancel(queued.id) is True
+    assert jobs.cancel(queued.id) is False  # Already final
+    gate.set()
+    last = jobs.submit("c", lambda: None)
+    assert last.wait(5)
+
+    assert not ran.is_set()
+    assert queued.to_dict()["status"] == "cancelled"
+
+
+def test_finished_jobs_expire():
+    """
+    Test that finished jobs are forgotten after the retention period.
+    """
+    jobs = JobQueue(workers=1, max_queued=5, timeout=5, retention=0)
+
+    job = jobs.submit("cerave", lambda: None)
+    assert job.wait(5)
+    threading.Event().wait(0.01)
+
+    assert jobs.get(job.id) is None
+
+
+def test_done_callback(gate):
+    """
+    Test that done callbacks run when the job finishes, or right away if it already has.
+    """
+    jobs = JobQueue(workers=1, max_queued=5, timeout=5)
+    finished = []
+
+    job = jobs.submit("cerave", gate.wait, 5)
+    job.add_done_callback(lambda job: finished.append(job.status))
+    assert finished == []
+
+    gate.set()
+    assert job.wait(5)
+    job.add_done_callback(lambda job: finished.append(job.status))
+    assert finished == ["done", "done"]
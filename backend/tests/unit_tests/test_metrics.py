@@ -0,0 +1,61 @@
+import pytest
+
+from backend.callback import LLMMetricsStore
+from backend.server import app
+
+
+@pytest.fixture
+def client():
+    """
+    Flask test client for calling endpoints.
+    """
+    with app.test_client() as client:
+        yield client
+
+
+def test_metrics_reports_cache_stats(client, mocker):
+    """
+    Test that GET /metrics returns the product cache and compaction statistics.
+    """
+    cache_stats = {
+        "lookups": 4,
+        "exact_hits": 2,
+        "alias_hits": 1,
+        "misses": 1,
+        "exact_hit_rate": 0.5,
+        "alias_hit_rate": 0.25,
+    }
+    mocker.patch("backend.server.get_cache_stats", return_value=cache_stats)
+    mocker.patch("backend.server.get_compaction_stats", return_value=None)
+    mocker.patch("backend.server.get_eviction_stats", return_value={"evictions": 3})
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["product_cache"] == cache_stats
+    assert data["compaction"] is None
+    assert data["eviction"] == {"evictions": 3}
+    assert "negative_cache" in data
+    assert "resolution_cache" in data
+    assert "summary_cache" in data
+    assert "recommendation_cache" in data
+    assert "ingredient_benefits" in data
+    assert data["upstream"]["breaker"] == "closed"
+
+
+def test_llm_metrics_query(client, mocker):
+    """
+    Test that GET /metrics/llm reports generation metrics filtered by endpoint.
+    """
+    store = LLMMetricsStore()
+    store.observe("recommend", "llama3.2", ttft_seconds=0.5)
+    store.observe("chat", "llama3.2", ttft_seconds=0.2)
+    mocker.patch("backend.server.llm_metrics", store)
+
+    response = client.get("/metrics/llm?endpoint=recommend")
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert list(data) == ["recommend"]
+    assert data["recommend"]["llama3.2"]["ttft_seconds"]["p50"] == 0.5
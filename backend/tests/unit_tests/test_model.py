@@ -1,3 +1,6 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
 from langchain.chains import ConversationChain, LLMChain
 from langchain.memory import ConversationBufferMemory
 from langchain.schema import AIMessage, HumanMessage
@@ -11,22 +14,56 @@ def test_get_llm(mocker):
     """
     Test that `get_llm()` correctly initializes and returns a `ChatOllama` instance.
     """
+    mocker.patch.dict("backend.model._llms", clear=True)
     mock_chat_ollama = mocker.patch("backend.model.ChatOllama", autospec=True)
 
     llm_instance = get_llm()
 
-    # Ensure ChatOllama is instantiated correctly
+    # Ensure ChatOllama is instantiated correctly, with a pooled HTTP client
     mock_chat_ollama.assert_called_once_with(
         base_url=mocker.ANY,
         model=mocker.ANY,
         temperature=mocker.ANY,
         streaming=True,
         callbacks=mocker.ANY,
+        client_kwargs={"limits": mocker.ANY, "timeout": mocker.ANY},
     )
+    limits = mock_chat_ollama.call_args.kwargs["client_kwargs"]["limits"]
+    assert isinstance(limits, httpx.Limits)
 
     assert isinstance(llm_instance, ChatOllama)  # Check for correct type
 
 
+def test_get_llm_is_shared_per_configuration(mocker):
+    """
+    Test that `get_llm()` returns one shared instance per configuration, also across threads.
+    """
+    mocker.patch.dict("backend.model._llms", clear=True)
+    mock_chat_ollama = mocker.patch("backend.model.ChatOllama", autospec=True)
+    mock_chat_ollama.side_effect = lambda **kwargs: mocker.Mock(spec=ChatOllama)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        instances = list(pool.map(lambda _: get_llm(), range(16)))
+    other = get_llm(model="other-model")
+
+    assert all(instance is instances[0] for instance in instances)
+    assert other is not instances[0]
+    assert mock_chat_ollama.call_count == 2
+
+
+def test_conversation_chains_share_llm(mocker):
+    """
+    Test that every conversation session references the shared LLM instead of its own.
+    """
+    mocker.patch.dict("backend.model._llms", clear=True)
+
+    first = create_conversation_chain()
+    second = create_conversation_chain()
+
+    assert first.llm is second.llm is get_llm()
+    assert first.memory is not second.memory
+
+
 ### Test for the get_llm_chain() function
 def test_get_llm_chain(mocker):
     """
@@ -0,0 +1,141 @@
+import pytest
+
+from backend.negative_cache import BloomFilter, NegativeCache
+from backend.scraper import scrape_product_ingredients
+
+ERROR = {"error": "No products found"}
+
+
+def test_bloom_filter_has_no_false_negatives():
+    """
+    Test that every added key is reported as a member.
+    """
+    bloom = BloomFilter(1000)
+    keys = [f"product {i}" for i in range(1000)]
+    for key in keys:
+        bloom.add(key)
+
+    assert all(key in bloom for key in keys)
+
+
+def test_bloom_filter_false_positive_rate():
+    """
+    Test that the false positive rate stays near the configured error rate at capacity.
+    """
+    bloom = BloomFilter(1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"product {i}")
+
+    false_positives = sum(f"other {i}" in bloom for i in range(10000))
+    assert false_positives / 10000 < 0.03
+
+
+def test_negative_cache_hit_by_normalized_query():
+    """
+    Test that a remembered failure is returned for any spelling of the same query.
+    """
+    negative_cache = NegativeCache(ttl_seconds=60, capacity=100)
+    negative_cache.put("Cerave Moisturising Creme", ERROR)
+
+    assert negative_cache.get("  cerave moisturising-creme") == ERROR
+    assert negative_cache.get("CeraVe") is None
+    assert negative_cache.stats()["hits"] == 1
+    assert negative_cache.stats()["bloom_rejects"] >= 1
+
+
+def test_negative_cache_expires(mocker):
+    """
+    Test that failures are forgotten once their TTL has passed.
+    """
+    mock_time = mocker.patch("backend.negative_cache.time.monotonic", return_value=0)
+    negative_cache = NegativeCache(ttl_seconds=60, capacity=100)
+    negative_cache.put("Cerave Creme", ERROR)
+
+    mock_time.return_value = 59
+    assert negative_cache.get("Cerave Creme") == ERROR
+    mock_time.return_value = 60
+    assert negative_cache.get("Cerave Creme") is None
+    assert negative_cache.stats()["entries"] == 0
+
+
+def test_negative_cache_clear():
+    """
+    Test that a query's negative entry can be cleared manually.
+    """
+    negative_cache = NegativeCache(ttl_seconds=60, capacity=100)
+    negative_cache.put("Cerave Creme", ERROR)
+
+    assert negative_cache.clear("cerave creme") is True
+    assert negative_cache.get("Cerave Creme") is None
+    assert negative_cache.clear("cerave creme") is False
+
+
+def test_negative_cache_rebuilds_bloom_filter(mocker):
+    """
+    Test that the Bloom filter is rebuilt from live entries once it is full.
+    """
+    mock_time = mocker.patch("backend.negative_cache.time.monotonic", return_value=0)
+    negative_cache = NegativeCache(ttl_seconds=60, capacity=3)
+    for i in range(3):
+        negative_cache.put(f"query {i}", ERROR)
+
+    mock_time.return_value = 100  # All three entries have expired
+    negative_cache.put("query 3", ERROR)
+
+    assert negative_cache.stats()["entries"] == 1
+    assert negative_cache.get("query 3") == ERROR
+
+
+def test_negative_cache_evicts_soonest_expiring_when_full(mocker):
+    """
+    Test that live entries beyond half the capacity are evicted on rebuild, soonest to expire
+    first, so the table stays bounded and rebuilds are not repeated on every insert.
+    """
+    mock_time = mocker.patch("backend.negative_cache.time.monotonic", return_value=0)
+    negative_cache = NegativeCache(ttl_seconds=60, capacity=4)
+    rebuild = mocker.spy(negative_cache, "_rebuild")
+    for i in range(4):
+        mock_time.return_value = i
+        negative_cache.put(f"query {i}", ERROR)
+
+    negative_cache.put("query 4", ERROR)
+    negative_cache.put("query 5", ERROR)
+
+    assert rebuild.call_count == 1
+    assert negative_cache.stats()["entries"] == 4
+    assert negative_cache.stats()["evictions"] == 2
+    assert negative_cache.get("query 0") is None
+    assert negative_cache.get("query 1") is None
+    assert negative_cache.get("query 3") == ERROR
+    assert negative_cache.get("query 5") == ERROR
+
+
+@pytest.fixture
+def scraper_mocks(mocker):
+    mocker.patch("backend.scraper.get_cached_product", return_value=None)
+    mocker.patch(
+        "backend.scraper.negative_cache", NegativeCache(ttl_seconds=60, capacity=100)
+    )
+    return mocker.patch("backend.scraper.fetch_product_ingredients")
+
+
+def test_scraper_caches_failures(scraper_mocks):
+    """
+    Test that repeated failing queries are answered without scraping again.
+    """
+    scraper_mocks.return_value = dict(ERROR, served_by="http")
+
+    assert scrape_product_ingredients("Cerave Creme") == dict(ERROR, served_by="http")
+    assert scrape_product_ingredients("cerave creme") == dict(ERROR, served_by="cache")
+    scraper_mocks.assert_called_once()
+
+
+def test_scraper_does_not_cache_unexpected_errors(scraper_mocks):
+    """
+    Test that crashes (e.g. WebDriver errors) are not remembered as negative entries.
+    """
+    scraper_mocks.return_value = {"error": "chrome not reachable"}
+
+    scrape_product_ingredients("CeraVe")
+    scrape_product_ingredients("CeraVe")
+    assert scraper_mocks.call_count == 2
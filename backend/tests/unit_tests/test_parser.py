@@ -0,0 +1,94 @@
+from pathlib import Path
+
+import pytest
+
+from backend.parser import parse_product_page, parse_search_results
+
+FIXTURES = Path(__file__).parent.parent / "fixtures" / "ewg"
+
+
+@pytest.fixture
+def product_page():
+    """Fixture for a saved EWG product page."""
+    return (FIXTURES / "product_page.html").read_text(encoding="utf-8")
+
+
+def test_parse_product_page(product_page):
+    """
+    Test that the product name, scores and concerns are read from a product page.
+    """
+    result = parse_product_page(product_page)
+
+    assert result["product_name"] == "CeraVe Moisturizing Cream"
+    assert [i["name"] for i in result["ingredients"]] == [
+        "WATER",
+        "FRAGRANCE",
+        "CERAMIDE NP",
+        "PHENOXYETHANOL",
+    ]
+    assert [i["score"] for i in result["ingredients"]] == ["1", "8", "N/A", "4"]
+    assert result["ingredients"][0]["concerns"] == []
+    assert result["ingredients"][1]["concerns"] == [
+        "Allergies/immunotoxicity (high)",
+        "Endocrine disruption (moderate)",
+    ]
+
+
+def test_parse_product_page_pairs_details_with_their_ingredient(product_page):
+    """
+    Test that an ingredient without a detail row does not shift later concerns.
+    """
+    ingredients = parse_product_page(product_page)["ingredients"]
+
+    assert ingredients[2]["concerns"] == []
+    assert ingredients[3]["concerns"] == [
+        "Irritation (skin, eyes, or lungs) (high)",
+        "Organ system toxicity (non-reproductive) (moderate)",
+    ]
+
+
+def test_parse_product_page_without_ingredients():
+    """
+    Test that a page without a product name or ingredient rows parses to empty values.
+    """
+    html = (FIXTURES / "product_page_empty.html").read_text(encoding="utf-8")
+
+    assert parse_product_page(html) == {"product_name": None, "ingredients": []}
+
+
+def test_parse_product_page_empty_source():
+    """
+    Test that an empty page source parses to empty values instead of raising.
+    """
+    assert parse_product_page("") == {"product_name": None, "ingredients": []}
+
+
+def test_parse_search_results():
+    """
+    Test that product links are resolved against the page URL, named and de-duplicated.
+    """
+    html = (FIXTURES / "search_results.html").read_text(encoding="utf-8")
+
+    assert parse_search_results(html, "https://www.ewg.org/skindeep/search/") == [
+        {
+            "product_url": "https://www.ewg.org/skindeep/products/123456-CeraVe_Moisturizing_Cream/",
+            "product_name": "CeraVe Moisturizing Cream",
+        },
+        {
+            "product_url": "https://www.ewg.org/skindeep/products/654321-CeraVe_Hydrating_Cleanser/",
+            "product_name": "CeraVe Hydrating Cleanser",
+        },
+    ]
+
+
+def test_parse_search_results_without_listing():
+    """
+    Test that an empty listing and a missing listing are told apart.
+    """
+    html = (FIXTURES / "search_results_empty.html").read_text(encoding="utf-8")
+
+    assert parse_search_results(html, "https://www.ewg.org") == []
+    assert (
+        parse_search_results("<html><body></body></html>", "https://www.ewg.org")
+        is None
+    )
@@ -0,0 +1,160 @@
+import pytest
+
+from backend.persistent_cache import PersistentLRUCache
+from backend.recommendation_cache import recommendation_fingerprint
+from backend.server import app
+
+INGREDIENTS = [
+    {"name": "Water", "score": "1", "concerns": []},
+    {"name": "Fragrance", "score": "8", "concerns": ["Allergen", "Irritant"]},
+]
+PROFILE = {"skinType": "Dry", "skinConcerns": "Redness", "allergies": "None"}
+REQUEST = {
+    "product_name": "CeraVe Cream",
+    "ingredients": INGREDIENTS,
+    "user_profile": PROFILE,
+}
+
+
+@pytest.fixture
+def client():
+    """
+    Flask test client for calling endpoints.
+    """
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.fixture
+def cache(mocker):
+    """In-memory recommendation cache."""
+    cache = PersistentLRUCache(path=None, ttl_days=1, max_entries=100)
+    mocker.patch("backend.server.recommendation_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def llm(mocker):
+    """Fixture for a deterministic LLM streaming a fixed recommendation."""
+    llm = mocker.MagicMock()
+    llm.model = "llama3.2"
+    llm.temperature = 0.0
+    llm.stream.side_effect = lambda prompt, config=None: iter(["Safe", " for", " you."])
+    mocker.patch("backend.server.get_llm", return_value=llm)
+    return llm
+
+
+@pytest.fixture
+def conversation(mocker):
+    """Fixture for the conversation chain of every session."""
+    chain = mocker.MagicMock()
+    mocker.patch("backend.server.get_or_create_conversation", return_value=chain)
+    return chain
+
+
+def recommend(client, request=REQUEST, session_id="abc123DEF"):
+    response = client.post("/recommend", json=dict(request, session_id=session_id))
+    return response.get_data(as_text=True)
+
+
+def test_fingerprint_depends_on_model_prompt_and_input():
+    """
+    Test that the model, the prompt version and the LLM input each change the key.
+    """
+    key = recommendation_fingerprint("llama3.2", "v1", "Product Name: CeraVe Cream")
+
+    assert key == recommendation_fingerprint(
+        "llama3.2", "v1", "Product Name: CeraVe Cream"
+    )
+    assert key != recommendation_fingerprint(
+        "mistral", "v1", "Product Name: CeraVe Cream"
+    )
+    assert key != recommendation_fingerprint(
+        "llama3.2", "v2", "Product Name: CeraVe Cream"
+    )
+    assert key != recommendation_fingerprint(
+        "llama3.2", "v1", "Product Name: cerave cream"
+    )
+
+
+def test_cache_hit_replays_stream_and_records_turn(client, cache, llm, conversation):
+    """
+    Test that a repeated request is replayed in the same SSE format without the LLM, and still
+    saved to the session's memory.
+    """
+    first = recommend(client)
+    second = recommend(client, session_id="xyz789")
+
+    assert second == first
+    assert first == (
+        'data: {"content": "Safe"}\n\n'
+        'data: {"content": " for"}\n\n'
+        'data: {"content": " you."}\n\n'
+    )
+    llm.stream.assert_called_once()
+    assert conversation.memory.save_context.call_count == 2
+    assert conversation.memory.save_context.call_args.args[1] == {
+        "output": "Safe for you."
+    }
+    assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        {"product_name": "cerave  cream"},
+        {"ingredients": [dict(INGREDIENTS[0], name="water"), INGREDIENTS[1]]},
+        {"user_profile": dict(PROFILE, skinType="dry")},
+        {"user_profile": dict(PROFILE, allergies="Fragrance")},
+    ],
+)
+def test_request_rendering_another_prompt_is_not_replayed(
+    client, cache, llm, conversation, change
+):
+    """
+    Test that a request whose prompt differs in any way, even in case or order, is generated.
+    """
+    recommend(client)
+    recommend(client, dict(REQUEST, **change))
+
+    assert llm.stream.call_count == 2
+    assert llm.stream.call_args_list[0].args[0] != llm.stream.call_args_list[1].args[0]
+
+
+def test_prompt_change_invalidates_cache(client, cache, llm, conversation, mocker):
+    """
+    Test that recommendations made with an older prompt version are not replayed.
+    """
+    recommend(client)
+    mocker.patch("backend.server.RECOMMENDATION_PROMPT_VERSION", "changed")
+    recommend(client)
+
+    assert llm.stream.call_count == 2
+
+
+def test_sampling_temperature_disables_cache(client, cache, llm, conversation):
+    """
+    Test that answers of a non-deterministic LLM are never cached.
+    """
+    llm.temperature = 0.7
+
+    recommend(client)
+    recommend(client)
+
+    assert llm.stream.call_count == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_failed_generation_is_not_cached(client, cache, llm, conversation):
+    """
+    Test that a stream cut short by an LLM error is not cached.
+    """
+
+    def failing_stream(prompt, config=None):
+        yield "Safe"
+        raise RuntimeError("LLM down")
+
+    llm.stream.side_effect = failing_stream
+
+    assert '"error": "LLM down"' in recommend(client)
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,41 @@
+from backend.http_client import fetch_html
+from backend.replay import ReplayServer, page_key, record
+from backend.upstream import UpstreamScheduler
+
+
+def test_page_key_normalizes_search():
+    """
+    Test that search pages are keyed by their normalized query, other pages by path.
+    """
+    assert (
+        page_key("https://www.ewg.org/skindeep/search/?search=CeraVe%20Cream&page=1")
+        == "/skindeep/search/?search=cerave cream"
+    )
+    assert page_key("https://www.ewg.org/skindeep/products/1-A/?x=1") == (
+        "/skindeep/products/1-A/"
+    )
+
+
+def test_record_then_replay(tmp_path, mocker):
+    """
+    Test that recorded search and product pages are served back by a new replay server.
+    """
+    mocker.patch("backend.replay.upstream", UpstreamScheduler(rate=1000, burst=1000))
+    with ReplayServer() as live:
+        recorded = record(["CeraVe", "zzqx"], tmp_path, base_url=live.base_url)
+
+    assert recorded == [
+        "/skindeep/search/?search=cerave",
+        "/skindeep/products/123456-CeraVe_Moisturizing_Cream/",
+        "/skindeep/search/?search=zzqx",
+    ]
+    with ReplayServer(tmp_path) as replay:
+        html = fetch_html(replay.base_url + "/skindeep/search/?search=cerave")
+        assert "CeraVe Moisturizing Cream" in html
+        assert "ingredient-overview-tr" in fetch_html(
+            replay.base_url + "/skindeep/products/123456-CeraVe_Moisturizing_Cream/"
+        )
+        assert replay.requested == [
+            "/skindeep/search/",
+            "/skindeep/products/123456-CeraVe_Moisturizing_Cream/",
+        ]
@@ -0,0 +1,150 @@
+from backend.resolution_cache import ResolutionCache
+
+CREAM_URL = "https://www.ewg.org/skindeep/products/123456-CeraVe_Moisturizing_Cream/"
+CLEANSER_URL = "https://www.ewg.org/skindeep/products/654321-CeraVe_Hydrating_Cleanser/"
+LISTINGS = [
+    {"product_url": CREAM_URL, "product_name": "CeraVe Moisturizing Cream"},
+    {"product_url": CLEANSER_URL, "product_name": "CeraVe Hydrating Cleanser"},
+]
+
+
+def test_resolution_by_normalized_query():
+    """
+    Test that a resolution is returned for any spelling of the same query.
+    """
+    resolutions = ResolutionCache(path=None)
+    resolutions.put("CeraVe Cream", CREAM_URL)
+
+    assert resolutions.get("  cerave CREAM") == CREAM_URL
+    assert resolutions.get("CeraVe") is None
+    assert resolutions.stats()["search_hits"] == 1
+    assert resolutions.stats()["misses"] == 1
+
+
+def test_resolution_expires(mocker):
+    """
+    Test that resolutions are forgotten once their TTL has passed.
+    """
+    mock_time = mocker.patch("backend.resolution_cache.time.time", return_value=0)
+    resolutions = ResolutionCache(path=None, ttl_days=1)
+    resolutions.put("CeraVe Cream", CREAM_URL)
+
+    mock_time.return_value = 86400
+    assert resolutions.get("CeraVe Cream") == CREAM_URL
+    mock_time.return_value = 86401
+    assert resolutions.get("CeraVe Cream") is None
+    assert resolutions.stats()["expired"] == 1
+    assert resolutions.stats()["entries"] == 0
+
+
+def test_listing_resolves_every_listed_product():
+    """
+    Test that the products of a search listing resolve by name without a search of their own.
+    """
+    resolutions = ResolutionCache(path=None)
+
+    assert (
+        resolutions.put_listing(LISTINGS + [{"product_url": "x", "product_name": None}])
+        == 2
+    )
+    assert resolutions.get("cerave hydrating cleanser") == CLEANSER_URL
+    assert resolutions.stats()["listing_hits"] == 1
+
+
+def test_listing_does_not_replace_searched_query():
+    """
+    Test that a fresh resolution of a searched query beats the same name in a listing.
+    """
+    resolutions = ResolutionCache(path=None)
+    resolutions.put(
+        "CeraVe Hydrating Cleanser", "https://www.ewg.org/skindeep/products/1/"
+    )
+
+    resolutions.put_listing(LISTINGS)
+
+    assert resolutions.get("CeraVe Hydrating Cleanser") == (
+        "https://www.ewg.org/skindeep/products/1/"
+    )
+
+
+def test_resolution_evicts_least_recently_used():
+    """
+    Test that the least recently used resolution is dropped beyond the entry limit.
+    """
+    resolutions = ResolutionCache(path=None, max_entries=2)
+    resolutions.put("a", "https://www.ewg.org/a/")
+    resolutions.put("b", "https://www.ewg.org/b/")
+    resolutions.get("a")
+
+    resolutions.put("c", "https://www.ewg.org/c/")
+
+    assert resolutions.get("b") is None
+    assert resolutions.get("a") == "https://www.ewg.org/a/"
+    assert resolutions.stats()["evictions"] == 1
+
+
+def test_resolution_discard():
+    """
+    Test that a discarded resolution is no longer returned.
+    """
+    resolutions = ResolutionCache(path=None)
+    resolutions.put("CeraVe Cream", CREAM_URL)
+
+    assert resolutions.discard("cerave cream") is True
+    assert resolutions.discard("cerave cream") is False
+    assert resolutions.get("CeraVe Cream") is None
+
+
+def test_resolution_persists(tmp_path):
+    """
+    Test that flushed resolutions are loaded by a new cache on the same file.
+    """
+    path = str(tmp_path / "resolution_cache.json")
+    resolutions = ResolutionCache(path=path, flush_interval=60)
+    resolutions.put("CeraVe Cream", CREAM_URL)
+    resolutions.put_listing(LISTINGS)
+    resolutions.flush()
+
+    reloaded = ResolutionCache(path=path)
+
+    assert reloaded.get("CeraVe Cream") == CREAM_URL
+    assert reloaded.get("CeraVe Hydrating Cleanser") == CLEANSER_URL
+    assert reloaded.stats()["entries"] == 3
+
+
+def test_resolution_picks_up_other_process(tmp_path):
+    """
+    Test that a cache sharing the file with another process keeps both processes' resolutions.
+    """
+    path = str(tmp_path / "resolution_cache.json")
+    first = ResolutionCache(path=path, flush_interval=60)
+    second = ResolutionCache(path=path, flush_interval=60)
+    first.put("CeraVe Cream", CREAM_URL)
+    first.flush()
+
+    second.put("CeraVe Cleanser", CLEANSER_URL)
+    second.flush()
+
+    assert second.get("CeraVe Cream") == CREAM_URL
+    assert ResolutionCache(path=path).stats()["entries"] == 2
+
+
+def test_discard_survives_merge_with_other_process(tmp_path):
+    """
+    Test that a discarded resolution is not merged back from a file another process rewrote.
+    """
+    path = str(tmp_path / "resolution_cache.json")
+    first = ResolutionCache(path=path, flush_interval=60)
+    second = ResolutionCache(path=path, flush_interval=60)
+    first.put("CeraVe Cream", CREAM_URL)
+    first.flush()
+    assert second.get("CeraVe Cream") == CREAM_URL
+
+    first.put("CeraVe Cleanser", CLEANSER_URL)
+    first.flush()
+    second.discard("CeraVe Cream")
+    second.flush()
+
+    reloaded = ResolutionCache(path=path)
+    assert reloaded.get("CeraVe Cream") is None
+    assert reloaded.get("CeraVe Cleanser") == CLEANSER_URL
@@ -0,0 +1,84 @@
+import os
+
+import pytest
+
+from backend.benchmarks.scrape import (
+    offline_scraper,
+    over_budget,
+    parse_us_per_ingredient,
+    time_scrape,
+)
+from backend.replay import ReplayServer
+
+# The Selenium path needs Chrome and chromedriver, so it is only tested on request
+BROWSER_TESTS = os.getenv("SCRAPE_BROWSER_TESTS", "false").lower() == "true"
+
+
+@pytest.fixture
+def replay():
+    """Fixture for the scraper running offline against the recorded fixture pages."""
+    with ReplayServer() as server, offline_scraper(server):
+        yield server
+
+
+def test_offline_scrape_loads_each_page_once(replay):
+    """
+    Test that an offline scrape loads the search and product pages once each.
+    """
+    _, pages = time_scrape(replay, repeats=5)
+
+    assert pages == 2
+
+
+def test_offline_scrapes_reuse_one_connection(replay):
+    """
+    Test that repeated scrapes send every page request over one kept-alive connection.
+    """
+    before = replay.connections
+
+    time_scrape(replay, repeats=5)
+
+    assert replay.connections - before <= 1
+
+
+def test_resolved_scrape_loads_only_the_product_page(replay):
+    """
+    Test that a scrape of a resolved query loads just the product page.
+    """
+    _, pages = time_scrape(replay, resolved=True, repeats=5)
+
+    assert pages == 1
+
+
+def test_parse_benchmark_scales_the_fixture_page(mocker):
+    """
+    Test that the parse benchmark parses every ingredient of each scaled page.
+    """
+    mocker.patch("backend.benchmarks.product_page.REPEATS", 1)
+
+    assert list(parse_us_per_ingredient([12, 200])) == [12, 200]
+
+
+def test_over_budget_reports_slow_and_superlinear_results():
+    """
+    Test that the benchmark's budget check names each exceeded budget.
+    """
+    assert over_budget({"cold": 20.0}, {10: 50.0, 200: 60.0}) == []
+
+    failures = over_budget({"cold": 900.0}, {10: 50.0, 200: 2000.0})
+
+    assert len(failures) == 3
+    assert failures[0].startswith("cold scrape took 900.0 ms")
+
+
+@pytest.mark.skipif(
+    not BROWSER_TESTS, reason="set SCRAPE_BROWSER_TESTS=true with Chrome"
+)
+def test_browser_scrape_of_recorded_pages():
+    """
+    Test that the Selenium path scrapes the recorded pages, loading each page once.
+    """
+    with ReplayServer() as server, offline_scraper(server, browser=True):
+        _, pages = time_scrape(server, repeats=1)
+
+    assert pages == 2
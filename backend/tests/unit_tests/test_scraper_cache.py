@@ -1,15 +1,26 @@
-from unittest.mock import MagicMock
+import threading
 
 import pytest
+from selenium.common.exceptions import TimeoutException
 
-from backend.scraper import scrape_product_ingredients
+from backend import scraper
+from backend.driver_pool import DriverPool
+from backend.resolution_cache import ResolutionCache
+from backend.scraper import refresh_in_background, scrape_product_ingredients
+from backend.singleflight import SingleFlight
+from backend.upstream import UpstreamScheduler
 
 
 @pytest.fixture
 def mock_browser(mocker):
     """Fixture to mock Selenium WebDriver."""
     mock_browser = mocker.MagicMock()
-    mocker.patch("backend.scraper.webdriver.Chrome", return_value=mock_browser)
+    mocker.patch(
+        "backend.scraper.driver_pool", DriverPool(size=1, factory=lambda: mock_browser)
+    )
+    mocker.patch("backend.scraper.fetch_over_http", return_value=None)  # Selenium path
+    mocker.patch("backend.scraper.resolution_cache", ResolutionCache(path=None))
+    mocker.patch("backend.scraper.upstream", UpstreamScheduler(rate=1000, burst=1000))
     return mock_browser
 
 
@@ -18,6 +29,8 @@ def mock_cache(mocker):
     """Fixture to mock cache functions."""
     mock_get = mocker.patch("backend.scraper.get_cached_product")
     mock_save = mocker.patch("backend.scraper.cache_product_data")
+    mocker.patch("backend.scraper.get_cached_product_by_url", return_value=None)
+    mocker.patch("backend.scraper.link_query")
     return mock_get, mock_save
 
 
@@ -70,43 +83,30 @@ def test_scrape_product_ingredients_live_scrape(mock_browser, mock_cache):
         "https://example.com"
     )
 
-    # Mock product name extraction
-    mock_browser.find_element.return_value.text.strip.return_value = "Unknown Product"
-
-    # Mock ingredient elements
-    def mock_find_elements(by, selector):
-        if "td-ingredient-interior" in selector:
-            return [MagicMock(text="Water"), MagicMock(text="Fragrance")]
-        elif "td-score img.ingredient-score" in selector:
-            return [
-                MagicMock(get_attribute=lambda attr: "Ingredient score: 1"),
-                MagicMock(get_attribute=lambda attr: "Ingredient score: 8"),
-            ]
-        elif "tr.ingredient-more-info-wrapper" in selector:
-            concern_tbody = MagicMock()
-
-            concern_row = MagicMock()
-            concern_title_td = MagicMock()
-            concern_title_td.get_attribute.return_value = (
-                "CONCERNS"  # First TD contains "CONCERNS"
-            )
-
-            concern_data_td = MagicMock()
-            concern_data_td.get_attribute.return_value = "<ul><li>Allergies/immunotoxicity (high)</li><li>Endocrine disruption (moderate)</li></ul>"
-
-            concern_row.find_elements.return_value = [concern_title_td, concern_data_td]
-
-            concern_tbody.find_elements.return_value = [concern_row]
-
-            return [[], concern_tbody]  # water: []
-        return []
-
-    mock_browser.find_elements.side_effect = mock_find_elements
+    # Mock the rendered product page
+    mock_browser.page_source = """
+        <table><tbody>
+          <tr class="ingredient-overview-tr">
+            <td class="td-ingredient"><div class="td-ingredient-interior">Water</div></td>
+            <td class="td-score"><img class="ingredient-score" alt="Ingredient score: 1"></td>
+          </tr>
+          <tr class="ingredient-overview-tr">
+            <td class="td-ingredient"><div class="td-ingredient-interior">Fragrance</div></td>
+            <td class="td-score"><img class="ingredient-score" alt="Ingredient score: 8"></td>
+          </tr>
+          <tr class="ingredient-more-info-wrapper"><td><div class="ingredient-more-info">
+            <table><tbody><tr>
+              <td>CONCERNS</td>
+              <td><ul><li>Allergies/immunotoxicity (high)</li><li>Endocrine disruption (moderate)</li></ul></td>
+            </tr></tbody></table>
+          </div></td></tr>
+        </tbody></table>
+    """
 
     result = scrape_product_ingredients("CeraVe Moisturizing Cream")
 
     # Assertions
-    assert result["product_name"] == "Unknown Product"  # Mocked scenario
+    assert result["product_name"] == "Unknown Product"  # No product heading
     assert len(result["ingredients"]) == 2
 
     assert result["ingredients"][0]["name"] == "Water"
@@ -121,3 +121,166 @@ def test_scrape_product_ingredients_live_scrape(mock_browser, mock_cache):
     ]
 
     mock_cache_product_data.assert_called_once()  # Should save new cache
+
+
+def test_empty_listing_is_not_retried(mock_browser, mock_cache, mocker):
+    """
+    Test that a search page that loaded with an empty listing is answered without reloading it.
+    """
+    mock_get_cached_product, _ = mock_cache
+    mock_get_cached_product.return_value = None
+    mocker.patch("backend.scraper.negative_cache.get", return_value=None)
+    mocker.patch("backend.scraper.negative_cache.put")
+    mocker.patch("backend.scraper.WebDriverWait").return_value.until.side_effect = (
+        TimeoutException()
+    )
+    mock_browser.page_source = '<section class="product-listings"></section>'
+    mock_browser.current_url = "https://www.ewg.org/skindeep/search/?search=unknown"
+
+    result = scrape_product_ingredients("Unknown Product")
+
+    assert result == {"error": "No products found", "served_by": "browser"}
+    mock_browser.get.assert_called_once()
+
+
+def test_block_page_counts_as_upstream_failure(mock_browser, mock_cache, mocker):
+    """
+    Test that a block page served to the browser is retried, fails over to stale data, counts
+    towards the circuit breaker, and keeps the browser session.
+    """
+    mock_get_cached_product, _ = mock_cache
+    stale = {"product_url": "https://example.com", "ingredients": []}
+    mock_get_cached_product.side_effect = [None, stale]
+    mocker.patch("backend.scraper.negative_cache.get", return_value=None)
+    scheduler = UpstreamScheduler(rate=1000, burst=1000, retries=1, backoff_base=0)
+    mocker.patch("backend.scraper.upstream", scheduler)
+    mocker.patch("backend.scraper.WebDriverWait").return_value.until.side_effect = (
+        TimeoutException()
+    )
+    mock_browser.page_source = "<html><body>Access denied</body></html>"
+
+    result = scrape_product_ingredients("CeraVe Moisturizing Cream")
+
+    assert result == dict(stale, stale=True, served_by="stale")
+    assert mock_browser.get.call_count == 2
+    assert scheduler.stats()["failures"] == 1
+    mock_browser.quit.assert_not_called()
+
+
+def test_scrape_product_ingredients_alias_of_cached_product(mock_browser, mocker):
+    """Test that a new query resolving to an already cached product skips the product page."""
+    mocker.patch("backend.scraper.get_cached_product", return_value=None)
+    mock_save = mocker.patch("backend.scraper.cache_product_data")
+    mock_link = mocker.patch("backend.scraper.link_query")
+    mocker.patch(
+        "backend.scraper.get_cached_product_by_url",
+        return_value={
+            "product_url": "https://example.com",
+            "product_name": "CeraVe Moisturizing Cream",
+            "ingredients": [{"name": "Water", "score": "1", "concerns": []}],
+        },
+    )
+    mock_browser.find_element.return_value.get_attribute.return_value = (
+        "https://example.com"
+    )
+    mock_browser.current_url = (
+        "https://example.com/skindeep/search/?search=CeraVe+Cream"
+    )
+    mock_browser.page_source = """
+        <section class="product-listings">
+          <a href="https://example.com"><div class="product-name">CeraVe Moisturizing Cream</div></a>
+        </section>
+    """
+
+    result = scrape_product_ingredients("CeraVe Cream")
+
+    assert result["product_name"] == "CeraVe Moisturizing Cream"
+    mock_browser.get.assert_called_once()  # Only the search page was loaded
+    mock_link.assert_called_once_with("CeraVe Cream", "https://example.com")
+    mock_save.assert_not_called()
+    # The search is remembered for the query and the listed product name
+    assert scraper.resolution_cache.get("ceraVe cream") == "https://example.com"
+    assert (
+        scraper.resolution_cache.get("CeraVe Moisturizing Cream")
+        == "https://example.com"
+    )
+
+
+def test_scrape_product_ingredients_stale_refreshes_in_background(mock_cache, mocker):
+    """Test that stale cached data is returned right away while a refresh is started."""
+    mock_get_cached_product, _ = mock_cache
+    mock_get_cached_product.return_value = {
+        "product_url": "https://example.com",
+        "product_name": "CeraVe Moisturizing Cream",
+        "ingredients": [{"name": "Water", "score": "1", "concerns": []}],
+        "stale": True,
+    }
+    mock_refresh = mocker.patch("backend.scraper.refresh_in_background")
+    mock_fetch = mocker.patch("backend.scraper.fetch_product_ingredients")
+
+    result = scrape_product_ingredients("CeraVe")
+
+    assert result["stale"] is True
+    mock_refresh.assert_called_once_with("CeraVe", "https://example.com")
+    mock_fetch.assert_not_called()
+
+
+def test_refresh_in_background_one_refresh_per_product(mocker):
+    """Test that only one background refresh runs per product at a time."""
+    release = threading.Event()
+    mock_fetch = mocker.patch(
+        "backend.scraper.fetch_product_ingredients",
+        side_effect=lambda name, url: release.wait(5),
+    )
+
+    assert refresh_in_background("CeraVe", "https://example.com") is True
+    assert refresh_in_background("cerave", "https://example.com") is False
+    assert refresh_in_background("Other", "https://example.com/other") is True
+
+    release.set()
+    for thread in list(scraper._refreshing.values()):
+        thread.join(5)
+    assert mock_fetch.call_count == 2
+    assert scraper._refreshing == {}
+
+    # Once the refresh has finished, the product can be refreshed again
+    assert refresh_in_background("CeraVe", "https://example.com") is True
+    for thread in list(scraper._refreshing.values()):
+        thread.join(5)
+
+
+def test_scrape_product_ingredients_coalesces_concurrent_misses(mock_cache, mocker):
+    """Test that concurrent lookups of the same product trigger a single scrape."""
+    mock_get_cached_product, _ = mock_cache
+    mock_get_cached_product.return_value = None
+    mocker.patch("backend.scraper.scrape_flight", SingleFlight(timeout=5))
+    mocker.patch("backend.scraper.negative_cache.get", return_value=None)
+    release = threading.Event()
+    scraped = {"product_url": "https://example.com", "ingredients": []}
+
+    def slow_fetch(name):
+        release.wait(5)
+        return scraped
+
+    mock_fetch = mocker.patch(
+        "backend.scraper.fetch_product_ingredients", side_effect=slow_fetch
+    )
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda q=query: results.append(scrape_product_ingredients(q))
+        )
+        for query in ["CeraVe Cream", "cerave cream", "CERAVE  CREAM"]
+    ]
+    for thread in threads:
+        thread.start()
+    while scraper.scrape_flight.stats()["coalesced"] < 2:
+        threading.Event().wait(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == [scraped] * 3
+    assert results[0] is not results[1]  # Each caller gets its own copy
+    mock_fetch.assert_called_once()
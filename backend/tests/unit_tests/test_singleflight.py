@@ -0,0 +1,94 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend.singleflight import SingleFlight
+
+
+def run_concurrently(flight, key, fn, callers):
+    """Start `callers` calls for `key` and return their futures once all have joined the flight."""
+    pool = ThreadPoolExecutor(callers)
+    futures = [pool.submit(flight.do, key, fn) for _ in range(callers)]
+    while flight.stats()["calls"] + flight.stats()["coalesced"] < callers:
+        threading.Event().wait(0.001)
+    return pool, futures
+
+
+def test_concurrent_calls_share_one_execution():
+    """
+    Test that callers arriving while a call is in flight receive its result.
+    """
+    flight = SingleFlight(timeout=5)
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return {"product_name": "CeraVe"}
+
+    pool, futures = run_concurrently(flight, "cerave", fetch, 5)
+    release.set()
+
+    assert [f.result(5) for f in futures] == [{"product_name": "CeraVe"}] * 5
+    assert len(calls) == 1
+    stats = flight.stats()
+    assert stats["calls"] == 1
+    assert stats["coalesced"] == 4
+    assert stats["in_flight"] == 0
+    pool.shutdown()
+
+
+def test_errors_are_shared():
+    """
+    Test that an exception raised by the call is re-raised to every coalesced caller.
+    """
+    flight = SingleFlight(timeout=5)
+    release = threading.Event()
+
+    def fetch():
+        release.wait(5)
+        raise RuntimeError("Driver pool is shut down")
+
+    pool, futures = run_concurrently(flight, "cerave", fetch, 3)
+    release.set()
+
+    for future in futures:
+        with pytest.raises(RuntimeError, match="shut down"):
+            future.result(5)
+    assert flight.stats()["errors"] == 1
+    pool.shutdown()
+
+
+def test_key_is_released_after_the_call():
+    """
+    Test that a call made after the previous one finished runs again.
+    """
+    flight = SingleFlight()
+    results = iter([1, 2])
+
+    assert flight.do("cerave", lambda: next(results)) == 1
+    assert flight.do("cerave", lambda: next(results)) == 2
+    assert flight.stats()["coalesced"] == 0
+
+
+def test_coalesced_caller_times_out():
+    """
+    Test that a waiting caller gives up after the timeout while the call keeps running.
+    """
+    flight = SingleFlight(timeout=0.05)
+    release = threading.Event()
+    leader = threading.Thread(
+        target=flight.do, args=("cerave", lambda: release.wait(5))
+    )
+    leader.start()
+    while flight.in_flight() == 0:
+        threading.Event().wait(0.001)
+
+    with pytest.raises(TimeoutError):
+        flight.do("cerave", lambda: None)
+
+    release.set()
+    leader.join(5)
+    assert flight.stats()["timeouts"] == 1
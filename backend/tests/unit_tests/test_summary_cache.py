@@ -0,0 +1,118 @@
+from backend.summary_cache import SummaryCache, ingredient_fingerprint
+
+INGREDIENTS = [
+    {"name": "Water", "score": 1, "concerns": []},
+    {"name": "Fragrance", "score": "8", "concerns": ["Allergen", "Irritant"]},
+]
+SUMMARY = ["Hydrating", "Soothing"]
+
+
+def test_fingerprint_ignores_order_case_and_spacing():
+    """
+    Test that ingredients, and their concerns, are fingerprinted as a set.
+    """
+    reordered = [
+        {"name": "  FRAGRANCE", "score": 8, "concerns": ["irritant", "allergen"]},
+        {"name": "water", "score": "1", "concerns": []},
+    ]
+
+    assert ingredient_fingerprint(INGREDIENTS) == ingredient_fingerprint(reordered)
+
+
+def test_fingerprint_distinguishes_scores_and_concerns():
+    """
+    Test that a different score or concern is a different ingredient list.
+    """
+    rescored = [dict(INGREDIENTS[0], score=2), INGREDIENTS[1]]
+    fewer_concerns = [INGREDIENTS[0], dict(INGREDIENTS[1], concerns=["Allergen"])]
+
+    fingerprint = ingredient_fingerprint(INGREDIENTS)
+    assert ingredient_fingerprint(rescored) != fingerprint
+    assert ingredient_fingerprint(fewer_concerns) != fingerprint
+    assert ingredient_fingerprint(INGREDIENTS[:1]) != fingerprint
+
+
+def test_counts_hits_and_misses():
+    """
+    Test that lookups are counted as hits or misses.
+    """
+    summaries = SummaryCache(path=None)
+
+    assert summaries.get(INGREDIENTS) is None
+    summaries.put(INGREDIENTS, SUMMARY)
+    assert summaries.get(list(reversed(INGREDIENTS))) == SUMMARY
+
+    assert summaries.stats() == {
+        "entries": 1,
+        "hits": 1,
+        "misses": 1,
+        "expired": 0,
+        "evictions": 0,
+    }
+
+
+def test_summary_expires(mocker):
+    """
+    Test that summaries are regenerated once their TTL has passed.
+    """
+    mock_time = mocker.patch("backend.persistent_cache.time.time", return_value=0)
+    summaries = SummaryCache(path=None, ttl_days=1)
+    summaries.put(INGREDIENTS, SUMMARY)
+
+    mock_time.return_value = 86400
+    assert summaries.get(INGREDIENTS) == SUMMARY
+    mock_time.return_value = 86401
+    assert summaries.get(INGREDIENTS) is None
+    assert summaries.stats()["expired"] == 1
+    assert summaries.stats()["entries"] == 0
+
+
+def test_evicts_least_recently_used():
+    """
+    Test that the least recently used summary is dropped beyond max_entries.
+    """
+    summaries = SummaryCache(path=None, max_entries=2)
+    first, second, third = ([{"name": n, "score": 1, "concerns": []}] for n in "abc")
+    summaries.put(first, ["A"])
+    summaries.put(second, ["B"])
+    summaries.get(first)
+    summaries.put(third, ["C"])
+
+    assert summaries.get(second) is None
+    assert summaries.get(first) == ["A"]
+    assert summaries.stats()["evictions"] == 1
+
+
+def test_persists_and_shares_summaries(tmp_path):
+    """
+    Test that flushed summaries survive a restart and reach other processes sharing the file.
+    """
+    path = str(tmp_path / "summary_cache.json")
+    writer = SummaryCache(path=path, flush_interval=60)
+    other = SummaryCache(path=path, flush_interval=60)
+    assert other.get(INGREDIENTS) is None
+
+    writer.put(INGREDIENTS, SUMMARY)
+    writer.flush()
+
+    assert SummaryCache(path=path).get(INGREDIENTS) == SUMMARY
+    assert other.get(INGREDIENTS) == SUMMARY
+
+
+def test_flush_keeps_summaries_of_other_processes(tmp_path):
+    """
+    Test that a flush merges in what another process wrote instead of overwriting it.
+    """
+    path = str(tmp_path / "summary_cache.json")
+    first = SummaryCache(path=path, flush_interval=60)
+    second = SummaryCache(path=path, flush_interval=60)
+    other_ingredients = [{"name": "Glycerin", "score": 1, "concerns": []}]
+
+    first.put(INGREDIENTS, SUMMARY)
+    second.put(other_ingredients, ["Moisturizing"])
+    first.flush()
+    second.flush()
+
+    restarted = SummaryCache(path=path)
+    assert restarted.get(INGREDIENTS) == SUMMARY
+    assert restarted.get(other_ingredients) == ["Moisturizing"]
@@ -0,0 +1,233 @@
+import threading
+import time
+
+import pytest
+import requests
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from backend.config.settings import UPSTREAM_STALE_MAX_DAYS
+from backend.negative_cache import NegativeCache
+from backend.scraper import scrape_product_ingredients
+from backend.singleflight import SingleFlight
+from backend.upstream import (
+    BlockedPage,
+    CircuitBreaker,
+    TokenBucket,
+    UpstreamScheduler,
+    UpstreamUnavailable,
+    is_transient,
+)
+
+
+def http_error(status, headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    return requests.HTTPError(f"{status} Error", response=response)
+
+
+@pytest.fixture
+def clock(mocker):
+    """Fixture for a fake monotonic clock that `time.sleep` advances."""
+    now = [0.0]
+    mocker.patch("backend.upstream.time.monotonic", side_effect=lambda: now[0])
+    sleep = mocker.patch(
+        "backend.upstream.time.sleep",
+        side_effect=lambda seconds: now.__setitem__(0, now[0] + seconds),
+    )
+    sleep.now = now
+    return sleep
+
+
+def test_is_transient():
+    """
+    Test that throttling, server and network errors are retried, and wrong pages are not.
+    """
+    assert is_transient(http_error(429))
+    assert is_transient(http_error(503))
+    assert is_transient(requests.ConnectionError())
+    assert is_transient(requests.Timeout())
+    assert is_transient(TimeoutException())
+    assert is_transient(WebDriverException("unknown error: net::ERR_CONNECTION_RESET"))
+    assert is_transient(BlockedPage("not a search results page"))
+    assert not is_transient(http_error(404))
+    assert not is_transient(WebDriverException("invalid session id"))
+    assert not is_transient(ValueError())
+
+
+def test_token_bucket_limits_rate(clock):
+    """
+    Test that the bucket allows a burst, then one token per 1/rate seconds.
+    """
+    bucket = TokenBucket(rate=2, burst=3)
+
+    for _ in range(3):
+        assert bucket.acquire()
+    assert clock.now[0] == 0
+    assert bucket.acquire()
+    assert clock.now[0] == pytest.approx(0.5)
+    assert bucket.acquire(timeout=0.1) is False
+
+
+def test_retries_transient_failures_with_backoff(clock):
+    """
+    Test that transient failures are retried with exponential backoff until they succeed.
+    """
+    scheduler = UpstreamScheduler(rate=100, burst=100, retries=3, backoff_base=1)
+    attempts = [http_error(503), requests.ConnectionError()]
+
+    def fetch():
+        if attempts:
+            raise attempts.pop(0)
+        return "<html>"
+
+    assert scheduler.call(fetch) == "<html>"
+    delays = [call.args[0] for call in clock.call_args_list]
+    assert len(delays) == 2
+    assert 0 <= delays[0] <= 1 and 0 <= delays[1] <= 2
+    assert scheduler.stats()["retries"] == 2
+    assert scheduler.stats()["failures"] == 0
+
+
+def test_honors_retry_after(clock):
+    """
+    Test that a Retry-After header stretches the backoff, up to backoff_max.
+    """
+    scheduler = UpstreamScheduler(rate=100, burst=100, backoff_base=0.1, backoff_max=5)
+
+    assert scheduler.backoff(0, http_error(429, {"Retry-After": "3"})) == 3
+    assert scheduler.backoff(0, http_error(429, {"Retry-After": "60"})) == 5
+    assert scheduler.backoff(0, http_error(429, {"Retry-After": "soon"})) <= 0.1
+
+
+def test_non_transient_errors_are_not_retried(clock):
+    """
+    Test that an error like a 404 is raised right away and does not open the breaker.
+    """
+    scheduler = UpstreamScheduler(
+        rate=100, burst=100, breaker=CircuitBreaker(threshold=1, reset_timeout=30)
+    )
+
+    def fetch():
+        raise http_error(404)
+
+    with pytest.raises(requests.HTTPError):
+        scheduler.call(fetch)
+    clock.assert_not_called()
+    assert scheduler.stats()["breaker"] == "closed"
+
+
+def test_breaker_opens_fails_fast_and_recovers(clock):
+    """
+    Test that repeated failures open the breaker, and a successful trial closes it again.
+    """
+    scheduler = UpstreamScheduler(
+        rate=100,
+        burst=100,
+        retries=0,
+        breaker=CircuitBreaker(threshold=2, reset_timeout=30),
+    )
+
+    def fetch():
+        raise http_error(503)
+
+    for _ in range(2):
+        with pytest.raises(UpstreamUnavailable):
+            scheduler.call(fetch)
+    assert scheduler.stats()["breaker"] == "open"
+
+    calls = []
+    with pytest.raises(UpstreamUnavailable):
+        scheduler.call(calls.append, "not sent")
+    assert calls == []
+    assert scheduler.stats()["rejected"] == 1
+
+    clock.now[0] += 30
+    assert scheduler.stats()["breaker"] == "half_open"
+    assert scheduler.call(lambda: "ok") == "ok"
+    stats = scheduler.stats()
+    assert stats["breaker"] == "closed"
+    assert stats["breaker_opened"] == 1
+
+
+def test_failed_trial_reopens_breaker(clock):
+    """
+    Test that a failing half-open trial opens the breaker for another reset period.
+    """
+    breaker = CircuitBreaker(threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now[0] += 30
+
+    assert breaker.allow() is True
+    assert breaker.allow() is False  # Only one trial at a time
+    breaker.record_failure()
+
+    assert breaker.state == "open"
+    assert breaker.opened == 2
+
+
+def test_caps_concurrent_requests():
+    """
+    Test that no more than max_concurrent requests are in flight at once.
+    """
+    scheduler = UpstreamScheduler(rate=1000, burst=1000, max_concurrent=2)
+    lock = threading.Lock()
+    running = [0, 0]  # current, peak
+
+    def fetch():
+        with lock:
+            running[0] += 1
+            running[1] = max(running[1], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+
+    threads = [threading.Thread(target=scheduler.call, args=(fetch,)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert running[1] == 2
+    assert scheduler.stats()["in_flight"] == 0
+
+
+def test_unavailable_upstream_serves_old_cached_product(mocker):
+    """
+    Test that an open breaker serves an old cached product instead of an error.
+    """
+    old = {"product_url": "https://example.com", "product_name": "CeraVe Cream"}
+    mock_get = mocker.patch(
+        "backend.scraper.get_cached_product", side_effect=[None, old]
+    )
+    mocker.patch("backend.scraper.negative_cache", NegativeCache(60, 100))
+    mocker.patch("backend.scraper.scrape_flight", SingleFlight())
+    mocker.patch(
+        "backend.scraper.fetch_product_ingredients",
+        side_effect=UpstreamUnavailable("circuit breaker is open"),
+    )
+
+    result = scrape_product_ingredients("CeraVe")
+
+    assert result == dict(old, stale=True, served_by="stale")
+    assert mock_get.call_args.kwargs["stale_grace_days"] == UPSTREAM_STALE_MAX_DAYS
+
+
+def test_unavailable_upstream_is_not_remembered_as_failure(mocker):
+    """
+    Test that an outage without cached data is reported, but not negatively cached.
+    """
+    negative_cache = NegativeCache(60, 100)
+    mocker.patch("backend.scraper.get_cached_product", return_value=None)
+    mocker.patch("backend.scraper.negative_cache", negative_cache)
+    mocker.patch("backend.scraper.scrape_flight", SingleFlight())
+    mocker.patch(
+        "backend.scraper.fetch_product_ingredients",
+        side_effect=UpstreamUnavailable("circuit breaker is open"),
+    )
+
+    assert scrape_product_ingredients("CeraVe") == {
+        "error": "EWG is temporarily unavailable",
+        "served_by": "stale",
+    }
+    assert negative_cache.get("CeraVe") is None
@@ -0,0 +1,356 @@
+import random
+import threading
+import time
+from collections import Counter
+
+import requests
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from backend.config.settings import (
+    UPSTREAM_ACQUIRE_TIMEOUT,
+    UPSTREAM_BACKOFF_BASE,
+    UPSTREAM_BACKOFF_MAX,
+    UPSTREAM_BREAKER_RESET,
+    UPSTREAM_BREAKER_THRESHOLD,
+    UPSTREAM_BURST,
+    UPSTREAM_MAX_CONCURRENT,
+    UPSTREAM_RATE,
+    UPSTREAM_RETRIES,
+)
+
+# Circuit breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Status codes meaning the site is overloaded or throttling us, rather than the page being wrong
+TRANSIENT_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class UpstreamUnavailable(Exception):
+    """Raised when EWG keeps failing, the circuit breaker is open, or the rate limit is exhausted."""
+
+
+class BlockedPage(Exception):
+    """Raised when EWG answers a page load with another page, e.g. a block or captcha page."""
+
+
+def is_transient(error):
+    """
+    Tell whether a failed request to EWG is worth retrying.
+
+    Args:
+        error (Exception): What the request raised.
+
+    Returns:
+        bool: `True` for timeouts, connection errors, throttling and server errors, in
+              plain HTTP requests and in browser page loads, and for `BlockedPage`. Callers
+              waiting for an element of a loaded page should catch its `TimeoutException`
+              rather than let it reach `UpstreamScheduler.call`.
+    """
+    if isinstance(error, BlockedPage):
+        return True
+    if isinstance(error, requests.HTTPError):
+        response = error.response
+        return response is not None and response.status_code in TRANSIENT_STATUS_CODES
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(error, TimeoutException):
+        return True
+    # Chrome reports network failures as e.g. "unknown error: net::ERR_CONNECTION_RESET"
+    return isinstance(error, WebDriverException) and "net::ERR_" in str(error)
+
+
+def _retry_after(error):
+    # Seconds a 429 or 503 response asked us to wait, if it said so
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("Retry-After", ""))
+    except ValueError:
+        return None
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter: `rate` tokens per second, saving up at most `burst`.
+
+    Args:
+        rate (float): Tokens added per second.
+        burst (int): Bucket capacity; the bucket starts full.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        # Caller holds self._lock
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout=None):
+        """
+        Take one token, waiting for the bucket to refill if it is empty.
+
+        Returns:
+            bool: `True` if a token was taken within `timeout` seconds.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    def tokens(self):
+        """Return the tokens currently available."""
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+
+class CircuitBreaker:
+    """
+    Stops requests to an unhealthy upstream so callers fail fast instead of waiting on it.
+
+    The breaker opens after `threshold` consecutive failures. While open, `allow` refuses
+    every request until `reset_timeout` seconds have passed; then a single trial request is
+    let through (half open). Its success closes the breaker, its failure opens it again.
+
+    Args:
+        threshold (int): Consecutive failures that open the breaker.
+        reset_timeout (float): Seconds the breaker stays open before a trial request.
+    """
+
+    def __init__(self, threshold, reset_timeout):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial = False
+        self._lock = threading.Lock()
+        self.opened = 0  # Times the breaker opened
+
+    @property
+    def state(self):
+        """The current state: `"closed"`, `"open"` or `"half_open"`."""
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        # Caller holds self._lock
+        if (
+            self._state == OPEN
+            and time.monotonic() - self._opened_at >= self.reset_timeout
+        ):
+            self._state = HALF_OPEN
+            self._trial = False
+        return self._state
+
+    def allow(self):
+        """
+        Tell whether a request may be sent now.
+
+        Returns:
+            bool: `True` if closed, or if half open and no trial request is out yet.
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def cancel_trial(self):
+        """Give back a half-open trial that was allowed but never sent."""
+        with self._lock:
+            self._trial = False
+
+    def record_success(self):
+        """Record a successful request, closing the breaker."""
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._trial = False
+
+    def record_failure(self):
+        """Record a failed request, opening the breaker at the threshold or after a failed trial."""
+        with self._lock:
+            self._failures += 1
+            if self._current_state() == HALF_OPEN or self._failures >= self.threshold:
+                if self._state != OPEN:
+                    self.opened += 1
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._trial = False
+
+
+class UpstreamScheduler:
+    """
+    Polite gateway for every request the scraper sends to EWG.
+
+    Each call waits for a token from a `TokenBucket` and for one of `max_concurrent` slots,
+    so bursts of lookups are spread out instead of hammering (and being throttled by) the
+    site. Transient failures (see `is_transient`) are retried up to `retries` times with
+    full-jitter exponential backoff, honoring a `Retry-After` header. Calls that still fail
+    raise `UpstreamUnavailable` and count towards a `CircuitBreaker`; while it is open, calls
+    raise `UpstreamUnavailable` right away. Other errors, e.g. a 404, are raised unchanged and count as a healthy answer.
+
+    Args:
+        rate (float, optional): Requests per second. Defaults to `UPSTREAM_RATE`.
+        burst (int, optional): Requests that may be sent back to back. Defaults to `UPSTREAM_BURST`.
+        max_concurrent (int, optional): Requests in flight at once. Defaults to `UPSTREAM_MAX_CONCURRENT`.
+        acquire_timeout (float, optional): Seconds to wait for a token and a slot before giving up
+            with `UpstreamUnavailable`. Defaults to `UPSTREAM_ACQUIRE_TIMEOUT`.
+        retries (int, optional): Retries of a transient failure. Defaults to `UPSTREAM_RETRIES`.
+        backoff_base (float, optional): Backoff cap of the first retry, in seconds; doubles per retry.
+        backoff_max (float, optional): Longest wait between two attempts, in seconds.
+        breaker (CircuitBreaker, optional): Defaults to one configured by `UPSTREAM_BREAKER_THRESHOLD`
+            and `UPSTREAM_BREAKER_RESET`.
+
+    Example:
+        >>> upstream = UpstreamScheduler(rate=2, burst=5)
+        >>> html = upstream.call(fetch_html, search_url)
+        >>> upstream.stats()["breaker"]
+        'closed'
+    """
+
+    def __init__(
+        self,
+        rate=UPSTREAM_RATE,
+        burst=UPSTREAM_BURST,
+        max_concurrent=UPSTREAM_MAX_CONCURRENT,
+        acquire_timeout=UPSTREAM_ACQUIRE_TIMEOUT,
+        retries=UPSTREAM_RETRIES,
+        backoff_base=UPSTREAM_BACKOFF_BASE,
+        backoff_max=UPSTREAM_BACKOFF_MAX,
+        breaker=None,
+    ):
+        self.bucket = TokenBucket(rate, burst)
+        self.max_concurrent = max_concurrent
+        self.acquire_timeout = acquire_timeout
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker(
+            UPSTREAM_BREAKER_THRESHOLD, UPSTREAM_BREAKER_RESET
+        )
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._stats = Counter()
+
+    def _count(self, stat):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def backoff(self, attempt, error=None):
+        """Return the seconds to wait before retry number `attempt` (starting at 0)."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    def call(self, fn, *args):
+        """
+        Run `fn(*args)`, a request to EWG, under the rate limit, concurrency cap and breaker.
+
+        Returns:
+            Whatever `fn` returns.
+
+        Raises:
+            UpstreamUnavailable: If every attempt failed transiently, the breaker is open, or no
+                token or slot freed up within `acquire_timeout`.
+            Exception: Whatever `fn` raised, if the error is not transient.
+        """
+        self._count("calls")
+        if not self.breaker.allow():
+            self._count("rejected")
+            raise UpstreamUnavailable("EWG is unavailable, circuit breaker is open")
+
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            self._count("throttled")
+            self.breaker.cancel_trial()
+            raise UpstreamUnavailable(
+                f"No request slot to EWG within {self.acquire_timeout:g}s"
+            )
+        with self._lock:
+            self._in_flight += 1
+        try:
+            return self._attempt(fn, args)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            self._slots.release()
+
+    def _attempt(self, fn, args):
+        for attempt in range(self.retries + 1):
+            if not self.bucket.acquire(timeout=self.acquire_timeout):
+                self._count("throttled")
+                self.breaker.cancel_trial()
+                raise UpstreamUnavailable(
+                    f"Rate limit to EWG not lifted within {self.acquire_timeout:g}s"
+                )
+            try:
+                result = fn(*args)
+            except Exception as e:
+                if not is_transient(e):
+                    self.breaker.record_success()  # EWG answered, the request was wrong
+                    raise
+                if attempt == self.retries:
+                    self._count("failures")
+                    self.breaker.record_failure()
+                    raise UpstreamUnavailable(
+                        f"EWG request failed after {attempt + 1} attempts: {e}"
+                    ) from e
+                delay = self.backoff(attempt, e)
+                print(f"🔁 Retrying EWG request in {delay:.1f}s: {e}")
+                self._count("retries")
+                time.sleep(delay)
+            else:
+                self.breaker.record_success()
+                return result
+
+    def stats(self):
+        """
+        Return upstream scheduler statistics.
+
+        Returns:
+            dict: Circuit breaker state and times it opened, rate limit tokens available, requests
+                  in flight, and counts of calls, retries, calls that failed after their retries,
+                  calls rejected by the open breaker and calls that gave up waiting for the limits.
+        """
+        with self._lock:
+            return {
+                "breaker": self.breaker.state,
+                "breaker_opened": self.breaker.opened,
+                "tokens": round(self.bucket.tokens(), 2),
+                "in_flight": self._in_flight,
+                "calls": self._stats["calls"],
+                "retries": self._stats["retries"],
+                "failures": self._stats["failures"],
+                "rejected": self._stats["rejected"],
+                "throttled": self._stats["throttled"],
+            }
+
+
+# Shared scheduler for all requests the scraper sends to EWG
+upstream = UpstreamScheduler()
@@ -2,6 +2,35 @@ import React, { useState } from "react";
 import { useNavigate } from "react-router-dom";
 import "../App.css";
 
+const API_URL = "http://127.0.0.1:5000";
+const POLL_INTERVAL_MS = 1000;
+// Longer than a scrape job may run on the backend (SCRAPE_JOB_TIMEOUT), plus time queued
+const POLL_TIMEOUT_MS = 3 * 60 * 1000;
+
+// Cache misses are scraped in the background: poll the job until it finishes
+export const waitForJob = async (
+  statusUrl,
+  { interval = POLL_INTERVAL_MS, timeout = POLL_TIMEOUT_MS } = {},
+) => {
+  const deadline = Date.now() + timeout;
+  while (Date.now() < deadline) {
+    await new Promise((resolve) => setTimeout(resolve, interval));
+    const response = await fetch(`${API_URL}${statusUrl}`);
+    if (response.status === 404) {
+      return { error: "The lookup expired, please search again" };
+    }
+    if (!response.ok) {
+      return { error: `Checking the lookup failed (HTTP ${response.status})` };
+    }
+    const job = await response.json();
+    if (job.status === "done") return job.result;
+    if (job.status !== "queued" && job.status !== "running") {
+      return { error: job.error || `Lookup ${job.status}` };
+    }
+  }
+  return { error: "The lookup is taking too long, please try again later" };
+};
+
 const Search = () => {
   const [query, setQuery] = useState("");
   const navigate = useNavigate();
@@ -13,11 +42,12 @@ const Search = () => {
 
     try {
       const response = await fetch(
-        `http://127.0.0.1:5000/get_ingredients?product=${encodeURIComponent(
-          query,
-        )}`,
+        `${API_URL}/get_ingredients?product=${encodeURIComponent(query)}`,
       );
-      const data = await response.json();
+      let data = await response.json();
+      if (response.status === 202) {
+        data = await waitForJob(data.status_url);
+      }
 
       if (data.ingredients) {
         navigate("/results", {
@@ -31,7 +61,9 @@ const Search = () => {
         navigate("/results", {
           state: {
             productName: data.product_name || query,
-            ingredients: [{ name: "No data found", score: "N/A" }],
+            ingredients: [
+              { name: data.error || "No data found", score: "N/A" },
+            ],
             productUrl: data.product_url,
           },
         });
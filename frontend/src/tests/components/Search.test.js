@@ -0,0 +1,55 @@
+import { waitForJob } from "../../components/search";
+
+global.fetch = jest.fn();
+
+const jsonResponse = (status, body) => ({
+  ok: status >= 200 && status < 300,
+  status,
+  json: async () => body,
+});
+
+describe("waitForJob", () => {
+  beforeEach(() => {
+    fetch.mockReset();
+  });
+
+  it("returns the result once the job is done", async () => {
+    fetch
+      .mockResolvedValueOnce(jsonResponse(200, { status: "running" }))
+      .mockResolvedValueOnce(
+        jsonResponse(200, { status: "done", result: { ingredients: [] } }),
+      );
+
+    await expect(waitForJob("/jobs/1", { interval: 0 })).resolves.toEqual({
+      ingredients: [],
+    });
+    expect(fetch).toHaveBeenCalledTimes(2);
+  });
+
+  it("reports an expired job instead of polling it", async () => {
+    fetch.mockResolvedValueOnce(jsonResponse(404, { error: "Unknown job" }));
+
+    await expect(waitForJob("/jobs/1", { interval: 0 })).resolves.toEqual({
+      error: "The lookup expired, please search again",
+    });
+    expect(fetch).toHaveBeenCalledTimes(1);
+  });
+
+  it("reports other error statuses", async () => {
+    fetch.mockResolvedValueOnce(jsonResponse(500, {}));
+
+    await expect(waitForJob("/jobs/1", { interval: 0 })).resolves.toEqual({
+      error: "Checking the lookup failed (HTTP 500)",
+    });
+  });
+
+  it("stops polling a job that stays queued", async () => {
+    fetch.mockResolvedValue(jsonResponse(200, { status: "queued" }));
+
+    await expect(
+      waitForJob("/jobs/1", { interval: 5, timeout: 20 }),
+    ).resolves.toEqual({
+      error: "The lookup is taking too long, please try again later",
+    });
+  });
+});